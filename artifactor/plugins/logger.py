@@ -34,6 +34,7 @@ class Logger(ArtifactorBasePlugin):
         self.register_plugin_hook('start_test', self.start_test)
         self.register_plugin_hook('finish_test', self.finish_test)
         self.register_plugin_hook('log_message', self.log_message)
+        self.register_plugin_hook('log_messages', self.log_messages)
 
     def configure(self):
         self.configured = True
@@ -84,3 +85,9 @@ class Logger(ArtifactorBasePlugin):
             handler = self.store[slaveid].handler
             if handler and record.levelno >= handler.level:
                 handler.handle(record)
+
+    @ArtifactorBasePlugin.check_configured
+    def log_messages(self, log_records, slaveid):
+        """Batched :py:meth:`log_message`, sent by the log handler when it ships in batches"""
+        for log_record in log_records:
+            self.log_message(log_record, slaveid)
@@ -11,14 +11,17 @@ artifactor:
             enabled: True
             plugin: reporter
             only_failed: False #Only show faled tests in the report
+            build_interval: 0 #Min seconds between report builds while the tests run
+            render_processes: 1 #Processes rendering the provider reports
 """
 import csv
 import datetime
-import difflib
+import hashlib
 import math
 import shutil
 import time
 from copy import deepcopy
+from multiprocessing import Pool
 
 import os
 import re
@@ -29,6 +32,7 @@ from artifactor import ArtifactorBasePlugin
 from cfme.utils import process_pytest_path
 from cfme.utils.conf import cfme_data  # Only for the provider specific reports
 from cfme.utils.path import template_path
+from cfme.utils.tb_clusters import TracebackClusters
 import six
 
 _tests_tpl = {
@@ -65,38 +69,153 @@ def overall_test_status(statuses):
     return "passed"
 
 
-class ReporterBase(object):
-    def _run_report(self, old_artifacts, artifact_dir, version=None, fw_version=None):
-        template_data = self.process_data(old_artifacts, artifact_dir, version, fw_version)
+# Loaded once per process, jinja caches the compiled templates in it
+_env = None
+# Digest of the static files, computed once per process
+_dist_hash = None
+
+
+def _template_env():
+    global _env
+    if _env is None:
+        _env = Environment(loader=FileSystemLoader(template_path.strpath))
+    return _env
+
+
+def _render_page(page):
+    """Render a template into a file, ``page`` is a tuple of the template name, the template data
+    and the path of the file. A module level function so it can run in a process pool."""
+    template, data, path = page
+    with open(path, "w") as f:
+        f.write(_template_env().get_template(template).render(**data))
+
+
+def _dist_digest():
+    global _dist_hash
+    if _dist_hash is None:
+        digest = hashlib.sha1()
+        dist = template_path.join('dist')
+        for path in sorted(dist.visit(lambda p: p.check(file=True))):
+            digest.update(path.relto(dist).encode('utf-8'))
+            digest.update(path.read_binary())
+        _dist_hash = digest.hexdigest()
+    return _dist_hash
 
-        if hasattr(self, 'only_failed') and self.only_failed:
+
+class ReporterBase(object):
+    """Builds the html reports from the artifacts
+
+    The data of every test is kept between builds and only processed again when its artifacts
+    change, and the overall, per provider and per module aggregates are all computed in one pass
+    over the tests, so building the report again while the run goes on only costs the rendering.
+    Pages whose data didn't change since they were written are not rendered again.
+    """
+    #: Only show the tests that didn't pass in the report
+    only_failed = False
+    #: Minimum seconds between two builds of the report triggered by ``build_report``, the
+    #: report is always built at the end of the session
+    build_interval = 0
+    #: Number of processes rendering the provider pages, 1 renders them in this process
+    render_processes = 1
+
+    _test_cache = None
+    _providers_of = None
+    _provider_patterns = None
+    _tb_clusters = None
+    _tb_errors = frozenset()
+    _rendered = None
+    _static_current = None
+    _last_build = 0
+
+    def _run_report(self, old_artifacts, artifact_dir, version=None, fw_version=None,
+                    providers=False, force=True):
+        if not force and time.time() - self._last_build < self.build_interval:
+            return
+        self._last_build = time.time()
+        template_data = self.process_data(
+            old_artifacts, artifact_dir, version, fw_version, providers=providers)
+
+        if self.only_failed:
             template_data['tests'] = [x for x in template_data['tests']
                                   if x['outcomes']['overall'] not in ['passed']]
 
         self.render_report(template_data, 'report', artifact_dir, 'test_report.html')
+        if providers:
+            self.render_pages(
+                [('test_report_provider.html', data,
+                  os.path.join(artifact_dir, 'report_{}.html'.format(mgmt)))
+                 for mgmt, data in template_data['providers'].items()],
+                processes=self.render_processes)
 
-    def _run_provider_report(self, old_artifacts, artifact_dir, version=None, fw_version=None):
-        for mgmt in cfme_data['management_systems'].keys():
-            template_data = self.process_data(old_artifacts, artifact_dir, version, fw_version,
-                name_filter=mgmt)
+    def render_report(self, report, filename, log_dir, template):
+        self.render_pages([(template, report, os.path.join(log_dir, '{}.html'.format(filename)))])
 
-            self.render_report(template_data, "report_{}".format(mgmt), artifact_dir,
-                'test_report_provider.html')
+    def render_pages(self, pages, processes=1):
+        """Render the pages whose data changed since they were last written
 
-    def render_report(self, report, filename, log_dir, template):
-        template_env = Environment(
-            loader=FileSystemLoader(template_path.strpath)
-        )
-        data = template_env.get_template(template).render(**report)
-
-        with open(os.path.join(log_dir, '{}.html'.format(filename)), "w") as f:
-            f.write(data)
-        try:
-            shutil.copytree(template_path.join('dist').strpath, os.path.join(log_dir, 'dist'))
-        except OSError:
-            pass
-
-    def process_data(self, artifacts, log_dir, version, fw_version, name_filter=None):
+        Args:
+            pages: List of tuples of the template name, the template data and the file path
+            processes: Render the pages in a pool of this many processes if more than 1
+        """
+        if self._rendered is None:
+            self._rendered = {}
+        pages = [page for page in pages if self._rendered.get(page[2]) != page[1]]
+        if processes > 1 and len(pages) > 1:
+            pool = Pool(min(processes, len(pages)))
+            try:
+                pool.map(_render_page, pages)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for page in pages:
+                _render_page(page)
+        for template, data, path in pages:
+            self._rendered[path] = data
+            self.copy_static(os.path.dirname(path))
+
+    def copy_static(self, log_dir):
+        """Copy the static files the pages use next to them, unless the copy there is current"""
+        if self._static_current is None:
+            self._static_current = set()
+        if log_dir in self._static_current:
+            return
+        target = local(log_dir).join('dist')
+        stamp = target.join('.digest')
+        digest = _dist_digest()
+        if not (stamp.check() and stamp.read() == digest):
+            try:
+                if target.check():
+                    target.remove()
+                shutil.copytree(template_path.join('dist').strpath, target.strpath)
+                stamp.write(digest)
+            except EnvironmentError:
+                return
+        self._static_current.add(log_dir)
+
+    def providers_of(self, test_name):
+        """Keys of the providers whose report a test is shown in"""
+        if self._provider_patterns is None:
+            self._provider_patterns = [
+                (mgmt, re.compile('{}[-\]]+'.format(mgmt)))
+                for mgmt in cfme_data['management_systems'].keys()]
+            self._providers_of = {}
+        if test_name not in self._providers_of:
+            self._providers_of[test_name] = [
+                mgmt for mgmt, pattern in self._provider_patterns if pattern.search(test_name)]
+        return self._providers_of[test_name]
+
+    def process_data(self, artifacts, log_dir, version, fw_version, name_filter=None,
+                     providers=False):
+        """Build the template data of the report
+
+        Args:
+            name_filter: Only show the tests of this provider
+            providers: Also build the template data of the provider reports, in
+                ``template_data['providers']``
+        """
+        if self._test_cache is None:
+            self._test_cache = {}
         tb_errors = []
         blocker_skip_count = 0
         provider_skip_count = 0
@@ -104,152 +223,190 @@ class ReporterBase(object):
         template_data['version'] = version
         template_data['fw_version'] = fw_version
         log_dir = local(log_dir).strpath + "/"
-        counts = {
-            'passed': 0,
-            'failed': 0,
-            'skipped': 0,
-            'error': 0,
-            'xfailed': 0,
-            'xpassed': 0}
-        current_counts = {
-            'passed': 0,
-            'failed': 0,
-            'skipped': 0,
-            'error': 0,
-            'xfailed': 0,
-            'xpassed': 0}
-        colors = {
-            'passed': 'success',
-            'failed': 'warning',
-            'error': 'danger',
-            'xpassed': 'danger',
-            'xfailed': 'success',
-            'skipped': 'info'}
-        # Iterate through the tests and process the counts and durations
+        counts = dict.fromkeys(_tests_tpl['_stats'], 0)
+        current_counts = dict.fromkeys(_tests_tpl['_stats'], 0)
+        tests = deepcopy(_tests_tpl)
+        tests['_sub']['tests'] = deepcopy(_tests_tpl)
+        provider_data = {}
+        if providers:
+            for mgmt in cfme_data['management_systems'].keys():
+                provider_tests = deepcopy(_tests_tpl)
+                provider_tests['_sub']['tests'] = deepcopy(_tests_tpl)
+                provider_data[mgmt] = {
+                    'counts': dict.fromkeys(_tests_tpl['_stats'], 0), 'tree': provider_tests,
+                    'version': version, 'fw_version': fw_version}
+        qa = set()
+        now = time.time()
+        # One pass through the tests, building the counts, the tree of modules and the
+        # provider data along the way
         for test_name, test in artifacts.items():
             if not test.get('statuses'):
                 continue
             overall_status = overall_test_status(test['statuses'])
-            counts[overall_status] += 1
-            if not test.get('old', False):
-                current_counts[overall_status] += 1
-            color = colors[overall_status]
             # This was removed previously but is needed as the overall is not generated
             # until the test finishes. So this is here as a shim.
             test['statuses']['overall'] = overall_status
-            test_data = {'name': test_name, 'outcomes': test['statuses'],
-                         'slaveid': test.get('slaveid', "Unknown"), 'color': color}
-            if 'composite' in test:
-                test_data['composite'] = test['composite']
-
-            if 'skipped' in test:
-                if test['skipped'].get('type') == 'provider':
-                    provider_skip_count += 1
-                    test_data['skip_provider'] = test['skipped'].get('reason')
-                if test['skipped'].get('type') == 'blocker':
-                    blocker_skip_count += 1
-                    test_data['skip_blocker'] = test['skipped'].get('reason')
-
+            test_data, exc_type = self._test_data(test_name, test, log_dir)
+            counts[overall_status] += 1
+            if not test.get('old', False):
+                current_counts[overall_status] += 1
+            if 'skip_provider' in test_data:
+                provider_skip_count += 1
             if 'skip_blocker' in test_data:
-                # Fix the inconveniently long list of repeated blockers until we sort out sets
-                # in riggerlib somehow.
-                test_data['skip_blocker'] = sorted(set(test_data['skip_blocker']))
-
-            if test.get('old', False):
-                test_data['old'] = True
-
-            if test.get('start_time'):
-                if test.get('finish_time'):
-                    test_data['in_progress'] = False
-                    test_data['duration'] = test['finish_time'] - test['start_time']
-                else:
-                    test_data['duration'] = time.time() - test['start_time']
-                    test_data['in_progress'] = True
-
-            # Set up destinations for the files
-            test_data["file_groups"] = []
-            test_data['qa_contact'] = []
-            processed_groups = {}
-            order = 0
-            for file_dict in test.get('files', []):
-                group = file_dict["group_id"]
-                if group not in processed_groups:
-                    processed_groups[group] = (order, [])
-                    order += 1
-                processed_groups[group][-1].append(file_dict)
-            # Current structure:
-            # {groupid: (group_order, [{filedict1}, {filedict2}])}
-            # Sorting by group_order
-            processed_groups = sorted(processed_groups.items(), key=lambda kv: kv[1][0])
-            # And now make it [(groupid, [{filedict1}, {filedict2}, ...])]
-            processed_groups = [(group_name, files) for group_name, (_, files) in processed_groups]
-            for group_name, file_dicts in processed_groups:
-                group_file_list = []
-                for file_dict in file_dicts:
-                    if file_dict["file_type"] == "qa_contact":
-                        with open(file_dict["os_filename"], 'rb') as qafile:
-                            qareader = csv.reader(qafile, delimiter=',', quotechar='"')
-                            for qacontact in qareader:
-                                test_data['qa_contact'].append(qacontact)
-                                if qacontact[0] not in template_data['qa']:
-                                    template_data['qa'].append(qacontact[0])
-                        continue  # Do not store, handled a different way :)
-                    elif file_dict["file_type"] == "short_tb":
-                        with open(file_dict["os_filename"], 'r') as short_tb:
-                            test_data["short_tb"] = short_tb.read()
-                        continue
-                    file_dict["filename"] = file_dict["os_filename"].replace(log_dir, "")
-                    group_file_list.append(file_dict)
-
-                test_data["file_groups"].append((group_name, group_file_list))
-            # Snd remove groups that are left empty because of eg. traceback or qa contact
-            test_data["file_groups"] = filter(
-                lambda group: len(group[1]) > 0, test_data["file_groups"])
-            if "short_tb" in test_data and test_data["short_tb"]:
-                urls = [url for url in URL.findall(test_data["short_tb"])]
-                if urls:
-                    test_data["urls"] = urls
+                blocker_skip_count += 1
+            for qacontact in test_data['qa_contact']:
+                if qacontact[0] not in qa:
+                    qa.add(qacontact[0])
+                    template_data['qa'].append(qacontact[0])
+            if test_data.get('short_tb') and overall_status in ('failed', 'error'):
+                tb_errors.append((test_data['short_tb'], test_name, exc_type))
+            if test_data.get('in_progress'):
+                test_data = dict(test_data, duration=now - test['start_time'])
+
+            names = self.providers_of(test_name) if providers or name_filter else ()
+            if name_filter and name_filter not in names:
+                continue
             template_data['tests'].append(test_data)
+            self.build_dict(test_name.replace('cfme/', ''), tests, test_data)
+            for mgmt in names if providers else ():
+                provider_data[mgmt]['counts'][overall_status] += 1
+                self.build_dict(test_name.replace('cfme/', ''), provider_data[mgmt]['tree'],
+                                test_data)
+
         template_data['top10'] = self.top10(tb_errors)
         template_data['counts'] = counts
         template_data['current_counts'] = current_counts
         template_data['blocker_skip_count'] = blocker_skip_count
         template_data['provider_skip_count'] = provider_skip_count
+        template_data['ndata'] = self.build_li(tests)
+        for data in provider_data.values():
+            data['ndata'] = self.build_li(data.pop('tree'))
+        template_data['providers'] = provider_data
 
-        if name_filter:
-            template_data['tests'] = [x for x in template_data['tests']
-                                      if re.findall('{}[-\]]+'.format(name_filter), x['name'])]
-
-        # Create the tree dict that is used for js tree
-        # Note template_data['tests'] != tests
-        tests = deepcopy(_tests_tpl)
-        tests['_sub']['tests'] = deepcopy(_tests_tpl)
+        # Render copies with the durations formatted, the tree keeps them in seconds
+        template_data['tests'] = [
+            dict(test, duration=str(datetime.timedelta(seconds=math.ceil(test['duration']))))
+            if test.get('duration') else test
+            for test in template_data['tests']]
 
-        for test in template_data['tests']:
-            self.build_dict(test['name'].replace('cfme/', ''), tests, test)
+        return template_data
 
-        template_data['ndata'] = self.build_li(tests)
+    def _test_data(self, test_name, test, log_dir):
+        """The data of a test for the templates and the name of its exception type
 
-        for test in template_data['tests']:
-            if test.get('duration'):
-                test['duration'] = str(datetime.timedelta(
-                    seconds=math.ceil(test['duration'])))
+        The data is kept until the artifacts of the test change, so the files of a test are read
+        once and not on every build of the report.
+        """
+        key = repr([test.get(field) for field in (
+            'statuses', 'start_time', 'finish_time', 'slaveid', 'skipped', 'old', 'composite',
+            'exception', 'files')])
+        cached = self._test_cache.get(test_name)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
 
-        return template_data
+        colors = {
+            'passed': 'success',
+            'failed': 'warning',
+            'error': 'danger',
+            'xpassed': 'danger',
+            'xfailed': 'success',
+            'skipped': 'info'}
+        overall_status = test['statuses']['overall']
+        test_data = {'name': test_name, 'outcomes': dict(test['statuses']),
+                     'slaveid': test.get('slaveid', "Unknown"), 'color': colors[overall_status]}
+        if 'composite' in test:
+            test_data['composite'] = test['composite']
+
+        if 'skipped' in test:
+            if test['skipped'].get('type') == 'provider':
+                test_data['skip_provider'] = test['skipped'].get('reason')
+            if test['skipped'].get('type') == 'blocker':
+                test_data['skip_blocker'] = test['skipped'].get('reason')
+
+        if 'skip_blocker' in test_data:
+            # Fix the inconveniently long list of repeated blockers until we sort out sets
+            # in riggerlib somehow.
+            test_data['skip_blocker'] = sorted(set(test_data['skip_blocker']))
+
+        if test.get('old', False):
+            test_data['old'] = True
+
+        if test.get('start_time'):
+            if test.get('finish_time'):
+                test_data['in_progress'] = False
+                test_data['duration'] = test['finish_time'] - test['start_time']
+            else:
+                test_data['duration'] = time.time() - test['start_time']
+                test_data['in_progress'] = True
+
+        # Set up destinations for the files
+        test_data["file_groups"] = []
+        test_data['qa_contact'] = []
+        processed_groups = {}
+        order = 0
+        for file_dict in test.get('files', []):
+            group = file_dict["group_id"]
+            if group not in processed_groups:
+                processed_groups[group] = (order, [])
+                order += 1
+            processed_groups[group][-1].append(file_dict)
+        # Current structure:
+        # {groupid: (group_order, [{filedict1}, {filedict2}])}
+        # Sorting by group_order
+        processed_groups = sorted(processed_groups.items(), key=lambda kv: kv[1][0])
+        # And now make it [(groupid, [{filedict1}, {filedict2}, ...])]
+        processed_groups = [(group_name, files) for group_name, (_, files) in processed_groups]
+        for group_name, file_dicts in processed_groups:
+            group_file_list = []
+            for file_dict in file_dicts:
+                if file_dict["file_type"] == "qa_contact":
+                    with open(file_dict["os_filename"], 'rb') as qafile:
+                        qareader = csv.reader(qafile, delimiter=',', quotechar='"')
+                        for qacontact in qareader:
+                            test_data['qa_contact'].append(qacontact)
+                    continue  # Do not store, handled a different way :)
+                elif file_dict["file_type"] == "short_tb":
+                    with open(file_dict["os_filename"], 'r') as short_tb:
+                        test_data["short_tb"] = short_tb.read()
+                    continue
+                group_file_list.append(
+                    dict(file_dict, filename=file_dict["os_filename"].replace(log_dir, "")))
+
+            test_data["file_groups"].append((group_name, group_file_list))
+        # Snd remove groups that are left empty because of eg. traceback or qa contact
+        test_data["file_groups"] = [
+            group for group in test_data["file_groups"] if len(group[1]) > 0]
+        if "short_tb" in test_data and test_data["short_tb"]:
+            urls = [url for url in URL.findall(test_data["short_tb"])]
+            if urls:
+                test_data["urls"] = urls
+
+        exc_type = test.get('exception', {}).get('exception')
+        self._test_cache[test_name] = (key, test_data, exc_type)
+        return test_data, exc_type
 
     def top10(self, tb_errors):
-        sets = []
-        for entry in tb_errors:
-            for tset in sets:
-                if difflib.SequenceMatcher(a=entry[0][:10], b=tset[0][0][:10]).ratio() > .8:
-                    if difflib.SequenceMatcher(a=entry[0][:20], b=tset[0][0][:20]).ratio() > .75:
-                        if difflib.SequenceMatcher(a=entry[0][:30], b=tset[0][0][:30]).ratio() > .7:
-                            tset.append(entry)
-                            break
-            else:
-                sets.append([entry])
+        """Groups of similar tracebacks, the 10 largest first
+
+        The groups are kept between builds of the report, the tracebacks already grouped are
+        not grouped again unless some of them are gone.
 
-        return sorted(sets, lambda p, q: cmp(len(p), len(q)), reverse=True)[:10]
+        Args:
+            tb_errors: List of ``(short_tb, test_name, exception_type)`` tuples of the failed tests
+
+        Returns:
+            A list of groups, lists of ``(short_tb, test_name)`` tuples
+        """
+        current = frozenset(tb_errors)
+        if self._tb_clusters is None or not self._tb_errors <= current:
+            self._tb_clusters = TracebackClusters()
+            self._tb_errors = frozenset()
+        for entry in tb_errors:
+            if entry not in self._tb_errors:
+                short_tb, test_name, exc_type = entry
+                self._tb_clusters.add(short_tb, test_name, exc_type)
+        self._tb_errors = current
+        return self._tb_clusters.top(10)
 
     def build_dict(self, path, container, contents):
         """
@@ -341,8 +498,7 @@ class ReporterBase(object):
 class Reporter(ArtifactorBasePlugin, ReporterBase):
     def plugin_initialize(self):
         self.register_plugin_hook('report_test', self.report_test)
-        self.register_plugin_hook('finish_session', self.run_report)
-        self.register_plugin_hook('finish_session', self.run_provider_report)
+        self.register_plugin_hook('finish_session', self.run_session_report)
         self.register_plugin_hook('build_report', self.run_report)
         self.register_plugin_hook('start_test', self.start_test)
         self.register_plugin_hook('skip_test', self.skip_test)
@@ -353,6 +509,8 @@ class Reporter(ArtifactorBasePlugin, ReporterBase):
 
     def configure(self):
         self.only_failed = self.data.get('only_failed', False)
+        self.build_interval = self.data.get('build_interval', 0)
+        self.render_processes = self.data.get('render_processes', 1)
         self.configured = True
 
     @ArtifactorBasePlugin.check_configured
@@ -417,8 +575,8 @@ class Reporter(ArtifactorBasePlugin, ReporterBase):
 
     @ArtifactorBasePlugin.check_configured
     def run_report(self, old_artifacts, artifact_dir, version=None, fw_version=None):
-        self._run_report(old_artifacts, artifact_dir, version, fw_version)
+        self._run_report(old_artifacts, artifact_dir, version, fw_version, force=False)
 
     @ArtifactorBasePlugin.check_configured
-    def run_provider_report(self, old_artifacts, artifact_dir, version=None, fw_version=None):
-        self._run_provider_report(old_artifacts, artifact_dir, version, fw_version)
+    def run_session_report(self, old_artifacts, artifact_dir, version=None, fw_version=None):
+        self._run_report(old_artifacts, artifact_dir, version, fw_version, providers=True)
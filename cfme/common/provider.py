@@ -898,8 +898,8 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
 
         vm_ids = []
         try:
-            for vm in self.appliance.rest_api.collections.vms.all:
-                vm_ids.append(vm.id)
+            for vm in self.appliance.rest_api.iter_resources('vms'):
+                vm_ids.append(vm['id'])
         except APIException:
             return None
 
@@ -914,8 +914,8 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
 
         host_ids = []
         try:
-            for host in self.appliance.rest_api.collections.hosts.all:
-                host_ids.append(host.id)
+            for host in self.appliance.rest_api.iter_resources('hosts'):
+                host_ids.append(host['id'])
         except APIException:
             return None
         return host_ids
@@ -927,8 +927,8 @@ class BaseProvider(Taggable, Updateable, Navigatable, BaseEntity):
 
         template_ids = []
         try:
-            for template in self.appliance.rest_api.collections.templates.all:
-                template_ids.append(template.id)
+            for template in self.appliance.rest_api.iter_resources('templates'):
+                template_ids.append(template['id'])
         except APIException:
             return None
         return template_ids
@@ -13,7 +13,6 @@ from cfme.exceptions import ItemNotFound
 from cfme.common import Taggable, TagPageView
 from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep, navigator, navigate_to
-from cfme.utils.providers import get_crud_by_name
 from widgetastic_manageiq import Accordion, ManageIQTree, View, Table
 
 
@@ -89,7 +88,7 @@ class ContainerCollection(GetRandomInstancesMixin, BaseCollection):
 
     ENTITY = Container
 
-    def all(self):
+    def iter_all(self):
         # containers table has ems_id, join with ext_mgmgt_systems on id for provider name
         # Then join with container_groups on the id for the pod
         # TODO Update to use REST API instead of DB queries
@@ -115,13 +114,12 @@ class ContainerCollection(GetRandomInstancesMixin, BaseCollection):
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             container_query = container_query.filter(ems_table.name == provider.name)
-        containers = []
-        for name, pod_name, ems_name in container_query.all():
-            containers.append(
-                self.instantiate(name=name, pod=pod_name,
-                                 provider=provider or get_crud_by_name(ems_name)))
+        return self.iter_db_entities(
+            container_query, lambda name, pod_name: dict(name=name, pod=pod_name),
+            provider=provider)
 
-        return containers
+    def all(self):
+        return list(self.iter_all())
 
 
 @navigator.register(ContainerCollection, 'All')
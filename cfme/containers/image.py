@@ -15,7 +15,6 @@ from cfme.exceptions import ItemNotFound
 from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep, navigator, navigate_to
 from cfme.utils.log import logger
-from cfme.utils.providers import get_crud_by_name
 from cfme.utils.wait import TimedOutError, wait_for
 from widgetastic_manageiq import BaseEntitiesView, SummaryTable
 
@@ -126,7 +125,7 @@ class ImageCollection(GetRandomInstancesMixin, BaseCollection, PolicyProfileAssi
 
     ENTITY = Image
 
-    def all(self):
+    def iter_all(self):
         # container_images has ems_id, join with ext_mgmgt_systems on id for provider name
         # TODO Update to use REST API instead of DB queries
         image_table = self.appliance.db.client['container_images']
@@ -134,8 +133,7 @@ class ImageCollection(GetRandomInstancesMixin, BaseCollection, PolicyProfileAssi
         image_registry_table = self.appliance.db.client['container_image_registries']
         image_query = (
             self.appliance.db.client.session
-                .query(image_table.name, image_table.image_ref, ems_table.name,
-                       image_registry_table.name)
+                .query(image_table.name, image_table.image_ref, ems_table.name)
                 .join(ems_table, image_table.ems_id == ems_table.id)
                 .join(image_registry_table,
                       image_table.container_image_registry_id == image_registry_table.id))
@@ -153,11 +151,11 @@ class ImageCollection(GetRandomInstancesMixin, BaseCollection, PolicyProfileAssi
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             image_query = image_query.filter(ems_table.name == provider.name)
-        images = []
-        for name, image_ref, ems_name, _ in image_query.all():
-            images.append(self.instantiate(name=name, id=image_ref,
-                                           provider=provider or get_crud_by_name(ems_name)))
-        return images
+        return self.iter_db_entities(
+            image_query, lambda name, image_ref: dict(name=name, id=image_ref), provider=provider)
+
+    def all(self):
+        return list(self.iter_all())
 
     def check_compliance_multiple_images(self, image_entities, check_on_entity=True, timeout=240):
         """Initiates compliance check and waits for it to finish on several Images.
@@ -12,7 +12,6 @@ from cfme.exceptions import ItemNotFound
 from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance import Navigatable
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep, navigator, navigate_to
-from cfme.utils.providers import get_crud_by_name
 
 
 class ImageRegistryAllView(ContainerObjectAllBaseView):
@@ -62,7 +61,7 @@ class ImageRegistryCollection(GetRandomInstancesMixin, BaseCollection):
 
     ENTITY = ImageRegistry
 
-    def all(self):
+    def iter_all(self):
         # container_image_registries table has ems_id,
         # join with ext_mgmgt_systems on id for provider name
         image_registry_table = self.appliance.db.client['container_image_registries']
@@ -76,13 +75,11 @@ class ImageRegistryCollection(GetRandomInstancesMixin, BaseCollection):
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             image_registry_query = image_registry_query.filter(ems_table.name == provider.name)
-        image_registries = []
-        for host, ems_name in image_registry_query.all():
-            image_registries.append(
-                self.instantiate(host=host,
-                                 provider=provider or get_crud_by_name(ems_name)))
+        return self.iter_db_entities(
+            image_registry_query, lambda host: dict(host=host), provider=provider)
 
-        return image_registries
+    def all(self):
+        return list(self.iter_all())
 
 
 @navigator.register(ImageRegistryCollection, 'All')
@@ -17,7 +17,6 @@ from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance.implementations.ui import (CFMENavigateStep, navigator,
                                                      navigate_to)
 from cfme.common.provider_views import ProviderDetailsToolBar
-from cfme.utils.providers import get_crud_by_name
 from widgetastic_manageiq import Button, Text, TimelinesView
 
 
@@ -91,7 +90,7 @@ class NodeCollection(GetRandomInstancesMixin, BaseCollection):
 
     ENTITY = Node
 
-    def all(self):
+    def iter_all(self):
         # container_nodes table has ems_id, join with ext_mgmgt_systems on id for provider name
         # TODO Update to use REST API instead of DB queries
         node_table = self.appliance.db.client['container_nodes']
@@ -109,11 +108,11 @@ class NodeCollection(GetRandomInstancesMixin, BaseCollection):
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             node_query = node_query.filter(ems_table.name == provider.name)
-        nodes = []
-        for name, ems_name in node_query.all():
-            nodes.append(self.instantiate(name=name,
-                                          provider=provider or get_crud_by_name(ems_name)))
-        return nodes
+        return self.iter_db_entities(
+            node_query, lambda name: dict(name=name), provider=provider)
+
+    def all(self):
+        return list(self.iter_all())
 
 
 @navigator.register(NodeCollection, 'All')
@@ -13,7 +13,6 @@ from cfme.containers.provider import (ContainerObjectAllBaseView,
 from cfme.exceptions import ItemNotFound
 from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep, navigator, navigate_to
-from cfme.utils.providers import get_crud_by_name
 from widgetastic_manageiq import NestedSummaryTable
 
 
@@ -66,7 +65,7 @@ class PodCollection(GetRandomInstancesMixin, BaseCollection):
 
     ENTITY = Pod
 
-    def all(self):
+    def iter_all(self):
         # container_groups table has ems_id, join with ext_mgmgt_systems on id for provider name
         # Then join with container_projects on the id for the project
         # TODO Update to use REST API instead of DB queries
@@ -87,13 +86,12 @@ class PodCollection(GetRandomInstancesMixin, BaseCollection):
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             pod_query = pod_query.filter(ems_table.name == provider.name)
-        pods = []
-        for name, project_name, ems_name, in pod_query.all():
-            pods.append(self.instantiate(name=name,
-                                         project_name=project_name,
-                                         provider=provider or get_crud_by_name(ems_name)))
+        return self.iter_db_entities(
+            pod_query, lambda name, project_name: dict(name=name, project_name=project_name),
+            provider=provider)
 
-        return pods
+    def all(self):
+        return list(self.iter_all())
 
 
 @navigator.register(PodCollection, 'All')
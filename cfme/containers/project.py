@@ -11,7 +11,6 @@ from cfme.containers.provider import (ContainerObjectAllBaseView,
 from cfme.exceptions import ItemNotFound
 from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep, navigator, navigate_to
-from cfme.utils.providers import get_crud_by_name
 
 
 class ProjectAllView(ContainerObjectAllBaseView):
@@ -61,7 +60,7 @@ class ProjectCollection(GetRandomInstancesMixin, BaseCollection):
 
     ENTITY = Project
 
-    def all(self):
+    def iter_all(self):
         # container_projects table has ems_id, join with ext_mgmgt_systems on id for provider name
         # TODO Update to use REST API instead of DB queries
         project_table = self.appliance.db.client['container_projects']
@@ -79,12 +78,11 @@ class ProjectCollection(GetRandomInstancesMixin, BaseCollection):
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             project_query = project_query.filter(ems_table.name == provider.name)
-        projects = []
-        for name, ems_name in project_query.all():
-            projects.append(self.instantiate(name=name,
-                                             provider=provider or get_crud_by_name(ems_name)))
+        return self.iter_db_entities(
+            project_query, lambda name: dict(name=name), provider=provider)
 
-        return projects
+    def all(self):
+        return list(self.iter_all())
 
 
 @navigator.register(ProjectCollection, 'All')
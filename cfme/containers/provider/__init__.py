@@ -726,5 +726,18 @@ class GetRandomInstancesMixin(object):
 
     def get_random_instances(self, count=1):
         """Getting random instances of the object."""
-        all_instances = self.all()
-        return random.sample(all_instances, min(count, len(all_instances)))
+        iter_all = getattr(self, 'iter_all', None)
+        if iter_all is None:
+            all_instances = self.all()
+            return random.sample(all_instances, min(count, len(all_instances)))
+        # Reservoir sampling, only ``count`` instances are kept while the rest are streamed by
+        sample = []
+        for index, instance in enumerate(iter_all()):
+            if index < count:
+                sample.append(instance)
+            else:
+                replaced = random.randint(0, index)
+                if replaced < count:
+                    sample[replaced] = instance
+        random.shuffle(sample)
+        return sample
@@ -10,7 +10,6 @@ from cfme.containers.provider import (ContainerObjectAllBaseView, ContainerObjec
 from cfme.exceptions import ItemNotFound
 from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep, navigator, navigate_to
-from cfme.utils.providers import get_crud_by_name
 
 
 class ReplicatorAllView(ContainerObjectAllBaseView):
@@ -57,7 +56,7 @@ class ReplicatorCollection(GetRandomInstancesMixin, BaseCollection):
 
     ENTITY = Replicator
 
-    def all(self):
+    def iter_all(self):
         # container_replicators table has ems_id,
         # join with ext_mgmgt_systems on id for provider name
         # Then join with container_projects on the id for the project
@@ -75,12 +74,12 @@ class ReplicatorCollection(GetRandomInstancesMixin, BaseCollection):
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             replicator_query = replicator_query.filter(ems_table.name == provider.name)
-        replicators = []
-        for name, project_name, ems_name in replicator_query.all():
-            replicators.append(self.instantiate(name=name, project_name=project_name,
-                                                provider=provider or get_crud_by_name(ems_name)))
+        return self.iter_db_entities(
+            replicator_query, lambda name, project_name: dict(name=name, project_name=project_name),
+            provider=provider)
 
-        return replicators
+    def all(self):
+        return list(self.iter_all())
 
 
 @navigator.register(ReplicatorCollection, 'All')
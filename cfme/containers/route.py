@@ -10,7 +10,6 @@ from cfme.containers.provider import (ContainerObjectAllBaseView, ContainerObjec
 from cfme.exceptions import ItemNotFound
 from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep, navigator, navigate_to
-from cfme.utils.providers import get_crud_by_name
 
 
 class RouteAllView(ContainerObjectAllBaseView):
@@ -57,7 +56,7 @@ class RouteCollection(GetRandomInstancesMixin, BaseCollection):
 
     ENTITY = Route
 
-    def all(self):
+    def iter_all(self):
         # container_routes table has ems_id, join with ext_mgmgt_systems on id for provider name
         # Then join with container_projects on the id for the project
         route_table = self.appliance.db.client['container_routes']
@@ -73,12 +72,12 @@ class RouteCollection(GetRandomInstancesMixin, BaseCollection):
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             route_query = route_query.filter(ems_table.name == provider.name)
-        routes = []
-        for name, project_name, ems_name in route_query.all():
-            routes.append(self.instantiate(name=name, project_name=project_name,
-                                           provider=provider or get_crud_by_name(ems_name)))
+        return self.iter_db_entities(
+            route_query, lambda name, project_name: dict(name=name, project_name=project_name),
+            provider=provider)
 
-        return routes
+    def all(self):
+        return list(self.iter_all())
 
 
 @navigator.register(RouteCollection, 'All')
@@ -9,7 +9,6 @@ from cfme.containers.provider import (ContainerObjectAllBaseView, ContainerObjec
 from cfme.exceptions import ItemNotFound
 from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep, navigator, navigate_to
-from cfme.utils.providers import get_crud_by_name
 
 
 class ServiceView(ContainerObjectAllBaseView, LoggingableView):
@@ -66,7 +65,7 @@ class ServiceCollection(GetRandomInstancesMixin, BaseCollection):
 
     ENTITY = Service
 
-    def all(self):
+    def iter_all(self):
         # container_services table has ems_id, join with ext_mgmgt_systems on id for provider name
         # Then join with container_projects on the id for the project
         service_table = self.appliance.db.client['container_services']
@@ -82,12 +81,12 @@ class ServiceCollection(GetRandomInstancesMixin, BaseCollection):
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             service_query = service_query.filter(ems_table.name == provider.name)
-        services = []
-        for name, project_name, ems_name in service_query.all():
-            services.append(self.instantiate(name=name, project_name=project_name,
-                                             provider=provider or get_crud_by_name(ems_name)))
+        return self.iter_db_entities(
+            service_query, lambda name, project_name: dict(name=name, project_name=project_name),
+            provider=provider)
 
-        return services
+    def all(self):
+        return list(self.iter_all())
 
 
 @navigator.register(ServiceCollection, 'All')
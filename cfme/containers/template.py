@@ -9,7 +9,6 @@ from cfme.containers.provider import (ContainerObjectAllBaseView, ContainerObjec
 from cfme.exceptions import ItemNotFound
 from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep, navigator, navigate_to
-from cfme.utils.providers import get_crud_by_name
 
 
 class TemplateAllView(ContainerObjectAllBaseView):
@@ -50,7 +49,7 @@ class TemplateCollection(GetRandomInstancesMixin, BaseCollection):
 
     ENTITY = Template
 
-    def all(self):
+    def iter_all(self):
         # container_templates table has ems_id, join with ext_mgmgt_systems on id for provider name
         # Then join with container_projects on the id for the project
         template_table = self.appliance.db.client['container_templates']
@@ -66,12 +65,12 @@ class TemplateCollection(GetRandomInstancesMixin, BaseCollection):
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             template_query = template_query.filter(ems_table.name == provider.name)
-        templates = []
-        for name, project_name, ems_name in template_query.all():
-            templates.append(self.instantiate(name=name, project_name=project_name,
-                                              provider=provider or get_crud_by_name(ems_name)))
+        return self.iter_db_entities(
+            template_query, lambda name, project_name: dict(name=name, project_name=project_name),
+            provider=provider)
 
-        return templates
+    def all(self):
+        return list(self.iter_all())
 
 
 @navigator.register(TemplateCollection, 'All')
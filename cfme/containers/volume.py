@@ -10,7 +10,6 @@ from cfme.containers.provider import (ContainerObjectAllBaseView,
 from cfme.exceptions import ItemNotFound
 from cfme.modeling.base import BaseCollection, BaseEntity
 from cfme.utils.appliance.implementations.ui import CFMENavigateStep, navigator, navigate_to
-from cfme.utils.providers import get_crud_by_name
 
 
 class VolumeAllView(ContainerObjectAllBaseView):
@@ -50,7 +49,7 @@ class VolumeCollection(GetRandomInstancesMixin, BaseCollection):
 
     ENTITY = Volume
 
-    def all(self):
+    def iter_all(self):
         # container_volumes table has ems_id, join with ext_mgmgt_systems on id for provider name
         volume_table = self.appliance.db.client['container_volumes']
         ems_table = self.appliance.db.client['ext_management_systems']
@@ -64,12 +63,11 @@ class VolumeCollection(GetRandomInstancesMixin, BaseCollection):
         if self.filters.get('provider'):
             provider = self.filters.get('provider')
             volume_query = volume_query.filter(ems_table.name == provider.name)
-        volumes = []
-        for name, ems_name in volume_query.all():
-            volumes.append(self.instantiate(name=name,
-                                            provider=provider or get_crud_by_name(ems_name)))
+        return self.iter_db_entities(
+            volume_query, lambda name: dict(name=name), provider=provider)
 
-        return volumes
+    def all(self):
+        return list(self.iter_all())
 
 
 @navigator.register(VolumeCollection, 'All')
@@ -9,6 +9,11 @@
         server_address: 127.0.0.1
         server_port: 21212
         server_enabled: True
+        log_shipping:
+            batch_size: 500
+            flush_interval: 0.5
+            max_queue: 10000
+            overflow: block #block, drop
         plugins:
 
 ``log_dir`` is the destination for all artifacts
@@ -18,6 +23,10 @@
 ``reuse_dir`` if this is False and Artifactor comes across a dir that has
 already been used, it will die
 
+``log_shipping`` if present, log records are sent to the artifactor in batches from a
+background thread instead of one by one, see
+:py:meth:`cfme.utils.log.ArtifactorHandler.start_shipping` for the options
+
 
 """
 import atexit
@@ -31,7 +40,7 @@ import pytest
 from artifactor import ArtifactorClient
 from cfme.utils.blockers import BZ, Blocker
 from cfme.utils.conf import env, credentials
-from cfme.utils.log import logger
+from cfme.utils.log import artifactor_handler, logger
 from cfme.utils.net import random_port, net_check
 from cfme.utils.wait import wait_for
 from cfme.fixtures.pytest_store import write_line, store
@@ -133,10 +142,12 @@ def pytest_configure(config):
         art_client.ready = True
     else:
         config._art_proc = None
-    from cfme.utils.log import artifactor_handler
     artifactor_handler.artifactor = art_client
     if store.slave_manager:
         artifactor_handler.slaveid = store.slaveid
+    shipping = env.get('artifactor', {}).get('log_shipping')
+    if art_client and shipping is not None:
+        artifactor_handler.start_shipping(**(shipping or {}))
     config._art_client = art_client
 
 
@@ -150,6 +161,8 @@ def fire_art_hook(config, hook, **hook_args):
     if client is None:
         assert UNDER_TEST, 'missing artifactor is only valid for inprocess tests'
     else:
+        # Log records of the current phase go before hooks that may end it
+        artifactor_handler.flush()
         client.fire_hook(hook, **hook_args)
 
 
@@ -288,6 +301,7 @@ def pytest_runtest_logreport(report):
 @pytest.mark.hookwrapper
 def pytest_unconfigure(config):
     yield
+    artifactor_handler.stop_shipping(timeout=10)
     shutdown(config)
 
 
@@ -13,7 +13,8 @@ All of them are converted to the :py:class:`utils.blockers.Blocker` instances
 import pytest
 
 from cfme.fixtures.pytest_store import store
-from cfme.utils.blockers import Blocker, BZ, GH
+from cfme.utils import conf
+from cfme.utils.blockers import Blocker, BZ, GH, collect_blockers, prefetch_blockers
 
 
 @pytest.fixture(scope="function")
@@ -65,6 +66,9 @@ def pytest_addoption(parser):
 
 @pytest.mark.trylast
 def pytest_collection_modifyitems(session, config, items):
+    if config.getvalue("list_blockers") or conf.env.get('blockers', {}).get('prefetch', False):
+        # One bulk query per tracker, the slaves then load them from the shared blocker cache
+        prefetch_blockers(collect_blockers(items))
     if not config.getvalue("list_blockers"):
         return
     store.terminalreporter.write("Loading blockers ...\n", bold=True)
@@ -14,9 +14,17 @@ The Workflow
   across all nodes
 - Master enters main runtest loop, uses a generator to build lists of test groups which are then
   sent to slaves, one group at a time
+- With ``--parallel-schedule duration``, groups are instead bin-packed over the slaves longest
+  first, based on test durations recorded in the pytest cache by previous runs, and slaves that
+  run out of work take groups from the slave with the most work left
+- With ``--parallel-schedule provider``, providers are assigned to slaves up front and each
+  slave runs the tests of one provider after the other; the next provider of a slave is added
+  to its appliance in the background while it runs the last tests of the current one
 - For each phase of each test, the slave serializes test reports, which are then unserialized on
   the master and handed to the normal pytest reporting hooks, which is able to deal with test
   reports arriving out of order
+- Reports, log starts and messages are streamed to the master in batches without waiting for
+  an answer; only collection results, test requests, errors and shutdowns are acknowledged
 - Before running the last test in a group, the slave will request more tests from the master
 
   - If more tests are received, they are run
@@ -34,7 +42,7 @@ import json
 import os
 import signal
 import subprocess
-from collections import defaultdict, deque, namedtuple
+from collections import OrderedDict, defaultdict, deque, namedtuple
 from datetime import datetime
 from itertools import count
 
@@ -49,11 +57,19 @@ from _pytest import runner
 
 from cfme.fixtures import terminalreporter
 from cfme.fixtures.parallelizer import remote
+from cfme.fixtures.parallelizer.affinity import (
+    ProviderAffinityScheduler, ProviderIndex, TestGroup)
+from cfme.fixtures.parallelizer.durations import DurationScheduler, DurationStore
 from cfme.fixtures.pytest_store import store
 from cfme.utils import at_exit, conf
 from cfme.utils.log import create_sublogger
 from cfme.test_framework.appliance import PLUGIN_KEY as APPLIANCE_PLUGIN
 
+try:
+    import six.moves.cPickle as pickle
+except ImportError:
+    import pickle   # NOQA
+
 # Initialize slaveid to None, indicating this as the master process
 # slaves will set this to a unique string when they're initialized
 conf.runtime['env']['slaveid'] = None
@@ -63,6 +79,18 @@ if not conf.runtime['env'].get('ts'):
     conf.runtime['env']['ts'] = ts
 
 
+def pytest_addoption(parser):
+    group = parser.getgroup('cfme')
+    group.addoption('--parallel-schedule', dest='parallel_schedule', action='store',
+                    default='collection', choices=['collection', 'duration', 'provider'],
+                    help='How the parallelizer master orders test groups; "duration" bin-packs '
+                         'groups longest-first based on the durations of previous runs, '
+                         '"provider" assigns providers to slaves up front')
+    group.addoption('--parallel-providers-per-appliance', dest='parallel_providers_per_appliance',
+                    action='store', type=int, default=1,
+                    help='How many providers the parallelizer keeps set up on a slave appliance')
+
+
 def pytest_addhooks(pluginmanager):
     from . import hooks
     pluginmanager.add_hookspecs(hooks)
@@ -113,6 +141,7 @@ class SlaveDetail(object):
     process = attr.ib(default=None, repr=False)
 
     provider_allocation = attr.ib(default=attr.Factory(list), repr=False)
+    prewarmed = attr.ib(default=attr.Factory(set), repr=False)
 
     def start(self):
         if self.forbid_restart:
@@ -150,12 +179,19 @@ class ParallelSession(object):
         self.slaves = {}
         self.test_groups = self._test_item_generator()
 
-        self._pool = []
+        # pending test groups by the provider they need, in collection order
+        self._pool = OrderedDict()
         from cfme.utils.conf import cfme_data
         self.provs = sorted(set(cfme_data['management_systems'].keys()),
                             key=len, reverse=True)
+        self.provider_index = ProviderIndex(self.provs)
         self.used_prov = set()
 
+        self.durations = DurationStore(config.cache)
+        self.schedule_mode = config.getoption('parallel_schedule', 'collection')
+        self.providers_per_appliance = config.getoption('parallel_providers_per_appliance', 1)
+        self.scheduler = None
+
         self.failed_slave_test_groups = deque()
         self.slave_spawn_count = 0
         self.appliances = appliances
@@ -167,6 +203,7 @@ class ParallelSession(object):
         ctx = zmq.Context.instance()
         self.sock = ctx.socket(zmq.ROUTER)
         self.sock.bind(zmq_endpoint)
+        self._recv_queue = deque()
 
         # clean out old slave config if it exists
 
@@ -232,23 +269,24 @@ class ParallelSession(object):
     def send(self, slave, event_data):
         """Send data to slave.
 
-        ``event_data`` will be serialized as JSON, and so must be JSON serializable
+        ``event_data`` will be pickled, and so must be picklable
 
         """
-        event_json = json.dumps(event_data)
-        if not isinstance(event_json, bytes):
-            event_json = event_json.encode('utf-8')
-        self.sock.send_multipart([slave.id, b'', event_json])
+        self.sock.send_multipart(
+            [slave.id, b'', pickle.dumps(event_data, pickle.HIGHEST_PROTOCOL)])
 
     def recv(self):
-        # poll the zmq socket, populate the recv queue deque with responses
-
-        events = zmq.zmq_poll([(self.sock, zmq.POLLIN)], 50)
-        if not events:
-            return None, None, None
-        slaveid, _, event_json = self.sock.recv_multipart(flags=zmq.NOBLOCK)
-        event_data = json.loads(event_json)
-        event_name = event_data.pop('_event_name')
+        # slaves send batches of events; hand out what was already received before polling
+        # the zmq socket again
+        if not self._recv_queue:
+            events = zmq.zmq_poll([(self.sock, zmq.POLLIN)], 50)
+            if not events:
+                return None, None, None
+            slaveid, _, payload = self.sock.recv_multipart(flags=zmq.NOBLOCK)
+            self._recv_queue.extend(
+                (slaveid, event_name, event_data)
+                for event_name, event_data in remote.decode_events(payload))
+        slaveid, event_name, event_data = self._recv_queue.popleft()
         if slaveid not in self.slaves:
             self.log.error("message from terminated worker %s %s %s",
                            slaveid, event_name, event_data)
@@ -350,7 +388,8 @@ class ParallelSession(object):
             tests = list(self.failed_slave_test_groups.popleft())
         except IndexError:
             tests = self.get(slave)
-        self.send(slave, tests)
+        # plain lists only, slaves don't import the parallelizer
+        self.send(slave, list(tests))
         slave.tests.update(tests)
         collect_len = len(self.collection)
         tests_len = len(tests)
@@ -392,6 +431,8 @@ class ParallelSession(object):
         """
         # Build master collection for slave diffing and distribution
         self.collection = [item.nodeid for item in self.session.items]
+        for item in self.session.items:
+            self.provider_index.add(item)
 
         # Fire up the workers after master collection is complete
         # master and the first slave share an appliance, this is a workaround to prevent a slave
@@ -424,7 +465,6 @@ class ParallelSession(object):
                     markup = event_data.pop('markup')
                     # messages are special, handle them immediately
                     self.print_message(message, slave, **markup)
-                    self.ack(slave, event_name)
                 elif event_name == 'collectionfinish':
                     slave_collection = event_data['node_ids']
                     # compare slave collection to the master, all test ids must be the same
@@ -445,14 +485,13 @@ class ParallelSession(object):
                     self.send_tests(slave)
                     self.log.info('starting master test distribution')
                 elif event_name == 'runtest_logstart':
-                    self.ack(slave, event_name)
                     self.trdist.runtest_logstart(
                         slave.id,
                         event_data['nodeid'],
                         event_data['location'])
                 elif event_name == 'runtest_logreport':
-                    self.ack(slave, event_name)
                     report = unserialize_report(event_data['report'])
+                    self.durations.record(report)
                     if report.when in ('call', 'teardown'):
                         slave.tests.discard(report.nodeid)
                     self.trdist.runtest_logreport(slave.id, report)
@@ -485,9 +524,12 @@ class ParallelSession(object):
         # Suppress other runtestloop calls
         return True
 
+    def pytest_sessionfinish(self):
+        self.durations.save(self.collection)
+
     def _test_item_generator(self):
         for tests in self._modscope_item_generator():
-            yield tests
+            yield TestGroup(tests, self.provider_index.providers_of(tests))
 
     def _modscope_item_generator(self):
         # breaks out tests by module, can work just about any way we want
@@ -523,69 +565,137 @@ class ParallelSession(object):
                 self.log.info('sent tests with param {} {!r}'.format(id, tests))
                 yield tests
 
-    def get(self, slave):
+    def _provs_of_tests(self, test_group):
+        providers = getattr(test_group, 'providers', None)
+        if providers is None:
+            providers = self.provider_index.providers_of(test_group)
+        return providers
+
+    def _cleanse_appliance(self, slave):
+        app = slave.appliance
+        self.print_message(
+            'cleansing appliance', slave, purple=True)
+        try:
+            app.delete_all_providers()
+        except Exception as e:
+            self.print_message(
+                'cloud not cleanse', slave, red=True)
+            self.print_message('error:', e, red=True)
+
+    def _get_by_duration(self, slave):
+        if self.scheduler is None:
+            self.scheduler = DurationScheduler(self.durations, self.slaves.keys())
+            self.scheduler.schedule(self.test_groups)
+            self.log.info('scheduled {} test groups by duration'.format(len(self.scheduler)))
+        tests, victim = self.scheduler.next_group(slave.id)
+        if victim is not None:
+            self.print_message(
+                'taking {} tests from {}'.format(len(tests), victim.decode('ascii')), slave)
+        provs = self._provs_of_tests(tests)
+        if provs and provs[0] not in slave.provider_allocation:
+            if slave.provider_allocation:
+                self._cleanse_appliance(slave)
+            slave.provider_allocation = [provs[0]]
+        return tests
 
-        def provs_of_tests(test_group):
-            found = set()
-            for test in test_group:
-                found.update(pv for pv in self.provs
-                             if '[' in test and pv in test)
-            return sorted(found)
+    def _retire_providers(self, slave, provider_keys):
+        from cfme.utils.conf import cfme_data
+        names = {cfme_data['management_systems'][key]['name'] for key in provider_keys}
+        self.print_message(
+            'removing providers {}'.format(', '.join(provider_keys)), slave, purple=True)
+        try:
+            for prov in slave.appliance.rest_api.collections.providers:
+                if prov.name in names:
+                    prov.action.delete()
+        except Exception as e:
+            self.print_message('could not remove providers: {}'.format(e), slave, red=True)
+
+    def _prewarm_provider_t(self, slave, provider_key):
+        from cfme.utils.appliance import stack
+        from cfme.utils.providers import get_crud
+        # the appliance stack is thread local, this only changes the current appliance for
+        # this thread
+        stack.push(slave.appliance)
+        try:
+            provider = get_crud(provider_key)
+            # only providers that can be set up over REST, the rest is left to the tests
+            if provider.category in ('cloud', 'infra', 'physical'):
+                provider.create_rest(check_existing=True, validate_inventory=True)
+                self.print_message('provider {} ready'.format(provider_key), slave)
+        except Exception as e:
+            self.log.exception('setting up provider %s in advance failed', provider_key)
+            self.print_message(
+                'could not set up provider {}: {}'.format(provider_key, e), slave, red=True)
+        finally:
+            stack.pop()
+
+    def _get_by_provider(self, slave):
+        if self.scheduler is None:
+            self.scheduler = ProviderAffinityScheduler(
+                self.slaves.keys(), estimate=self.durations.group_estimate)
+            self.scheduler.schedule(self.test_groups, lambda group: group.provider)
+            self.log.info('scheduled {} test groups by provider'.format(len(self.scheduler)))
+        tests, prov = self.scheduler.next_group(slave.id)
+        if prov is not None and prov not in slave.provider_allocation:
+            slave.provider_allocation.append(prov)
+            stale = slave.provider_allocation[:-self.providers_per_appliance]
+            if stale:
+                del slave.provider_allocation[:-self.providers_per_appliance]
+                slave.prewarmed.difference_update(stale)
+                self._retire_providers(slave, stale)
+        upcoming = self.scheduler.upcoming(slave.id)
+        if upcoming is not None and upcoming not in slave.prewarmed:
+            slave.prewarmed.add(upcoming)
+            self.print_message('setting up provider {} in advance'.format(upcoming), slave)
+            prewarm_thread = Thread(target=self._prewarm_provider_t, args=(slave, upcoming))
+            prewarm_thread.daemon = True
+            prewarm_thread.start()
+        return tests
+
+    def get(self, slave):
+        if self.schedule_mode == 'duration':
+            return self._get_by_duration(slave)
+        elif self.schedule_mode == 'provider':
+            return self._get_by_provider(slave)
 
         if not self._pool:
-            for test_group in self.test_groups:
-                self._pool.append(test_group)
-                self.used_prov.update(provs_of_tests(test_group))
+            for seq, test_group in enumerate(self.test_groups):
+                self._pool.setdefault(test_group.provider, deque()).append((seq, test_group))
+                self.used_prov.update(test_group.providers)
             if self.used_prov:
                 self.ratio = float(len(self.slaves)) / len(self.used_prov)
             else:
                 self.ratio = 0.0
         if not self._pool:
             return []
-        appliance_num_limit = 1
-        for idx, test_group in enumerate(self._pool):
-            provs = provs_of_tests(test_group)
-            if provs:
-                prov = provs[0]
-                if prov in slave.provider_allocation:
-                    # provider is already with the slave, so just return the tests
-                    self._pool.remove(test_group)
-                    return test_group
-                else:
-                    if len(slave.provider_allocation) >= appliance_num_limit:
-                        continue
-                    else:
-                        # Adding provider to slave since there are not too many
-                        slave.provider_allocation.append(prov)
-                        self._pool.remove(test_group)
-                        return test_group
-            else:
-                # No providers - ie, not a provider parametrized test
-                # or no params, so not parametrized at all
-                self._pool.remove(test_group)
-                return test_group
-
-        # Here means no tests were able to be sent
-        for test_group in self._pool:
-
-            provs = provs_of_tests(test_group)
-            if provs:
-                prov = provs[0]
-                # Already too many slaves with provider
-                app = slave.appliance
-                self.print_message(
-                    'cleansing appliance', slave, purple=True)
-                try:
-                    app.delete_all_providers()
-                except Exception as e:
-                    self.print_message(
-                        'cloud not cleanse', slave, red=True)
-                    self.print_message('error:', e, red=True)
-            slave.provider_allocation = [prov]
-            self._pool.remove(test_group)
-            return test_group
-        assert not self._pool, self._pool
-        return []
+        appliance_num_limit = self.providers_per_appliance
+        if len(slave.provider_allocation) >= appliance_num_limit:
+            # provider is already with the slave, or no providers - ie, not a provider
+            # parametrized test or no params, so not parametrized at all
+            candidates = [prov for prov in self._pool
+                          if prov is None or prov in slave.provider_allocation]
+        else:
+            # Adding provider to slave since there are not too many
+            candidates = list(self._pool)
+        if candidates:
+            prov = min(candidates, key=lambda prov: self._pool[prov][0][0])
+            if prov is not None and prov not in slave.provider_allocation:
+                slave.provider_allocation.append(prov)
+            return self._pop_pool(prov)
+
+        # Here means no tests were able to be sent, take the next group and clean out the
+        # appliance for its provider; already too many slaves with provider
+        prov = min(self._pool, key=lambda prov: self._pool[prov][0][0])
+        self._cleanse_appliance(slave)
+        slave.provider_allocation = [prov]
+        return self._pop_pool(prov)
+
+    def _pop_pool(self, prov):
+        groups = self._pool[prov]
+        seq, test_group = groups.popleft()
+        if not groups:
+            del self._pool[prov]
+        return test_group
 
 
 def report_collection_diff(slaveid, from_collection, to_collection):
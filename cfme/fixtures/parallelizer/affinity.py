@@ -0,0 +1,167 @@
+"""Provider-aware test distribution for the parallelizer
+
+:py:class:`ProviderIndex` maps every collected test to the provider it runs against once, at
+collection time, and :py:class:`TestGroup` carries those providers along with each group of
+tests, so the master never has to search test ids for provider keys while distributing tests.
+
+Adding a provider to an appliance and waiting for its refresh is the most expensive setup most
+tests have, so this scheduler decides up front which slave runs the tests of which provider.
+Providers are assigned heaviest first to the slave with the least work, and each slave works
+through the test groups of one provider before moving on to its next one, which lets the
+master set up that next provider on the slave's appliance while the current tests still run.
+
+Slaves that run out of providers take a pending provider from the slave with the most work
+left, and once nothing is pending they help out with providers other slaves are running.
+
+"""
+from collections import OrderedDict, deque
+
+import six
+from six.moves import range
+
+
+class ProviderIndex(object):
+    """Provider keys of the collected tests, keyed by node id
+
+    The key of a test is taken from its parameters if one of them is a provider with a known
+    key. Otherwise the parametrization id is split on dashes and the longest run of parts that
+    is a known provider key is used, which covers ``--legacy-ids`` and other test generators
+    that put the provider key into the id.
+
+    Args:
+        provider_keys: The keys of all known providers (``management_systems`` in cfme_data)
+    """
+    def __init__(self, provider_keys):
+        self.keys = set(provider_keys)
+        self.max_parts = max([key.count('-') + 1 for key in self.keys] or [0])
+        self.by_nodeid = {}
+
+    def add(self, item):
+        """Index a collected test item"""
+        self.by_nodeid[item.nodeid] = self._key_of(item)
+
+    def _key_of(self, item):
+        callspec = getattr(item, 'callspec', None)
+        if callspec is None:
+            return None
+        for value in callspec.params.values():
+            key = getattr(value, 'key', None)
+            if isinstance(key, six.string_types) and key in self.keys:
+                return key
+        return self.parse_id(callspec.id)
+
+    def parse_id(self, param_id):
+        """Find the provider key in a parametrization id, or ``None``"""
+        parts = param_id.split('-')
+        for length in range(min(self.max_parts, len(parts)), 0, -1):
+            for start in range(len(parts) - length + 1):
+                candidate = '-'.join(parts[start:start + length])
+                if candidate in self.keys:
+                    return candidate
+        return None
+
+    def providers_of(self, tests):
+        """Sorted provider keys used by a list of test ids"""
+        return sorted({self.by_nodeid[nodeid] for nodeid in tests if self.by_nodeid.get(nodeid)})
+
+
+class TestGroup(list):
+    """A list of test ids that are sent to a slave together, and the providers they use"""
+    def __init__(self, tests, providers=()):
+        super(TestGroup, self).__init__(tests)
+        self.providers = list(providers)
+
+    @property
+    def provider(self):
+        """The provider a slave needs to run the group, or ``None``"""
+        return self.providers[0] if self.providers else None
+
+
+class ProviderAffinityScheduler(object):
+    """Assigns providers to slaves and hands each slave the test groups of its providers
+
+    Args:
+        slaveids: Ids of the slaves to schedule for
+        estimate: Callable returning the estimated cost of a test group, defaults to its size
+    """
+    def __init__(self, slaveids, estimate=len):
+        self.estimate = estimate
+        self.pending = {slaveid: deque() for slaveid in slaveids}
+        self.current = {}
+        self.groups = OrderedDict()
+        self.remaining = {}
+        self.unassigned = deque()
+
+    def schedule(self, test_groups, provider_of):
+        """Group the tests by provider and assign the providers to slaves
+
+        Args:
+            test_groups: Iterable of lists of test ids
+            provider_of: Callable returning the provider key of a test group, or ``None``
+        """
+        for tests in test_groups:
+            provider = provider_of(tests)
+            if provider is None:
+                self.unassigned.append(tests)
+            else:
+                self.groups.setdefault(provider, deque()).append(tests)
+                self.remaining[provider] = self.remaining.get(provider, 0) + self.estimate(tests)
+        loads = dict.fromkeys(self.pending, 0)
+        for provider in sorted(self.groups, key=self.remaining.get, reverse=True):
+            slaveid = min(loads, key=lambda s: (loads[s], len(self.pending[s])))
+            self.pending[slaveid].append(provider)
+            loads[slaveid] += self.remaining[provider]
+
+    def __len__(self):
+        return len(self.unassigned) + sum(len(groups) for groups in self.groups.values())
+
+    def load(self, slaveid):
+        """Estimated cost of the tests still pending for a slave"""
+        return sum(self.remaining[provider] for provider in self.pending.get(slaveid, ()))
+
+    def _take(self, slaveid, provider):
+        self.current[slaveid] = provider
+        tests = self.groups[provider].popleft()
+        self.remaining[provider] -= self.estimate(tests)
+        return tests, provider
+
+    def _steal(self):
+        busy = [s for s in self.pending if self.pending[s]]
+        if busy:
+            return self.pending[max(busy, key=self.load)].pop()
+        running = [p for p in set(self.current.values()) if self.groups[p]]
+        if running:
+            return max(running, key=self.remaining.get)
+
+    def next_group(self, slaveid):
+        """Get the next group of tests for a slave
+
+        Returns:
+            A tuple of the list of test ids (empty if there's nothing left to run) and the key
+            of the provider the tests need, or ``None`` if they don't need one
+        """
+        provider = self.current.get(slaveid)
+        if provider is not None and self.groups[provider]:
+            return self._take(slaveid, provider)
+        pending = self.pending.setdefault(slaveid, deque())
+        while pending:
+            provider = pending.popleft()
+            if self.groups[provider]:
+                return self._take(slaveid, provider)
+        if self.unassigned:
+            return self.unassigned.popleft(), None
+        provider = self._steal()
+        if provider is not None:
+            return self._take(slaveid, provider)
+        return [], None
+
+    def upcoming(self, slaveid):
+        """The provider a slave will need next, once it has been handed its current one's last
+        group of tests, or ``None``
+        """
+        provider = self.current.get(slaveid)
+        if provider is not None and self.groups[provider]:
+            return None
+        for provider in self.pending.get(slaveid, ()):
+            if self.groups[provider]:
+                return provider
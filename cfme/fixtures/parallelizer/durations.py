@@ -0,0 +1,175 @@
+"""Duration-aware test scheduling for the parallelizer
+
+The master records how long each test took (setup + call + teardown) in the pytest cache,
+and on the next run uses those durations to bin-pack test groups across the slaves,
+longest groups first. Moving a slave to another provider means cleaning its appliance and
+setting the provider up, so that is counted into the estimates too, and the groups of a slave
+are run provider by provider. Slaves that run out of work steal pending groups from the slave
+with the most estimated work left, so a single slow module no longer ends up as the long tail
+of a run.
+
+"""
+from collections import defaultdict, deque
+
+CACHE_KEY = 'miq-parallelize/durations'
+# Number of runs in a row each test with history was not collected in
+UNSEEN_CACHE_KEY = 'miq-parallelize/durations-unseen'
+
+# Estimate used for a test with no recorded history if there's no history at all
+DEFAULT_DURATION = 1.0
+# Estimated seconds it takes to move a slave appliance to another provider
+PROVIDER_SWITCH_COST = 300.0
+
+
+class DurationStore(object):
+    """Historical per-test durations, keyed by node id
+
+    Args:
+        cache: A pytest cache (``config.cache``) used to persist the durations
+        smoothing: Weight of the latest run when merging it into the stored history
+        max_unseen_runs: Number of runs in a row a test can be missing from the collection
+            before its history is dropped
+    """
+    def __init__(self, cache, smoothing=0.5, max_unseen_runs=10):
+        self.cache = cache
+        self.smoothing = smoothing
+        self.max_unseen_runs = max_unseen_runs
+        self.durations = dict(cache.get(CACHE_KEY, {}))
+        self.unseen = dict(cache.get(UNSEEN_CACHE_KEY, {}))
+        self._recorded = defaultdict(float)
+        self._default = None
+
+    def record(self, report):
+        """Add the duration of a test report phase to the current run"""
+        self._recorded[report.nodeid] += getattr(report, 'duration', 0) or 0
+
+    @property
+    def default(self):
+        """Estimate for tests without history; the median of the known durations"""
+        if self._default is None:
+            known = sorted(self.durations.values())
+            self._default = known[len(known) // 2] if known else DEFAULT_DURATION
+        return self._default
+
+    def estimate(self, nodeid):
+        return self.durations.get(nodeid, self.default)
+
+    def group_estimate(self, tests):
+        return sum(self.estimate(nodeid) for nodeid in tests)
+
+    def save(self, collected=None):
+        """Merge the durations of the current run into the history and persist it
+
+        Args:
+            collected: Node ids collected in the current run, the recorded ones if not given;
+                the history of tests missing from too many runs in a row is dropped
+        """
+        if not self._recorded:
+            return
+        for nodeid, duration in self._recorded.items():
+            if nodeid in self.durations:
+                duration = (self.smoothing * duration +
+                            (1 - self.smoothing) * self.durations[nodeid])
+            self.durations[nodeid] = round(duration, 3)
+        collected = set(self._recorded if collected is None else collected)
+        for nodeid in list(self.durations):
+            if nodeid in collected:
+                self.unseen.pop(nodeid, None)
+                continue
+            self.unseen[nodeid] = self.unseen.get(nodeid, 0) + 1
+            if self.unseen[nodeid] > self.max_unseen_runs:
+                del self.durations[nodeid]
+                del self.unseen[nodeid]
+        self.cache.set(CACHE_KEY, self.durations)
+        self.cache.set(UNSEEN_CACHE_KEY, self.unseen)
+        self._recorded.clear()
+        self._default = None
+
+
+class DurationScheduler(object):
+    """Longest-first bin-packing of test groups over slaves, with work stealing
+
+    Each slave gets its own queue of groups, filled by always giving the next-longest group to
+    the slave with the least estimated work, counting ``switch_cost`` for a slave that doesn't
+    have the provider of the group yet. The queue of each slave is then ordered provider by
+    provider. When a slave's queue is empty it takes a group from the slave that has the most
+    estimated work remaining, one of the provider it's using if there is one, otherwise the one
+    the other slave would run last.
+
+    Args:
+        store: A :py:class:`DurationStore` used to estimate group durations
+        slaveids: Ids of the slaves to schedule for
+        switch_cost: Estimated seconds it takes a slave to move to another provider
+    """
+    def __init__(self, store, slaveids, switch_cost=PROVIDER_SWITCH_COST):
+        self.store = store
+        self.switch_cost = switch_cost
+        self.queues = {slaveid: deque() for slaveid in slaveids}
+        self.loads = {slaveid: 0.0 for slaveid in slaveids}
+        self.current = {slaveid: None for slaveid in slaveids}
+
+    def schedule(self, test_groups, provider_of=lambda group: getattr(group, 'provider', None)):
+        """Distribute test groups over the slave queues
+
+        Args:
+            test_groups: The groups of test ids
+            provider_of: Function returning the provider key of a group, ``None`` if it has none
+        """
+        estimated = [(self.store.group_estimate(tests), provider_of(tests), tests)
+                     for tests in test_groups]
+        estimated.sort(key=lambda group: group[0], reverse=True)
+        planned = {slaveid: set() for slaveid in self.queues}
+
+        def switch_cost(slaveid, provider):
+            if provider is None or provider in planned[slaveid] or not planned[slaveid]:
+                return 0.0
+            return self.switch_cost
+
+        for estimate, provider, tests in estimated:
+            slaveid = min(self.loads, key=lambda s: (
+                self.loads[s] + switch_cost(s, provider), len(self.queues[s])))
+            estimate += switch_cost(slaveid, provider)
+            if provider is not None:
+                planned[slaveid].add(provider)
+            self.queues[slaveid].append((estimate, provider, tests))
+            self.loads[slaveid] += estimate
+        for slaveid, queue in self.queues.items():
+            # provider by provider, in the order the providers were first given to the slave
+            order = {}
+            for _, provider, _ in queue:
+                order.setdefault(provider, len(order))
+            self.queues[slaveid] = deque(sorted(queue, key=lambda group: order[group[1]]))
+
+    def __len__(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    def _pop(self, slaveid, thief=None):
+        queue = self.queues[slaveid]
+        if thief is None:
+            index = 0
+        else:
+            # a group of the provider the thief is using, or the one the victim would run last
+            providers = [provider for _, provider, _ in queue]
+            current = self.current[thief]
+            index = providers.index(current) if current in providers else len(queue) - 1
+        estimate, provider, tests = queue[index]
+        del queue[index]
+        self.loads[slaveid] -= estimate
+        if provider is not None:
+            self.current[thief or slaveid] = provider
+        return tests
+
+    def next_group(self, slaveid):
+        """Get the next group of tests for a slave, stealing if its own queue is empty
+
+        Returns:
+            A tuple of the list of test ids (empty if there's nothing left to run) and the id of
+            the slave the group was stolen from, or ``None`` if the group was not stolen
+        """
+        if self.queues.get(slaveid):
+            return self._pop(slaveid), None
+        busy = [s for s in self.queues if self.queues[s]]
+        if not busy:
+            return [], None
+        victim = max(busy, key=lambda s: self.loads[s])
+        return self._pop(victim, thief=slaveid), victim
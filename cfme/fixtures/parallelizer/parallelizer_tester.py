@@ -5,11 +5,18 @@ Useful to make sure tests are being parallelized properly, and then reported cor
 This file is named specially to prevent being picked up by py.test's default collector, and should
 not be run during a normal test run.
 
+Running it as a script benchmarks the master/slave event channel instead, comparing the old
+JSON request/ack round trips with the batched event stream::
+
+    python cfme/fixtures/parallelizer/parallelizer_tester.py --events 20000
+
 """
 import random
-from time import sleep
+from threading import Thread
+from time import sleep, time
 
 import pytest
+import zmq
 from six.moves import range
 # uncommment this to slow things down, if desired
 # pytestmark= pytest.mark.usefixtures("wait")
@@ -72,3 +79,104 @@ def test_fails_teardown(teardown_fail):
 @pytest.mark.skipif('True')
 def test_skipped():
     pass
+
+
+def _fake_report(i):
+    # roughly the shape and size of a serialized passing TestReport
+    nodeid = 'cfme/tests/test_module.py::test_something[provider-{}]'.format(i)
+    return {
+        'nodeid': nodeid,
+        'location': ('cfme/tests/test_module.py', 42, 'test_something[provider-{}]'.format(i)),
+        'keywords': {'test_something': 1, 'cfme/tests/test_module.py': 1, 'tests': 1},
+        'outcome': 'passed',
+        'longrepr': None,
+        'when': 'call',
+        'sections': [],
+        'duration': 0.1234,
+        'user_properties': [],
+    }
+
+
+def _test_events(num_events):
+    """``(event_name, event_data, flush)`` of the tests a slave runs, posted like the
+    SlaveManager does: a logstart and the reports of the three phases, each flushing the stream
+    """
+    for i in range(num_events):
+        if i % 4 == 0:
+            yield 'runtest_logstart', {'nodeid': _fake_report(i)['nodeid'], 'location': None}, False
+        else:
+            yield 'runtest_logreport', {'report': _fake_report(i)}, True
+
+
+def _drain(sock, num_events, decode, ack):
+    received = 0
+    while received < num_events:
+        slaveid, _, payload = sock.recv_multipart()
+        events = decode(payload)
+        received += len(events)
+        if ack:
+            sock.send_multipart([slaveid, b'', b'"ack"'])
+
+
+def benchmark_request_ack(ctx, endpoint, num_events):
+    """Every event is a JSON encoded REQ/REP round trip, like the old SlaveManager.send_event"""
+    import json
+    master = ctx.socket(zmq.ROUTER)
+    master.bind(endpoint)
+    drainer = Thread(target=_drain, args=(master, num_events, lambda p: [json.loads(p)], True))
+    drainer.start()
+    slave = ctx.socket(zmq.REQ)
+    slave.connect(endpoint)
+    start = time()
+    for name, data, _ in _test_events(num_events):
+        data['_event_name'] = name
+        slave.send_json(data)
+        slave.recv_json()
+    drainer.join()
+    elapsed = time() - start
+    slave.close()
+    master.close()
+    return elapsed, 0
+
+
+def benchmark_event_stream(ctx, endpoint, num_events):
+    """Events are posted to a batching EventChannel on a DEALER socket, flushed like a slave does"""
+    from cfme.fixtures.parallelizer.remote import EventChannel, decode_events
+    master = ctx.socket(zmq.ROUTER)
+    master.bind(endpoint)
+    drainer = Thread(target=_drain, args=(master, num_events, decode_events, False))
+    drainer.start()
+    slave = ctx.socket(zmq.DEALER)
+    slave.connect(endpoint)
+    channel = EventChannel(slave)
+    start = time()
+    for name, data, flush in _test_events(num_events):
+        channel.post(name, data, flush=flush)
+    channel.close()
+    posted = time() - start
+    drainer.join()
+    elapsed = time() - start
+    slave.close()
+    master.close()
+    return elapsed, posted
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description='Benchmark the parallelizer event channel')
+    parser.add_argument('--events', type=int, default=10000, help='Number of events to send')
+    args = parser.parse_args()
+
+    ctx = zmq.Context.instance()
+    tmpdir = tempfile.mkdtemp()
+    for name, benchmark in [('request/ack (before)', benchmark_request_ack),
+                            ('event stream (after)', benchmark_event_stream)]:
+        endpoint = 'ipc://{}'.format(os.path.join(tmpdir, name.split()[0].replace('/', '-')))
+        elapsed, posted = benchmark(ctx, endpoint, args.events)
+        # without streaming the slave is blocked for the whole round trip
+        blocked = posted or elapsed
+        print('{:<22} {:>10.0f} events/sec, slave blocked for {:.1f}us per event'.format(
+            name, args.events / elapsed, blocked * 1e6 / args.events))
@@ -1,5 +1,7 @@
 import json
 import signal
+from threading import Condition, Thread
+from time import time
 
 import zmq
 from py.path import local
@@ -9,9 +11,94 @@ from cfme.utils import log
 from cfme.utils.appliance import find_appliance
 from cfme.fixtures.log import _test_status, _format_nodeid
 
+try:
+    import six.moves.cPickle as pickle
+except ImportError:
+    import pickle   # NOQA
+
 SLAVEID = None
 
 
+def encode_events(events):
+    """Pack a list of ``(event_name, event_data)`` tuples to be sent in one message"""
+    return pickle.dumps(events, pickle.HIGHEST_PROTOCOL)
+
+
+def decode_events(payload):
+    """Unpack a message packed by :py:func:`encode_events`"""
+    return pickle.loads(payload)
+
+
+class EventChannel(object):
+    """Slave end of the event stream to the master
+
+    Posted events are buffered and sent to the master in batches without waiting for an answer.
+    The buffer is flushed when it holds ``batch_size`` events, when its oldest event has been
+    waiting for ``flush_interval`` seconds, or when asked to. Requests flush the buffer and then
+    block until the master answers.
+
+    The time based flushes are done by a background thread, the socket is only ever used with
+    the lock of the channel held.
+    """
+    def __init__(self, sock, batch_size=100, flush_interval=0.5):
+        self.sock = sock
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._buffered_since = None
+        self._closed = False
+        self._cond = Condition()
+        self._flusher = Thread(target=self._flush_t, name='event-channel-flusher')
+        self._flusher.daemon = True
+        self._flusher.start()
+
+    def post(self, name, data, flush=False):
+        with self._cond:
+            if not self._buffer:
+                self._buffered_since = time()
+                self._cond.notify()
+            self._buffer.append((name, data))
+            if flush or self._closed or len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        with self._cond:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            # the empty frame keeps the envelope the master's ROUTER socket expects
+            self.sock.send_multipart([b'', encode_events(self._buffer)])
+            self._buffer = []
+
+    def _flush_t(self):
+        with self._cond:
+            while not self._closed:
+                if not self._buffer:
+                    self._cond.wait()
+                    continue
+                remaining = self._buffered_since + self.flush_interval - time()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                else:
+                    self._flush()
+
+    def request(self, name, data):
+        with self._cond:
+            self._buffer.append((name, data))
+            self._flush()
+            _, payload = self.sock.recv_multipart()
+        return pickle.loads(payload)
+
+    def close(self):
+        """Send what is buffered and stop the background flushes"""
+        with self._cond:
+            self._flush()
+            self._closed = True
+            self._cond.notify()
+        self._flusher.join()
+
+
 class SlaveManager(object):
     """SlaveManager which coordinates with the master process for parallel testing"""
     def __init__(self, config, slaveid, zmq_endpoint):
@@ -24,20 +111,19 @@ class SlaveManager(object):
         # Override the logger in utils.log
 
         ctx = zmq.Context.instance()
-        self.sock = ctx.socket(zmq.REQ)
-        self.sock.set_hwm(1)
+        self.sock = ctx.socket(zmq.DEALER)
         self.sock.setsockopt_string(zmq.IDENTITY, u'{}'.format(self.slaveid))
         self.sock.connect(zmq_endpoint)
+        self.events = EventChannel(self.sock)
 
         self.messages = {}
 
         self.quit_signaled = False
 
     def send_event(self, name, **kwargs):
-        kwargs['_event_name'] = name
+        """Send an event to the master and wait for its answer"""
         self.log.debug("sending {} {!r}".format(name, kwargs))
-        self.sock.send_json(kwargs)
-        recv = self.sock.recv_json()
+        recv = self.events.request(name, kwargs)
         if recv == 'die':
             self.log.info('Slave instructed to die by master; shutting down')
             raise SystemExit()
@@ -46,9 +132,14 @@ class SlaveManager(object):
             if recv != 'ack':
                 return recv
 
+    def post_event(self, name, flush=False, **kwargs):
+        """Stream an event to the master without waiting for an answer"""
+        self.log.debug("posting {}".format(name))
+        self.events.post(name, kwargs, flush=flush)
+
     def message(self, message, **kwargs):
         """Send a message to the master, which should get printed to the console"""
-        self.send_event('message', message=message, markup=kwargs)  # message!
+        self.post_event('message', message=message, markup=kwargs)  # message!
 
     def pytest_collection_finish(self, session):
         """pytest collection hook
@@ -68,15 +159,16 @@ class SlaveManager(object):
         - sends logstart notice to the master
 
         """
-        self.send_event("runtest_logstart", nodeid=nodeid, location=location)
+        self.post_event("runtest_logstart", nodeid=nodeid, location=location)
 
     def pytest_runtest_logreport(self, report):
         """pytest runtest logreport hook
 
-        - sends serialized log reports to the master
+        - sends serialized log reports to the master, flushing the event stream at the end
+          of each test phase
 
         """
-        self.send_event("runtest_logreport", report=serialize_report(report))
+        self.post_event("runtest_logreport", flush=True, report=serialize_report(report))
         if report.when == 'teardown':
             path, lineno, domaininfo = report.location
             test_status = _test_status(_format_nodeid(report.nodeid, False))
@@ -140,6 +232,7 @@ class SlaveManager(object):
     def shutdown(self):
         self.message('shutting down')
         self.send_event('shutdown')
+        self.events.close()
         self.quit_signaled = True
 
     def _test_generator(self):
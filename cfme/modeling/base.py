@@ -118,6 +118,31 @@ class BaseCollection(NavigatableMixin):
     def instantiate(self, *args, **kwargs):
         return self.ENTITY.from_collection(self, *args, **kwargs)
 
+    def iter_db_entities(self, query, entity_kwargs, provider=None, batch_size=1000):
+        """Lazily instantiate an entity for every row of a DB query
+
+        The rows are fetched from the database in batches as the entities are consumed, and
+        the provider of every row is resolved by name once per provider, not once per row.
+
+        Args:
+            query: A sqlalchemy query whose last column is the name of the provider of the row
+            entity_kwargs: Callable taking the other columns of a row and returning the
+                keyword arguments of its entity
+            provider: The provider of all rows if the query is filtered on it, otherwise the
+                providers are looked up in cfme_data by name
+            batch_size: Number of rows fetched from the database at once
+        """
+        from cfme.utils.providers import get_crud_by_name
+        providers = {}
+        for row in query.yield_per(batch_size):
+            row_provider = provider
+            if row_provider is None:
+                provider_name = row[-1]
+                if provider_name not in providers:
+                    providers[provider_name] = get_crud_by_name(provider_name)
+                row_provider = providers[provider_name]
+            yield self.instantiate(provider=row_provider, **entity_kwargs(*row[:-1]))
+
     def filter(self, filter):
         filters = self.filters.copy()
         filters.update(filter)
@@ -7,7 +7,7 @@ from widgetastic.utils import partial_match
 from cfme.infrastructure.provider.rhevm import RHEVMProvider
 from cfme.infrastructure.provider.virtualcenter import VMwareProvider
 from cfme.utils.log import logger
-from cfme.utils.rest import create_resource
+from cfme.utils.rest import create_resource, existing_ids
 from cfme.utils.version import VersionPicker, Version
 from cfme.utils.virtual_machines import deploy_template
 from cfme.utils.wait import wait_for
@@ -461,9 +461,8 @@ def _creating_skeleton(request, rest_api, col_name, col_data, col_action='create
     @request.addfinalizer
     def _finished():
         collection = getattr(rest_api.collections, col_name)
-        collection.reload()
-        ids = [e.id for e in original_entities]
-        delete_entities = [e for e in collection if e.id in ids]
+        ids = existing_ids(collection, [e.id for e in original_entities])
+        delete_entities = [e for e in original_entities if str(e.id) in ids]
         if delete_entities:
             collection.action.delete(*delete_entities)
 
@@ -4,6 +4,7 @@ import socket
 import traceback
 from copy import copy
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 from tempfile import NamedTemporaryFile
 from time import sleep, time
 
@@ -82,6 +83,56 @@ class MiqApi(VanillaMiqApi):
             raise ValueError('Subcollections not supported! ({})'.format(parsed.path))
         return entity
 
+    def iter_resources(self, collection, attributes=('id',), page_size=1000, prefetch=True,
+                       **params):
+        """Iterates over the resources of a collection, a page at a time
+
+        Unlike ``collection.all``, which gets the whole collection with full entities in one
+        response, only the requested attributes are fetched and the resources are yielded as
+        plain dicts, without building :py:class:`Entity` objects.
+
+        Args:
+            collection: The collection, or its name
+            attributes: Attributes of the resources to get, ``href`` is always included
+            page_size: Number of resources requested at once
+            prefetch: Get the next page in a background thread while the current one is consumed
+            **params: Other query parameters, e.g. ``{'filter[]': [...]}``
+        """
+        if isinstance(collection, six.string_types):
+            collection = getattr(self.collections, collection)
+        params = dict(params, expand='resources', limit=page_size, sort_by='id',
+                      sort_order='asc')
+        if attributes:
+            params['attributes'] = ','.join(attributes)
+
+        def get_page(offset):
+            return self.get(collection._href, offset=offset, **params)
+
+        pool = None
+        try:
+            offset = 0
+            page = get_page(offset)
+            while page['resources']:
+                offset += len(page['resources'])
+                # The total is only known if the appliance reports the size of the query, or if
+                # there is no filter and the collection size is the same thing
+                total = page.get('subquery_count')
+                if total is None and 'filter[]' not in params:
+                    total = page.get('count')
+                more = total is None or offset < total
+                pending = None
+                if more and prefetch:
+                    pool = pool or ThreadPool(1)
+                    pending = pool.apply_async(get_page, (offset,))
+                for resource in page['resources']:
+                    yield resource
+                if not more:
+                    break
+                page = get_page(offset) if pending is None else pending.get()
+        finally:
+            if pool is not None:
+                pool.terminate()
+
 
 class ApplianceException(Exception):
     pass
@@ -331,11 +382,12 @@ class IPAppliance(object):
 
     def unregister(self):
         """ unregisters appliance from RHSM/SAT6 """
-        self.ssh_client.run_command('subscription-manager remove --all')
-        self.ssh_client.run_command('subscription-manager unregister')
-        self.ssh_client.run_command('subscription-manager clean')
-        self.ssh_client.run_command('mv -f /etc/rhsm/rhsm.conf.kat-backup /etc/rhsm/rhsm.conf')
-        self.ssh_client.run_command('rpm -qa | grep katello-ca-consumer | xargs rpm -e')
+        self.ssh_client.run_commands([
+            'subscription-manager remove --all',
+            'subscription-manager unregister',
+            'subscription-manager clean',
+            'mv -f /etc/rhsm/rhsm.conf.kat-backup /etc/rhsm/rhsm.conf',
+            'rpm -qa | grep katello-ca-consumer | xargs rpm -e'])
 
     def is_registration_complete(self, used_repo_or_channel):
         """ Checks if an appliance has the correct repos enabled with RHSM or SAT6 """
@@ -589,29 +641,20 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
                     ensure_host=True)
             # clear any set hostname from /etc/hosts
             self.remove_resolvable_hostname()
-            ssh_client.run_command(
+            ssh_client.run_commands([
                 "sed -i -r -e '/^HWADDR/d' /etc/sysconfig/network-scripts/ifcfg-eth0",
-                ensure_host=True)
-            ssh_client.run_command(
                 "sed -i -r -e '/^UUID/d' /etc/sysconfig/network-scripts/ifcfg-eth0",
-                ensure_host=True)
-            ssh_client.run_command("rm -f /etc/udev/rules.d/70-*", ensure_host=True)
-            # Fix SELinux things
-            ssh_client.run_command("restorecon -R /etc/sysconfig/network-scripts", ensure_host=True)
-            ssh_client.run_command("restorecon /etc/sysconfig/network", ensure_host=True)
-            # Stop the evmserverd and move the logs somewhere
-            ssh_client.run_command("systemctl stop evmserverd", ensure_host=True)
-            ssh_client.run_command("mkdir -p /var/www/miq/vmdb/log/preconfigure-logs",
-                ensure_host=True)
-            ssh_client.run_command(
+                "rm -f /etc/udev/rules.d/70-*",
+                # Fix SELinux things
+                "restorecon -R /etc/sysconfig/network-scripts",
+                "restorecon /etc/sysconfig/network",
+                # Stop the evmserverd and move the logs somewhere
+                "systemctl stop evmserverd",
+                "mkdir -p /var/www/miq/vmdb/log/preconfigure-logs",
                 "mv /var/www/miq/vmdb/log/*.log /var/www/miq/vmdb/log/preconfigure-logs/",
-                ensure_host=True)
-            ssh_client.run_command(
                 "mv /var/www/miq/vmdb/log/*.gz /var/www/miq/vmdb/log/preconfigure-logs/",
-                ensure_host=True)
-            # Reduce swapping, because it can do nasty things to our providers
-            ssh_client.run_command('echo "vm.swappiness = 1" >> /etc/sysctl.conf',
-                ensure_host=True)
+                # Reduce swapping, because it can do nasty things to our providers
+                'echo "vm.swappiness = 1" >> /etc/sysctl.conf'], ensure_host=True)
 
     def _encrypt_string(self, string):
         try:
@@ -632,7 +675,7 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
             not recognized, but are present.
         """
         known_ems_list = []
-        for ems in self.rest_api.collections.providers:
+        for ems in self.rest_api.iter_resources('providers', attributes=('name', 'type')):
             if not any(
                     p_type in ems['type'] for p_type in RECOGNIZED_BY_IP + RECOGNIZED_BY_CREDS):
                 continue
@@ -1292,11 +1335,13 @@ ExecStartPre=/usr/bin/bash -c "ipcs -s|grep apache|cut -d\  -f2|while read line;
             kwargs["enabled"] = 1
         filename = "/etc/yum.repos.d/{}.repo".format(repo_id)
         logger.info("Writing a new repofile %s %s", repo_id, repo_url)
-        self.ssh_client.run_command('echo "[update-{}]" > {}'.format(repo_id, filename))
-        self.ssh_client.run_command('echo "name=update-url-{}" >> {}'.format(repo_id, filename))
-        self.ssh_client.run_command('echo "baseurl={}" >> {}'.format(repo_url, filename))
+        commands = [
+            'echo "[update-{}]" > {}'.format(repo_id, filename),
+            'echo "name=update-url-{}" >> {}'.format(repo_id, filename),
+            'echo "baseurl={}" >> {}'.format(repo_url, filename)]
         for k, v in kwargs.items():
-            self.ssh_client.run_command('echo "{}={}" >> {}'.format(k, v, filename))
+            commands.append('echo "{}={}" >> {}'.format(k, v, filename))
+        self.ssh_client.run_commands(commands)
         return repo_id
 
     def add_product_repo(self, repo_url, **kwargs):
@@ -28,7 +28,20 @@ class ApplianceDB(AppliancePlugin):
     @cached_property
     def client(self):
         # slightly crappy: anything that changes self.address should also del(self.client)
-        return db.Db(self.address)
+        return db.Db(self.address, schema_key=self.schema_key)
+
+    @property
+    def schema_key(self):
+        """Key of the persisted table metadata of this database, the appliance version
+
+        :py:class:`cfme.utils.db.DbSchema` adds the latest migration of the database to it.
+        """
+        try:
+            return str(self.appliance.version)
+        except Exception as e:
+            # Without a key, the reflected tables are still shared within the process
+            self.logger.warning('Unable to get the appliance version for the db schema: %s', e)
+            return None
 
     @cached_property
     def address(self):
@@ -0,0 +1,80 @@
+"""Cache of the issue tracker data of blockers, shared on disk by all the processes of a run
+
+The master and the slaves all evaluate the same blockers, so the bugs and issues fetched by one
+of them are pickled to :py:data:`blocker_cache_path` and the others load them from there
+instead of asking the tracker again. Entries expire ``ttl`` seconds after they were fetched.
+The cache outlives the run, so bug and issue states can be up to ``ttl`` seconds old in the
+next runs too; it's off unless a ``ttl`` is configured in env.yaml:
+
+.. code-block:: yaml
+
+    blockers:
+        prefetch: True  # fetch the blockers of all collected tests in bulk
+        cache:
+            ttl: 3600  # 0 (the default) disables the cache
+            path: /var/tmp/cfme_blocker_cache  # defaults to log/blocker_cache
+"""
+import os
+import pickle
+import re
+import time
+
+from py.path import local
+
+from cfme.utils import conf
+from cfme.utils.log import logger
+from cfme.utils.path import log_path
+
+blocker_cache_path = log_path.join('blocker_cache')
+
+
+class BlockerCache(object):
+    """Pickled tracker data, one file per entry so the processes never overwrite each other's
+
+    Args:
+        path: Directory of the cache
+        ttl: Seconds an entry is valid after it was stored, 0 disables the cache
+    """
+    def __init__(self, path=None, ttl=0):
+        self.path = local(path) if path is not None else blocker_cache_path
+        self.ttl = ttl
+
+    @classmethod
+    def from_conf(cls, cache_conf):
+        return cls(**cache_conf)
+
+    def _file(self, tracker, key):
+        # Keys are things like bug ids and "owner/repo:123", keep them filesystem safe
+        return self.path.join(tracker, '{}.pickle'.format(re.sub(r'[^\w.-]', '_', str(key))))
+
+    def get(self, tracker, key):
+        """Get the data stored for a key, ``None`` if there's none or it expired"""
+        if not self.ttl:
+            return None
+        cache_file = self._file(tracker, key)
+        try:
+            if time.time() - cache_file.mtime() > self.ttl:
+                return None
+            with cache_file.open('rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Missing, being replaced or unreadable, all the same to the caller
+            return None
+
+    def set(self, tracker, key, data):
+        """Store the data of a key"""
+        if not self.ttl:
+            return
+        cache_file = self._file(tracker, key)
+        # Written aside and renamed, other processes only ever see a complete file
+        temp_file = '{}.{}'.format(cache_file.strpath, os.getpid())
+        try:
+            cache_file.dirpath().ensure(dir=True)
+            with open(temp_file, 'wb') as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(temp_file, cache_file.strpath)
+        except Exception as e:
+            logger.warning('Unable to cache %s %s: %s', tracker, key, e)
+
+
+blocker_cache = BlockerCache.from_conf(conf.env.get('blockers', {}).get('cache', {}))
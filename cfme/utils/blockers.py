@@ -1,15 +1,22 @@
 # -*- coding: utf-8 -*-
 import re
+from multiprocessing.pool import ThreadPool
+
 import six
 import six.moves.xmlrpc_client
 from github import Github
+from github.Issue import Issue
 from six.moves.urllib.parse import urlparse
 
 from cfme.fixtures.pytest_store import store
 from cfme.utils import classproperty, conf, version
+from cfme.utils.blocker_cache import blocker_cache
 from cfme.utils.bz import Bugzilla
 from cfme.utils.log import logger
 
+# BZ(123456) and "BZ#123456" in the code of test modules
+_BZ_REFERENCE = re.compile(r'\bBZ(?:\(\s*|#)([0-9]+)')
+
 
 class Blocker(object):
     """Base class for all blockers
@@ -67,6 +74,14 @@ class Blocker(object):
         else:
             raise ValueError("Wrong specification of the blockers!")
 
+    @classmethod
+    def prefetch(cls, blockers):
+        """Load the data of several blockers of this engine ahead of their evaluation
+
+        Engines that can fetch their data in bulk override this, the others fetch it as needed.
+        """
+        pass
+
 
 class GH(Blocker):
     DEFAULT_REPOSITORY = conf.env.get("github", {}).get("default_repo")
@@ -113,13 +128,52 @@ class GH(Blocker):
         else:
             raise ValueError("GH issue specified wrong")
 
+    @classmethod
+    def _load_issue(cls, repo, issue):
+        identifier = "{}:{}".format(repo, issue)
+        raw_data = blocker_cache.get('github', identifier)
+        if raw_data is None:
+            raw_data = cls.github.get_repo(repo).get_issue(issue).raw_data
+            blocker_cache.set('github', identifier, raw_data)
+        return cls.github.create_from_raw_data(Issue, raw_data)
+
     @property
     def data(self):
         identifier = "{}:{}".format(self.repo, self.issue)
         if identifier not in self._issue_cache:
-            self._issue_cache[identifier] = self.github.get_repo(self.repo).get_issue(self.issue)
+            self._issue_cache[identifier] = self._load_issue(self.repo, self.issue)
         return self._issue_cache[identifier]
 
+    @classmethod
+    def prefetch(cls, blockers, workers=8):
+        """Load the issues of several blockers, several at a time
+
+        GitHub has no query for a list of issues, so the issues that aren't cached are fetched
+        in parallel instead.
+        """
+        missing = sorted({
+            (blocker.repo, blocker.issue) for blocker in blockers
+            if "{}:{}".format(blocker.repo, blocker.issue) not in cls._issue_cache})
+        if not missing:
+            return
+
+        def load(repo_issue):
+            try:
+                return cls._load_issue(*repo_issue)
+            except Exception as e:
+                logger.warning('Unable to fetch GitHub issue %s:%s: %s', repo_issue[0],
+                               repo_issue[1], e)
+                return None
+
+        pool = ThreadPool(min(workers, len(missing)))
+        try:
+            issues = pool.map(load, missing)
+        finally:
+            pool.close()
+        for (repo, issue), data in zip(missing, issues):
+            if data is not None:
+                cls._issue_cache["{}:{}".format(repo, issue)] = data
+
     @property
     def blocks(self):
         if self.upstream_only and version.appliance_is_downstream():
@@ -168,6 +222,12 @@ class BZ(Blocker):
         super(BZ, self).__init__(**kwargs)
         self.bug_id = int(bug_id)
 
+    @classmethod
+    def prefetch(cls, blockers):
+        """Load the bugs of several blockers and their variants, in one query per level"""
+        if cls.bugzilla is not None:
+            cls.bugzilla.prefetch(blocker.bug_id for blocker in blockers)
+
     @property
     def data(self):
         return self.bugzilla.resolve_blocker(
@@ -250,3 +310,60 @@ class JIRA(Blocker):
 
     def __str__(self):
         return 'Jira card {}'.format(self.url)
+
+
+def collect_blockers(items):
+    """Blockers the collected tests refer to
+
+    Takes the blockers in the ``meta(blockers=...)`` of the tests, and the bugzilla bugs written
+    as ``BZ(123456)`` or ``"BZ#123456"`` in the code of their modules, which tests evaluate
+    while they run.
+
+    Returns:
+        A list of :py:class:`Blocker` instances, one per distinct blocker spec
+    """
+    specs = set()
+    blockers = []
+    modules = set()
+    for item in items:
+        for blocker in getattr(item, '_metadata', {}).get('blockers', []):
+            if isinstance(blocker, int):
+                blocker = "BZ#{}".format(blocker)
+            if isinstance(blocker, six.string_types):
+                if blocker in specs:
+                    continue
+                specs.add(blocker)
+            try:
+                blockers.append(Blocker.parse(blocker))
+            except ValueError as e:
+                logger.warning('Unable to parse blocker %r of %s: %s', blocker, item.nodeid, e)
+        modules.add(str(item.fspath))
+    for module in sorted(modules):
+        try:
+            with open(module) as f:
+                source = f.read()
+        except IOError:
+            continue
+        for bug_id in _BZ_REFERENCE.findall(source):
+            if "BZ#{}".format(bug_id) not in specs:
+                specs.add("BZ#{}".format(bug_id))
+                blockers.append(BZ(bug_id))
+    return blockers
+
+
+def prefetch_blockers(blockers):
+    """Load the data of blockers in bulk, one round per blocker engine
+
+    The data ends up in the caches of the engines and in the
+    :py:data:`cfme.utils.blocker_cache.blocker_cache` shared with the other processes. Failures
+    are only logged, the blockers are then fetched one by one when they are evaluated.
+    """
+    by_engine = {}
+    for blocker in blockers:
+        by_engine.setdefault(type(blocker), []).append(blocker)
+    for engine, engine_blockers in by_engine.items():
+        try:
+            engine.prefetch(engine_blockers)
+        except Exception as e:
+            logger.warning('Unable to prefetch %d %s blockers: %s', len(engine_blockers),
+                           engine.__name__, e)
@@ -7,6 +7,7 @@ from bugzilla import Bugzilla as _Bugzilla
 from miq_version import Version, LATEST
 
 from cached_property import cached_property
+from cfme.utils.blocker_cache import blocker_cache
 from cfme.utils.conf import credentials, env
 from cfme.utils.log import logger
 from cfme.utils.version import current_version, appliance_build_datetime, appliance_is_downstream
@@ -52,6 +53,10 @@ class Bugzilla(object):
         # __kwargs passed to _Bugzilla instantiation, pop our args out
         self.__product = kwargs.pop("product", None)
         self.__config_options = kwargs.pop('config_options', {})
+        # Shared BlockerCache, entries are kept apart per bugzilla instance
+        self.__cache = kwargs.pop('cache', None)
+        self.__cache_name = 'bugzilla-{}'.format(
+            re.sub(r'^\w+://|/.*$', '', kwargs.get('url') or '') or 'default')
         self.__kwargs = kwargs
         self.__bug_cache = {}
         self.__product_cache = {}
@@ -70,7 +75,11 @@ class Bugzilla(object):
 
     def product(self, product):
         if product not in self.__product_cache:
-            self.__product_cache[product] = self.products(product)[0]
+            data = self._cache_get('product-{}'.format(product))
+            if data is None:
+                data = self.products(product)[0]._data
+                self._cache_set('product-{}'.format(product), data)
+            self.__product_cache[product] = Product(data)
         return self.__product_cache[product]
 
     @property
@@ -93,7 +102,8 @@ class Bugzilla(object):
                    cookiefile=None,
                    tokenfile=None,
                    product=bz_conf.get("bugzilla", {}).get("product"),
-                   config_options=bz_conf)
+                   config_options=bz_conf,
+                   cache=blocker_cache)
 
     @cached_property
     def bugzilla(self):
@@ -114,12 +124,83 @@ class Bugzilla(object):
         else:
             return Version(self.__config_options.get("upstream_version", Version.latest().vstring))
 
+    def _cache_get(self, key):
+        if self.__cache is None:
+            return None
+        return self.__cache.get(self.__cache_name, key)
+
+    def _cache_set(self, key, data):
+        if self.__cache is not None:
+            self.__cache.set(self.__cache_name, key, data)
+
+    def _cached_bug(self, id):
+        bug = self._cache_get(id)
+        if bug is not None:
+            # Unpickled bugs aren't bound to a connection, they need one for their aliases
+            bug.bugzilla = self.bugzilla
+        return bug
+
     def get_bug(self, id):
         id = int(id)
         if id not in self.__bug_cache:
-            self.__bug_cache[id] = BugWrapper(self, self.bugzilla.getbug(id))
+            bug = self._cached_bug(id)
+            if bug is None:
+                bug = self.bugzilla.getbug(id)
+                self._cache_set(id, bug)
+            self.__bug_cache[id] = BugWrapper(self, bug)
         return self.__bug_cache[id]
 
+    def get_bugs(self, ids):
+        """Get several bugs, fetching those that aren't cached yet in one query
+
+        Returns:
+            A dict of bug id to :py:class:`BugWrapper` of the bugs that exist
+        """
+        ids = set(map(int, ids))
+        missing = []
+        for id in ids.difference(self.__bug_cache):
+            bug = self._cached_bug(id)
+            if bug is None:
+                missing.append(id)
+            else:
+                self.__bug_cache[id] = BugWrapper(self, bug)
+        if missing:
+            logger.info('Fetching %d bugs from bugzilla', len(missing))
+            for bug in self.bugzilla.getbugs(sorted(missing), permissive=True):
+                if bug is not None:
+                    self._cache_set(bug.id, bug)
+                    self.__bug_cache[bug.id] = BugWrapper(self, bug)
+        return {id: self.__bug_cache[id] for id in ids if id in self.__bug_cache}
+
+    def prefetch(self, ids):
+        """Load bugs and the bugs :py:meth:`get_bug_variants` goes through for them
+
+        Follows the duplicates, originals and copies of the bugs the same way
+        :py:meth:`get_bug_variants` does, but with one query for each level of them instead of
+        one query for each bug.
+        """
+        # Bug id to the ids of the bugs it may be a copy of, None if it's needed anyway
+        pending = {int(id): None for id in ids}
+        expanded = set()
+        while pending:
+            bugs = self.get_bugs(pending)
+            following = {}
+            for id, originals in pending.items():
+                bug = bugs.get(id)
+                if bug is None or (originals is not None and bug.copy_of not in originals):
+                    continue
+                expanded.add(id)
+                if bug.status == "CLOSED" and bug.resolution == "DUPLICATE":
+                    following[int(bug.dupe_of)] = None
+                if bug.copy_of:
+                    following[bug.copy_of] = None
+                # The bugs this one blocks are its copies if they say they are
+                for blocked_id in map(int, bug.blocks or []):
+                    if following.setdefault(blocked_id, set()) is not None:
+                        following[blocked_id].add(id)
+            pending = {id: originals for id, originals in following.items()
+                       if id not in expanded}
+
     def get_bug_variants(self, id):
         if isinstance(id, BugWrapper):
             bug = id
@@ -214,11 +295,11 @@ def check_fixed_in(fixed_in, version_series):
 
 
 class BugWrapper(object):
-    _copy_matchers = map(re.compile, [
+    _copy_matchers = list(map(re.compile, [
         r'^[+]{3}\s*This bug is a CFME zstream clone. The original bug is:\s*[+]{3}\n[+]{3}\s*'
         'https://bugzilla.redhat.com/show_bug.cgi\?id=(\d+)\.\s*[+]{3}',
         r"^\+\+\+ This bug was initially created as a clone of Bug #([0-9]+) \+\+\+"
-    ])
+    ]))
 
     def __init__(self, bugzilla, bug):
         self._bug = bug
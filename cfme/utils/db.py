@@ -1,3 +1,6 @@
+import os
+import pickle
+import threading
 from collections import Mapping
 from contextlib import contextmanager
 
@@ -9,8 +12,12 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import Pool
 
 from cfme.fixtures.pytest_store import store
-from cfme.utils import conf
+from cfme.utils import at_exit, conf
 from cfme.utils.log import logger
+from cfme.utils.path import log_path
+
+#: Reflected table metadata, one pickle per appliance version
+schema_cache_path = log_path.join('db_schema_cache')
 
 
 @event.listens_for(Pool, "checkout")
@@ -30,6 +37,131 @@ def ping_connection(dbapi_connection, connection_record, connection_proxy):
     cursor.close()
 
 
+class EnginePool(object):
+    """Process-wide SQLAlchemy engines, one per database url
+
+    Every :py:class:`Db` (and so every copy of an appliance) talking to the same database shares
+    the engine and its connection pool, instead of opening connections of its own.
+
+    Args:
+        pool_size: Connections kept open per database
+        max_overflow: Connections opened on top of ``pool_size`` under load
+        pool_recycle: Seconds after which a connection is replaced, ``-1`` to keep them forever
+    """
+    def __init__(self, pool_size=5, max_overflow=10, pool_recycle=3600):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_conf(cls, pool_conf):
+        return cls(**pool_conf)
+
+    def get(self, db_url):
+        """Get the engine of a database url, creating it on first use"""
+        with self._lock:
+            if db_url not in self._engines:
+                self._engines[db_url] = create_engine(
+                    db_url, echo_pool=True, pool_size=self.pool_size,
+                    max_overflow=self.max_overflow, pool_recycle=self.pool_recycle)
+            return self._engines[db_url]
+
+    def dispose_all(self):
+        """Close the connections of all engines"""
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine in engines:
+            engine.dispose()
+
+
+engine_pool = EnginePool.from_conf(conf.env.get('db', {}).get('pool', {}))
+at_exit(engine_pool.dispose_all)
+
+
+class DbSchema(object):
+    """Reflected tables of a database, shared by all :py:class:`Db` objects using it
+
+    When a ``schema_key`` (the appliance version) is given, the reflected metadata is also
+    pickled to :py:data:`schema_cache_path`, so later runs and other processes testing the
+    same schema load the tables without reflecting them again. The persisted metadata is keyed
+    by the latest migration of the database too, the schema of upstream builds changes while
+    their version doesn't.
+
+    Args:
+        engine: The engine the metadata is bound to
+        schema_key: Key of the persisted metadata, ``None`` to not persist it
+    """
+    def __init__(self, engine, schema_key=None):
+        self.cache_file = None
+        if schema_key is not None:
+            migration = self._latest_migration(engine)
+            if migration is not None:
+                self.cache_file = schema_cache_path.join(
+                    '{}-{}.pickle'.format(schema_key, migration))
+        self.metadata = self._load() or MetaData()
+        self.metadata.bind = engine
+        self.table_base = declarative_base(metadata=self.metadata)
+        self.table_classes = {}
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def _latest_migration(engine):
+        try:
+            return engine.execute('SELECT max(version) FROM schema_migrations').scalar()
+        except Exception as e:
+            # Nothing to tell the schemas apart, so the metadata is not persisted
+            logger.warning('[DB] Unable to get the latest migration of the schema: %s', e)
+            return None
+
+    def _load(self):
+        if self.cache_file is None or not self.cache_file.check():
+            return None
+        try:
+            with self.cache_file.open('rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning('[DB] Unable to load the schema cache %s: %s', self.cache_file, e)
+            return None
+
+    def save(self):
+        """Persist the reflected metadata, if the schema has a key"""
+        if self.cache_file is None:
+            return
+        # Written aside and renamed, other processes only ever see a complete file
+        temp_file = '{}.{}'.format(self.cache_file.strpath, os.getpid())
+        try:
+            self.cache_file.dirpath().ensure(dir=True)
+            with open(temp_file, 'wb') as f:
+                pickle.dump(self.metadata, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(temp_file, self.cache_file.strpath)
+        except Exception as e:
+            logger.warning('[DB] Unable to save the schema cache %s: %s', self.cache_file, e)
+
+    def reflect(self, table_name):
+        """Reflect a table unless it's already known, persisting the metadata if it wasn't"""
+        with self.lock:
+            if table_name in self.metadata.tables:
+                return
+            self.metadata.reflect(only=[table_name])
+            self.save()
+
+
+_schemas = {}
+_schemas_lock = threading.Lock()
+
+
+def get_schema(db_url, schema_key=None):
+    """Get the shared :py:class:`DbSchema` of a database url and schema key"""
+    key = (db_url, schema_key)
+    with _schemas_lock:
+        if key not in _schemas:
+            _schemas[key] = DbSchema(engine_pool.get(db_url), schema_key)
+        return _schemas[key]
+
+
 class Db(Mapping):
     """Helper class for interacting with a CFME database using SQLAlchemy
 
@@ -37,6 +169,8 @@ class Db(Mapping):
         hostname: base url to be used (default is from current_appliance)
         credentials: name of credentials to use from :py:attr:`utils.conf.credentials`
             (default ``database``)
+        schema_key: key of the persisted table metadata, usually the appliance version;
+            the metadata is only shared within the process if not given
 
     Provides convient attributes to common sqlalchemy objects related to this DB,
     as well as a Mapping interface to access and reflect database tables. Where possible,
@@ -65,13 +199,15 @@ class Db(Mapping):
         Creating a table object requires a call to the database so that SQLAlchemy can do
         reflection to determine the table's structure (columns, keys, indices, etc). On
         a latent connection, this can be extremely slow, which will affect methods that return
-        tables, like the mapping interface or :py:meth:`values`.
+        tables, like the mapping interface or :py:meth:`values`. The engine, metadata and table
+        objects are therefore shared by all Db objects of the same database in the process, and
+        with a ``schema_key`` the metadata is kept on disk between runs.
 
     """
-    def __init__(self, hostname=None, credentials=None, port=None):
-        self._table_cache = {}
+    def __init__(self, hostname=None, credentials=None, port=None, schema_key=None):
         self.hostname = hostname or store.current_appliance.db.address
         self.port = port or store.current_appliance.db_port
+        self.schema_key = schema_key
 
         self.credentials = credentials or conf.credentials['database']
 
@@ -132,7 +268,7 @@ class Db(Mapping):
 
     def copy(self):
         """Copy this database instance, keeping the same credentials and hostname"""
-        return type(self)(self.hostname, self.credentials)
+        return type(self)(self.hostname, self.credentials, self.port, self.schema_key)
 
     def __eq__(self, other):
         """Check if this db is equal to another db"""
@@ -150,10 +286,16 @@ class Db(Mapping):
         """The :py:class:`Engine <sqlalchemy:sqlalchemy.engine.Engine>` for this database
 
         It uses pessimistic disconnection handling, checking that the database is still
-        connected before executing commands.
+        connected before executing commands. The engine and its connection pool are shared
+        with all other Db objects of this database, see :py:data:`engine_pool`.
 
         """
-        return create_engine(self.db_url, echo_pool=True)
+        return engine_pool.get(self.db_url)
+
+    @cached_property
+    def schema(self):
+        """The :py:class:`DbSchema` holding the reflected tables of this database"""
+        return get_schema(self.db_url, self.schema_key)
 
     @cached_property
     def sessionmaker(self):
@@ -171,7 +313,7 @@ class Db(Mapping):
         This base class is created using
         :py:class:`declarative_base <sqlalchemy:sqlalchemy.ext.declarative.declarative_base>`.
         """
-        return declarative_base(metadata=self.metadata)
+        return self.schema.table_base
 
     @cached_property
     def metadata(self):
@@ -185,7 +327,7 @@ class Db(Mapping):
             use :py:meth:`reflect_table`.
 
         """
-        return MetaData(bind=self.engine)
+        return self.schema.metadata
 
     @cached_property
     def db_url(self):
@@ -245,16 +387,21 @@ class Db(Mapping):
             table_name: The name of a table to reflect
 
         """
-        self.metadata.reflect(only=[table_name])
+        self.schema.reflect(table_name)
 
     def _table(self, table_name):
         """Retrieves, reflects, and caches table objects
 
         Actual implementation of __getitem__
         """
+        table_classes = self.schema.table_classes
         try:
-            return self._table_cache[table_name]
+            return table_classes[table_name]
         except KeyError:
+            pass
+        with self.schema.lock:
+            if table_name in table_classes:
+                return table_classes[table_name]
             self.reflect_table(table_name)
             table = self.metadata.tables[table_name]
             table_dict = {
@@ -264,7 +411,7 @@ class Db(Mapping):
 
             try:
                 table_cls = type(str(table_name), (self.table_base,), table_dict)
-                self._table_cache[table_name] = table_cls
+                table_classes[table_name] = table_cls
                 return table_cls
             except ArgumentError:
                 # This usually happens on join tables with no PKs
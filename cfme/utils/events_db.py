@@ -3,14 +3,17 @@
 """Library for event testing.
 """
 
+import os
+import select
+import uuid
 from cached_property import cached_property
 from contextlib import contextmanager
-from collections import Iterable
+from collections import Iterable, OrderedDict, defaultdict
 from datetime import datetime
 from numbers import Number
 from sqlalchemy.sql.expression import func
 from time import sleep
-from threading import Thread, Event as ThreadEvent
+from threading import Lock, Thread, Event as ThreadEvent
 
 from cfme.utils.log import create_sublogger
 
@@ -208,8 +211,8 @@ class Event(object):
         for attr_name, attr_type in self._tool.event_streams_attributes:
             self._default_attrs[attr_name] = EventAttr(**{attr_name: None, 'attr_type': attr_type})
 
-    def _parse_raw_event(self, evt):
-        for attr in self._default_attrs:
+    def _parse_raw_event(self, evt, attrs=None):
+        for attr in attrs or self._default_attrs:
             default_type = self._default_attrs[attr].type
             evt_value = getattr(evt, attr)
             evt_type = type(evt_value)
@@ -280,18 +283,107 @@ class Event(object):
             self._parse_raw_event(evt)
         return self
 
+    def build_from_row(self, row, columns):
+        """
+        helper method which takes a row of some event_streams columns and prepares event object
+        """
+        self._parse_raw_event(row, columns)
+        return self
+
+
+class ExpectedEventIndex(object):
+    """
+    expected events of a listener indexed by their event_type and target_type values,
+    so that an event is only compared with the expected events it can possibly match.
+    attributes compared by a cmp_func or without a value can't be looked up, such expected events
+    are put under ``None`` and checked for every event of the other attribute's value.
+    also tracks the event_streams columns the expected events need.
+    """
+    KEYS = ('event_type', 'target_type')
+    # always selected, for set_last_record and for readable got events
+    BASE_COLUMNS = ('id', 'event_type', 'target_type', 'target_id', 'timestamp', 'message')
+
+    def __init__(self):
+        self._buckets = defaultdict(list)
+        self.columns = set(self.BASE_COLUMNS)
+
+    @staticmethod
+    def _key_value(event, name):
+        attr = event.event_attrs.get(name)
+        if attr is None or attr.cmp_func or not attr.value:
+            return None
+        try:
+            hash(attr.value)
+        except TypeError:
+            return None
+        return attr.value
+
+    def add(self, expectation):
+        event = expectation['event']
+        key = tuple(self._key_value(event, name) for name in self.KEYS)
+        self._buckets[key].append(expectation)
+        for name in event.event_attrs:
+            if name == 'target_name':
+                self.columns.update(('target_type', 'target_id'))
+            else:
+                self.columns.add(name)
+
+    def candidates(self, event_type, target_type):
+        """
+        expected events which may match an event with given event_type and target_type
+        """
+        keys = OrderedDict.fromkeys([(event_type, target_type), (event_type, None),
+                                     (None, target_type), (None, None)])
+        for key in keys:
+            for expectation in self._buckets.get(key, ()):
+                yield expectation
+
 
 class DbEventListener(Thread):
     """
      accepts "expected" events, listens to db events and compares showed up events with expected
      events. Runs callback function if expected events have it.
+
+     new events are fetched when postgres notifies about them. a trigger on event_streams doing
+     ``pg_notify`` on a channel of this listener is installed on the appliance for this, and
+     removed when the listener stops. if it can't be installed, event_streams is polled every
+     ``poll_interval`` seconds instead.
+     only the columns the expected events need are selected.
+
+     Args:
+         appliance: appliance to listen to
+         notify: use LISTEN/NOTIFY if possible, otherwise poll
+         poll_interval: seconds between polls when not using notifications
+         notify_timeout: seconds after which event_streams is checked even without notification
     """
-    def __init__(self, appliance):
+    NOTIFY_CHANNEL_PREFIX = 'cfme_tests_events'
+    NOTIFY_FUNCTION = (
+        "CREATE OR REPLACE FUNCTION {channel}_notify() RETURNS trigger AS $$ "
+        "BEGIN PERFORM pg_notify('{channel}', NEW.id::text); RETURN NULL; END; "
+        "$$ LANGUAGE plpgsql")
+    NOTIFY_TRIGGER = (
+        "CREATE TRIGGER {channel}_trigger AFTER INSERT ON event_streams "
+        "FOR EACH ROW EXECUTE PROCEDURE {channel}_notify()")
+    NOTIFY_CLEANUP = (
+        "DROP TRIGGER IF EXISTS {channel}_trigger ON event_streams; "
+        "DROP FUNCTION IF EXISTS {channel}_notify()")
+
+    def __init__(self, appliance, notify=True, poll_interval=0.2, notify_timeout=30):
         super(DbEventListener, self).__init__()
         self._appliance = appliance
         self._tool = EventTool(self._appliance)
+        self.notify = notify
+        self.poll_interval = poll_interval
+        self.notify_timeout = notify_timeout
 
         self._events_to_listen = []
+        self._expected_index = ExpectedEventIndex()
+        self._lock = Lock()
+        # unique, listeners of other test sessions may use the same appliance
+        self._notify_channel = '{}_{}'.format(self.NOTIFY_CHANNEL_PREFIX, uuid.uuid4().hex[:12])
+        self._notify_installed = False
+        self._notify_conn = None
+        self._wakeup = None
         # last_id is used to ignore already arrived messages the database
         # When database is "cleared" the id of the last event is placed here. That is then used
         # in queries to prevent events of this id and earlier to get in.
@@ -356,10 +448,13 @@ class DbEventListener(Thread):
             for evt in evts:
                 if isinstance(evt, Event):
                     logger.info("event {} is added to listening queue".format(evt))
-                    self._events_to_listen.append({'event': evt,
-                                                   'callback': callback,
-                                                   'matched_events': [],
-                                                   'first_event': first_event})
+                    expectation = {'event': evt,
+                                   'callback': callback,
+                                   'matched_events': [],
+                                   'first_event': first_event}
+                    with self._lock:
+                        self._events_to_listen.append(expectation)
+                        self._expected_index.add(expectation)
                 else:
                     raise ValueError("one of events doesn't belong to Event class")
         else:
@@ -367,6 +462,8 @@ class DbEventListener(Thread):
 
     def start(self):
         logger.info('Event Listener has been started')
+        if self.notify:
+            self._start_notifications()
         self.set_last_record()
         self._stop_event.clear()
         super(DbEventListener, self).start()
@@ -374,9 +471,91 @@ class DbEventListener(Thread):
     def stop(self):
         logger.info('Event Listener has been stopped')
         self._stop_event.set()
+        # the listener thread closes the pipe when it finishes, the lock keeps it open meanwhile
+        with self._lock:
+            if self._wakeup is not None:
+                os.write(self._wakeup[1], b'x')
 
     def run(self):
-        self.process_events()
+        try:
+            self.process_events()
+        finally:
+            self._stop_notifications()
+
+    def _start_notifications(self):
+        """
+        installs the notification trigger if needed and starts listening to it
+        """
+        conn = None
+        try:
+            from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+            # a dedicated connection, it must not go back to the pool in LISTEN state
+            pooled = self._appliance.db.client.engine.raw_connection()
+            pooled.detach()
+            conn = pooled.connection
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            cursor = conn.cursor()
+            cursor.execute(self.NOTIFY_FUNCTION.format(channel=self._notify_channel))
+            self._notify_installed = True
+            cursor.execute(self.NOTIFY_TRIGGER.format(channel=self._notify_channel))
+            cursor.execute('LISTEN {}'.format(self._notify_channel))
+        except Exception as e:
+            logger.warning('Unable to listen to event notifications, polling instead: %s', e)
+            if conn is not None:
+                conn.close()
+            self._remove_notify_trigger()
+            return
+        self._notify_conn = conn
+        self._wakeup = os.pipe()
+
+    def _stop_notifications(self):
+        if self._notify_conn is not None:
+            try:
+                self._notify_conn.close()
+            except Exception:
+                pass
+            self._notify_conn = None
+        self._remove_notify_trigger()
+        with self._lock:
+            if self._wakeup is not None:
+                for fd in self._wakeup:
+                    os.close(fd)
+                self._wakeup = None
+
+    def _remove_notify_trigger(self):
+        """
+        drops the notification trigger and function of this listener from the appliance
+        """
+        if not self._notify_installed:
+            return
+        try:
+            with self._appliance.db.client.engine.begin() as conn:
+                conn.execute(self.NOTIFY_CLEANUP.format(channel=self._notify_channel))
+            self._notify_installed = False
+        except Exception as e:
+            logger.warning('Unable to remove the event notification trigger %s: %s',
+                           self._notify_channel, e)
+
+    def _wait_for_events(self):
+        """
+        waits until postgres notifies about new events (or the listener is stopped)
+        """
+        if self._notify_conn is None:
+            sleep(self.poll_interval)
+            return
+        try:
+            ready, _, _ = select.select(
+                [self._notify_conn, self._wakeup[0]], [], [], self.notify_timeout)
+            if self._notify_conn in ready:
+                self._notify_conn.poll()
+                del self._notify_conn.notifies[:]
+        except Exception as e:
+            logger.warning('Lost event notifications, polling instead: %s', e)
+            conn, self._notify_conn = self._notify_conn, None
+            try:
+                conn.close()
+            except Exception:
+                pass
 
     @property
     def started(self):
@@ -388,22 +567,29 @@ class DbEventListener(Thread):
         processed events are ignored next time
         """
         while not self._stop_event.is_set():
-            events = self.get_next_portion()
+            with self._lock:
+                columns = sorted(self._expected_index.columns)
+            events = self.get_next_portion(columns)
             if len(events) == 0:
-                sleep(0.2)
+                self._wait_for_events()
                 continue
-            for got_event in events:
-                logger.debug("processing event id {}".format(got_event.id))
-                got_event = Event(event_tool=self._tool).build_from_raw_event(got_event)
-                for exp_event in self._events_to_listen:
+            for row in events:
+                logger.debug("processing event id {}".format(row.id))
+                got_event = None
+                with self._lock:
+                    candidates = list(
+                        self._expected_index.candidates(row.event_type, row.target_type))
+                for exp_event in candidates:
                     if exp_event['first_event'] and len(exp_event['matched_events']) > 0:
                         continue
 
+                    if got_event is None:
+                        got_event = Event(event_tool=self._tool).build_from_row(row, columns)
                     if exp_event['event'].matches(got_event):
                         if exp_event['callback']:
                             exp_event['callback'](exp_event=exp_event['event'], got_event=got_event)
                         exp_event['matched_events'].append(got_event)
-                self.set_last_record(got_event)
+                self._last_processed_id = row.id
 
                 if self._stop_event.is_set():
                     break
@@ -422,13 +608,20 @@ class DbEventListener(Thread):
             event['matched_events'] = []
 
     def reset_events(self):
-        self._events_to_listen = []
+        with self._lock:
+            self._events_to_listen = []
+            self._expected_index = ExpectedEventIndex()
 
-    def get_next_portion(self):
+    def get_next_portion(self, columns=None):
+        """
+        new rows of event_streams, only the given columns of them if passed
+        """
         logger.debug("obtaining next portion of events")
-        return self._tool.query(self._tool.event_streams)\
-            .filter(self._tool.event_streams.id > self._last_processed_id)\
-            .order_by(self._tool.event_streams.id).yield_per(100).all()
+        table = self._tool.event_streams
+        entities = [getattr(table, column) for column in columns] if columns else [table]
+        return self._tool.query(*entities)\
+            .filter(table.id > self._last_processed_id)\
+            .order_by(table.id).yield_per(100).all()
 
     def check_expected_events(self):
         return all([len(event['matched_events']) for event in self.got_events])
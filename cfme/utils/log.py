@@ -130,13 +130,17 @@ Members
 ^^^^^^^
 
 """
-import inspect
+import json
+import linecache
 import logging
 import sys
+import threading
 import warnings
 from time import time
 from traceback import extract_tb, format_tb
 
+from six.moves import queue
+
 from cfme.utils import conf, safe_string
 from cfme.utils.path import get_rel_path, log_path, project_path
 
@@ -430,39 +434,212 @@ if '_original_excepthook' not in globals():
     _original_excepthook = sys.excepthook
 
 
+class FrameInfo(object):
+    """Call site of a stack frame
+
+    Only the filename, line number and function name are taken from the frame, the line of
+    source is read on first access of :py:attr:`code_context`, so capturing a call site doesn't
+    touch the source files or keep the frame alive.
+
+    Attributes:
+        filename: Path of the source file of the frame
+        lineno: Line number the frame was executing
+        function: Name of the function of the frame
+    """
+    __slots__ = ('filename', 'lineno', 'function', '_module_globals', '_code_context')
+
+    def __init__(self, frame):
+        self.filename = frame.f_code.co_filename
+        self.lineno = frame.f_lineno
+        self.function = frame.f_code.co_name
+        # linecache needs the globals to get the source of modules loaded by import hooks
+        self._module_globals = frame.f_globals
+        self._code_context = None
+
+    @property
+    def code_context(self):
+        """List with the line of source at :py:attr:`lineno`, or ``None`` if it's unavailable"""
+        if self._code_context is None:
+            line = linecache.getline(self.filename, self.lineno, self._module_globals)
+            self._code_context = [line] if line else False
+        return self._code_context or None
+
+    def __repr__(self):
+        return '<FrameInfo {}:{} in {}>'.format(self.filename, self.lineno, self.function)
+
+
 def nth_frame_info(n):
     """
-    Inspect the stack to determine the filename and lineno of the code running at the "n"th frame
+    Determine the filename and lineno of the code running at the "n"th frame
 
     Args:
-        n: Number of the stack frame to inspect
+        n: Number of the stack frame to inspect, 0 being the call to this function
 
     Raises IndexError if the stack doesn't contain the nth frame (the caller should know this)
 
-    Returns a frameinfo namedtuple as described in :py:func:`inspect <python:inspect.getframeinfo>`
+    Returns a :py:class:`FrameInfo` with the same ``filename``, ``lineno``, ``function`` and
+    ``code_context`` attributes as the frameinfo namedtuple described in
+    :py:func:`inspect <python:inspect.getframeinfo>`
 
     """
-    # Inspect the stack with 1 line of context, looking at the "n"th frame to determine
-    # the filename and line number of that frame
-    return inspect.getframeinfo(inspect.stack(1)[n][0])
+    # Walking up the frames directly is much cheaper than inspect.stack(), which reads the source
+    # context of every frame of the stack
+    try:
+        return FrameInfo(sys._getframe(n))
+    except ValueError:
+        raise IndexError('The stack does not contain frame {}'.format(n))
+
+
+_exc_formatter = logging.Formatter()
+
+
+def _json_encodable(log_record):
+    try:
+        json.dumps(log_record)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+class _FlushRequest(object):
+    """Queued behind the records to flush, set once everything before it was shipped"""
+    def __init__(self):
+        self.done = threading.Event()
 
 
 class ArtifactorHandler(logging.Handler):
-    """Logger handler that hands messages off to the artifactor"""
+    """Logger handler that hands messages off to the artifactor
+
+    By default every record is sent to the artifactor right away, a round trip per record.
+    After :py:meth:`start_shipping`, records are put to a bounded queue instead and a background
+    thread sends them in batches, when a batch is full or ``flush_interval`` seconds after its
+    first record. :py:meth:`flush` waits until all queued records were sent; the artifactor
+    plugin flushes before firing any other hook, so the records of a test phase always reach the
+    artifactor before the hooks that end it.
+    """
 
     slaveid = artifactor = None
+    _queue = _shipper = None
+    dropped = 0
 
     def createLock(self):  # NOQA: false positive, base class override
         # opt out of locking since artifactor hook calling is threadsave
         self.lock = None
 
+    def start_shipping(self, batch_size=500, flush_interval=0.5, max_queue=10000,
+                       overflow='block'):
+        """Send the records in batches from a background thread
+
+        Args:
+            batch_size: Maximum number of records sent at once
+            flush_interval: Seconds a record waits for its batch to fill up at most
+            max_queue: Maximum number of records waiting to be sent
+            overflow: What to do with a record when the queue is full, ``'block'`` to wait for
+                a free slot or ``'drop'`` to discard the record (counted in :py:attr:`dropped`)
+        """
+        if overflow not in ('block', 'drop'):
+            raise ValueError('overflow must be block or drop, not {}'.format(overflow))
+        if self._shipper is not None:
+            return
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self._queue = queue.Queue(max_queue)
+        self._shipper = threading.Thread(target=self._ship_t, name='artifactor-log-shipper')
+        self._shipper.daemon = True
+        self._shipper.start()
+
+    def stop_shipping(self, timeout=None):
+        """Send the queued records and go back to sending every record right away"""
+        shipper, shipping_queue = self._shipper, self._queue
+        if shipper is None:
+            return
+        self.flush(timeout)
+        self._queue = self._shipper = None
+        shipping_queue.put(None)
+        shipper.join(timeout)
+
+    def flush(self, timeout=None):
+        """Wait until the queued records were sent to the artifactor"""
+        if self._shipper is None or not self._shipper.is_alive():
+            return
+        request = _FlushRequest()
+        self._queue.put(request)
+        request.done.wait(timeout)
+
+    def _ship_t(self):
+        shipping = True
+        while shipping:
+            batch = []
+            flushes = []
+            item = self._queue.get()
+            deadline = time() + self.flush_interval
+            while True:
+                if item is None:
+                    shipping = False
+                    break
+                if isinstance(item, _FlushRequest):
+                    flushes.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else \
+                        self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._send(batch)
+            for request in flushes:
+                request.done.set()
+
+    def _send(self, records):
+        # The client sends the batch as JSON and gives up on all of it silently if it can't,
+        # so the records it can't encode are left out beforehand
+        try:
+            json.dumps(records)
+        except (TypeError, ValueError):
+            encodable = [record for record in records if _json_encodable(record)]
+            sys.stderr.write('Unable to ship {} log records to the artifactor\n'.format(
+                len(records) - len(encodable)))
+            records = encodable
+        try:
+            self.artifactor.fire_hook('log_messages', log_records=records, slaveid=self.slaveid)
+        except Exception:
+            # Logging from here would queue more records to ship, report the records as lost
+            sys.stderr.write('Unable to ship {} log records to the artifactor\n'.format(
+                len(records)))
+
     def emit(self, record):
-        if self.artifactor:
+        if not self.artifactor:
+            return
+        shipping_queue = self._queue
+        if shipping_queue is None:
             self.artifactor.fire_hook(
                 'log_message',
                 log_record=record.__dict__,
                 slaveid=self.slaveid,
             )
+            return
+        log_record = dict(record.__dict__)
+        # Render now, the arguments may change before the record is sent
+        log_record['msg'] = record.getMessage()
+        log_record['args'] = None
+        if record.exc_info:
+            # Only the text of the traceback can be sent
+            if not record.exc_text:
+                record.exc_text = _exc_formatter.formatException(record.exc_info)
+            log_record['exc_text'] = record.exc_text
+            log_record['exc_info'] = None
+        if self.overflow == 'drop':
+            try:
+                shipping_queue.put_nowait(log_record)
+            except queue.Full:
+                self.dropped += 1
+        else:
+            shipping_queue.put(log_record)
 
 
 logger, cfme_file_handler = setup_logger(logging.getLogger('cfme'))
@@ -1,9 +1,82 @@
 import re
+import threading
+
 import pytest
+import six
 
 from .ssh import SSHTail
 from cfme.utils.log import logger
 
+# Patterns using these can't be wrapped into a group of a combined regex without changing meaning
+_UNCOMBINABLE = re.compile(r'\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)')
+
+
+class _PatternMatcher(object):
+    """Matches a line against the skip, failure and expected patterns of a :py:class:`LogValidator`
+
+    All patterns are joined into one compiled regex of named alternatives, ordered skip, failure,
+    expected, so the usual line that matches none of them costs a single regex call. Alternatives
+    are tried in order, so the name of the group that matched tells the first pattern that
+    matched; only the expected patterns need to be checked one by one after a hit, as one line
+    can match several of them. Patterns that can't be combined (backreferences, inline flags,
+    precompiled patterns) make the matcher check every pattern separately.
+    """
+    KINDS = ('skip', 'failure', 'matched')
+
+    def __init__(self, skip_patterns, failure_patterns, matched_patterns):
+        self.patterns = dict(zip(self.KINDS, (skip_patterns, failure_patterns, matched_patterns)))
+        self.compiled = {kind: [re.compile(pattern) for pattern in patterns]
+                         for kind, patterns in self.patterns.items()}
+        self.combined = self._combine()
+
+    def _combine(self):
+        alternatives = []
+        for kind in self.KINDS:
+            for index, pattern in enumerate(self.patterns[kind]):
+                if (not isinstance(pattern, six.string_types) or
+                        _UNCOMBINABLE.search(pattern)):
+                    return None
+                alternatives.append('(?P<{}_{}>{})'.format(kind, index, pattern))
+        if not alternatives:
+            return None
+        try:
+            return re.compile('|'.join(alternatives))
+        except re.error:
+            return None
+
+    def _first(self, kind, line, start=0):
+        for index in range(start, len(self.compiled[kind])):
+            if self.compiled[kind][index].match(line):
+                return index
+        return None
+
+    def match(self, line):
+        """Check a line
+
+        Returns:
+            A tuple of the kind of the first pattern that matched (``'skip'``, ``'failure'`` or
+            ``'matched'``, or ``None``) and the list of the patterns of that kind that matched
+        """
+        if self.combined is not None:
+            hit = self.combined.match(line)
+            if hit is None:
+                return None, []
+            kind, index = hit.lastgroup.rsplit('_', 1)
+            index = int(index)
+        else:
+            for kind in self.KINDS:
+                index = self._first(kind, line)
+                if index is not None:
+                    break
+            else:
+                return None, []
+        patterns = self.patterns[kind]
+        if kind != 'matched':
+            return kind, [patterns[index]]
+        return kind, [patterns[index]] + [
+            patterns[i] for i in range(index + 1, len(patterns))
+            if self.compiled[kind][i].match(line)]
+
 
 class LogValidator(object):
     """
@@ -22,6 +95,10 @@ class LogValidator(object):
     to be possible to skip particular ERROR log,
     but fail for wider range of other ERRORs.
 
+    The log can also be checked continuously in a background thread while the test runs, which
+    spreads the work over the test instead of reading the whole log at the end; failures found
+    by the thread are reported by :py:meth:`validate_logs`.
+
     Args:
         remote_filename: path to the remote log file
         skip_patterns: array of skip regex patterns
@@ -35,6 +112,7 @@ class LogValidator(object):
                                   failure_patterns=['.*ERROR.*'],
                                   matched_patterns=['PARTICULAR_INFO'])
           evm_tail.fix_before_start()
+          evm_tail.start_monitoring()  # optional
           evm_tail.validate_logs()
     """
 
@@ -45,34 +123,73 @@ class LogValidator(object):
 
         self._remote_file_tail = SSHTail(remote_filename, **kwargs)
         self.matches = {}
+        self.failures = []
+        self._matcher = None
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._stop_monitor = threading.Event()
+
+    @property
+    def matcher(self):
+        # Built on first use, the pattern lists may be changed after init
+        if self._matcher is None:
+            self._matcher = _PatternMatcher(
+                self.skip_patterns, self.failure_patterns, self.matched_patterns)
+        return self._matcher
 
     def fix_before_start(self):
         self._remote_file_tail.set_initial_file_end()
 
+    def start_monitoring(self, interval=10):
+        """Check new log lines every ``interval`` seconds in a background thread"""
+        if self._monitor is not None:
+            return
+        self._stop_monitor.clear()
+        self._monitor = threading.Thread(target=self._monitor_t, args=(interval,))
+        self._monitor.daemon = True
+        self._monitor.start()
+
+    def stop_monitoring(self):
+        if self._monitor is None:
+            return
+        self._stop_monitor.set()
+        self._monitor.join()
+        self._monitor = None
+
+    def _monitor_t(self, interval):
+        while not self._stop_monitor.wait(interval):
+            try:
+                self._check_new_lines(fail=False)
+            except Exception as e:
+                # Reading the log is retried on the next interval and by validate_logs
+                logger.warning('Log validator failed to read the log: %s', e)
+
     def validate_logs(self):
-        for line in self._remote_file_tail:
-            if self._check_skip_logs(line):
-                continue
-            self._check_fail_logs(line)
-            self._check_match_logs(line)
+        self.stop_monitoring()
+        if self.failures:
+            pytest.fail(self.failures[0])
+        self._check_new_lines(fail=True)
         self._verify_match_logs()
 
-    def _check_skip_logs(self, line):
-        for pattern in self.skip_patterns:
-            if re.match(pattern, line):
-                logger.info('Skip pattern {} was matched on line {},\
-                            so skipping this line'.format(pattern, line))
-                return True
-        return False
+    def _check_new_lines(self, fail):
+        with self._lock:
+            for line in self._remote_file_tail:
+                failure = self._check_line(line)
+                if failure is None:
+                    continue
+                if fail:
+                    pytest.fail(failure)
+                self.failures.append(failure)
 
-    def _check_fail_logs(self, line):
-        for pattern in self.failure_patterns:
-            if re.match(pattern, line):
-                pytest.fail('Failure pattern {} was matched on line {}'.format(pattern, line))
-
-    def _check_match_logs(self, line):
-        for pattern in self.matched_patterns:
-            if re.match(pattern, line):
+    def _check_line(self, line):
+        kind, patterns = self.matcher.match(line)
+        if kind == 'skip':
+            logger.info('Skip pattern {} was matched on line {},\
+                        so skipping this line'.format(patterns[0], line))
+        elif kind == 'failure':
+            return 'Failure pattern {} was matched on line {}'.format(patterns[0], line)
+        elif kind == 'matched':
+            for pattern in patterns:
                 logger.info('Expected pattern {} was matched on line {}'.format(pattern, line))
                 self.matches[pattern] = True
 
@@ -5,6 +5,9 @@ from cfme.fixtures.pytest_store import store
 from cfme.utils.log import logger
 from cfme.utils.ssh import SSHClient, SSHTail
 
+# Number of logs collect_log decompresses at once
+COLLECT_LOG_CONCURRENCY = 4
+
 
 def collect_log(ssh_client, log_prefix, local_file_name, strip_whitespace=False):
     """Collects all of the logs associated with a single log prefix (ex. evm or top_output) and
@@ -16,32 +19,52 @@ def collect_log(ssh_client, log_prefix, local_file_name, strip_whitespace=False)
     dest_file = '{}{}.perf.log'.format(log_dir, log_prefix)
     dest_file_gz = '{}{}.perf.log.gz'.format(log_dir, log_prefix)
 
-    ssh_client.run_command('rm -f {}'.format(dest_file_gz))
-
-    result = ssh_client.run_command('ls -1 {}-*'.format(log_file))
-    if result.success:
-        files = result.output.strip().split('\n')
-        for lfile in sorted(files):
-            ssh_client.run_command('cp {} {}-2.gz'.format(lfile, lfile))
-            ssh_client.run_command('gunzip {}-2.gz'.format(lfile))
-            if strip_whitespace:
-                ssh_client.run_command('sed -i  \'s/^ *//; s/ *$//; /^$/d; /^\s*$/d\' '
-                    '{}-2'.format(lfile))
-            ssh_client.run_command('cat {}-2 >> {}'.format(lfile, dest_file))
-            ssh_client.run_command('rm {}-2'.format(lfile))
-
-    ssh_client.run_command('cp {} {}-2'.format(log_file, log_file))
+    strip_command = 'sed -i  \'s/^ *//; s/ *$//; /^$/d; /^\s*$/d\' {}-2'
+    result = ssh_client.run_commands([
+        'rm -f {}'.format(dest_file_gz),
+        'ls -1 {}-*'.format(log_file)])[-1]
+    files = sorted(result.output.strip().split('\n')) if result.success else []
+    # a batch per log, so every round trip keeps the usual timeout
+    batches = []
+    for lfile in files:
+        batch = ['cp {} {}-2.gz'.format(lfile, lfile), 'gunzip {}-2.gz'.format(lfile)]
+        if strip_whitespace:
+            batch.append(strip_command.format(lfile))
+        batches.append(batch)
+    batch = ['cp {} {}-2'.format(log_file, log_file)]
     if strip_whitespace:
-        ssh_client.run_command('sed -i  \'s/^ *//; s/ *$//; /^$/d; /^\s*$/d\' '
-            '{}-2'.format(log_file))
-    ssh_client.run_command('cat {}-2 >> {}'.format(log_file, dest_file))
-    ssh_client.run_command('rm {}-2'.format(log_file))
-    ssh_client.run_command('gzip {}{}.perf.log'.format(log_dir, log_prefix))
+        batch.append(strip_command.format(log_file))
+    batches.append(batch)
+    # the logs are decompressed side by side, a few at a time to stay below sshd MaxSessions
+    for start in range(0, len(batches), COLLECT_LOG_CONCURRENCY):
+        ssh_client.run_command_batches(batches[start:start + COLLECT_LOG_CONCURRENCY])
+
+    # then joined in order
+    copies = ' '.join('{}-2'.format(lfile) for lfile in files + [log_file])
+    ssh_client.run_commands([
+        'cat {} >> {}'.format(copies, dest_file),
+        'rm -f {}'.format(copies),
+        'gzip {}'.format(dest_file)])
 
     ssh_client.get_file(dest_file_gz, local_file_name)
     ssh_client.run_command('rm -f {}'.format(dest_file_gz))
 
 
+def stream_log(ssh_client, log_prefix, patterns=None, since=None, until=None):
+    """Streams the lines of all of the logs associated with a single log prefix (ex. evm or
+    top_output), oldest first, filtered on the appliance.  Unlike :py:func:`collect_log` nothing
+    is copied on the appliance, and analysis can start as soon as the first lines arrive.
+
+    Returns: A :py:class:`cfme.utils.ssh.RemoteLogStream`, iterating it again yields only the
+        lines logged since.
+    """
+    log_file = '/var/www/miq/vmdb/log/{}.log'.format(log_prefix)
+    result = ssh_client.run_command('ls -1 {}-*'.format(log_file))
+    rotated = sorted(result.output.strip().split('\n')) if result.success else []
+    return ssh_client.stream_lines(
+        rotated + [log_file], patterns=patterns, since=since, until=until)
+
+
 def convert_top_mem_to_mib(top_mem):
     """Takes a top memory unit from top_output.log and converts it to MiB"""
     if top_mem[-1:] == 'm':
@@ -2,16 +2,21 @@
 """Functions for performance analysis/charting of the backend messages and top_output from an
 appliance.
 """
+import calendar
 import csv
 import subprocess
+from array import array
+from collections import Mapping
 from datetime import datetime
 from datetime import timedelta
+from multiprocessing import Pool
 from time import time
 
 import dateutil.parser as du_parser
 import os
 import pygal
 import re
+import six
 
 from cfme.utils.log import logger
 from cfme.utils.path import log_path
@@ -36,6 +41,24 @@ miqmsg_deq = re.compile(r'Dequeued\sin:\s\[([0-9\.]*)\]\sseconds')
 # Delivered in [ * ] seconds
 miqmsg_del = re.compile(r'Delivered\sin\s\[([0-9\.]*)\]\sseconds')
 
+# Combined expressions used by evm_to_messages_parallel, on bytes of whole parts of the log:
+# The timestamp and pid of a queue message line, the kind of line and the rest of it
+queue_line = re.compile(
+    br'^\[----\]\s[IWE],\s\[([0-9\-]+)T([0-9\:\.]+)\s#([0-9]+):[0-9a-z]+\]'
+    br'[^\n]*MIQ\(MiqQueue\.(put|get_via_drb|delivered)\)([^\n]*)', re.M)
+# The timestamp of the first line with a MIQ( * ) message
+first_miqmsg = re.compile(br'^\[----\]\s[IWE],\s\[([0-9\-]+)T([0-9\:\.]+)\s#[^\n]*MIQ\(', re.M)
+# The fields of each kind of queue message line, in the order they are logged
+queue_line_fields = {
+    b'put': re.compile(
+        br'Message\sid:\s\[([0-9]*)\](?:.*?Command:\s\[([a-zA-Z0-9\._\:]*)\])?'
+        br'(?:.*?Args:\s\[([A-Za-z0-9\{\}\(\)\[\]\s\\\-\:\"\'\,\=\<\>\_\/\.\@\?\%\&\#]*)\])?'),
+    b'get_via_drb': re.compile(
+        br'Message\sid:\s\[([0-9]*)\](?:.*?Dequeued\sin:\s\[([0-9\.]*)\]\sseconds)?'),
+    b'delivered': re.compile(
+        br'Message\sid:\s\[([0-9]*)\](?:.*?Delivered\sin\s\[([0-9\.]*)\]\sseconds)?'),
+}
+
 # Worker related regular expressions:
 # MIQ(PriorityWorker) ID [15], PID [6461]
 miqwkr = re.compile(r'MIQ\(([A-Za-z]*)\)\sID\s\[([0-9]*)\],\sPID\s\[([0-9]*)\]')
@@ -164,6 +187,83 @@ def evm_to_messages(evm_file, filters):
     return messages, msg_cmds, test_start, test_end, line_count
 
 
+def _text(value):
+    return value.decode('utf-8', 'replace') if six.PY3 else value
+
+
+def _read_log_range(log_file, start, end):
+    """Reads the lines starting within the byte range [start, end) of a log file"""
+    with open(log_file, 'rb') as f:
+        if start:
+            # The line running over start belongs to the previous range
+            f.seek(start - 1)
+            f.readline()
+        if f.tell() >= end:
+            return b''
+        data = f.read(end - f.tell())
+        if data and not data.endswith(b'\n'):
+            data += f.readline()
+        return data
+
+
+def _evm_range_to_events(args):
+    """Parses the queue message lines of a byte range of evm.log, runs in the worker processes
+
+    Returns:
+        A tuple of :py:class:`EvmQueueEvents`, the number of lines and the timestamp of the first
+        line with a MIQ( * ) message in the range (or ``''``)
+    """
+    evm_file, start, end = args
+    data = _read_log_range(evm_file, start, end)
+    events = EvmQueueEvents()
+    for line in queue_line.finditer(data):
+        date, clock, pid, kind, rest = line.groups()
+        fields = queue_line_fields[kind].search(rest)
+        if fields:
+            events.add(kind, fields.groups(), date, clock, pid)
+    first = first_miqmsg.search(data)
+    first_ts = '{} {}'.format(_text(first.group(1)), _text(first.group(2))) if first else ''
+    line_count = data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
+    return events, line_count, first_ts
+
+
+def evm_to_messages_parallel(evm_file, filters, processes=None, range_size=64 * 1024 * 1024):
+    """Same as :py:func:`evm_to_messages`, for large logs
+
+    The log is split in byte ranges which are parsed by a pool of processes, each queue message
+    line with a single combined expression per kind of line. The results are merged in log order
+    into an :py:class:`EvmMessageTable`, which keeps the messages in arrays and builds
+    :py:class:`MiqMsgStat` objects only when they are accessed.
+
+    Args:
+        evm_file: Path to the evm.log file
+        filters: Filters on message args appended to the command, see :py:func:`perf_process_evm`
+        processes: Number of worker processes, defaults to the number of cpus
+        range_size: Size of the byte ranges parsed at once
+    """
+    size = os.path.getsize(evm_file)
+    ranges = [(evm_file, start, min(start + range_size, size))
+              for start in range(0, size, range_size)]
+    messages = EvmMessageTable()
+    test_start = ''
+    line_count = 0
+    runningtime = time()
+    pool = Pool(processes)
+    try:
+        for events, range_lines, first_ts in pool.imap(_evm_range_to_events, ranges):
+            test_start = test_start or first_ts
+            messages.add_events(events)
+            line_count += range_lines
+            logger.info('Count %s : Parsed %s lines in %s', line_count, range_lines,
+                time() - runningtime)
+            runningtime = time()
+    finally:
+        pool.close()
+        pool.join()
+    messages.apply_filters(filters)
+    return messages, messages.msg_cmds(), test_start, messages.test_end, line_count
+
+
 def evm_to_workers(evm_file):
     # Use grep to reduce # of lines to sort through
     p = subprocess.Popen(['grep', 'Interrupt\\|MIQ([A-Za-z]*) ID\\|"evm_worker_uptime_exceeded\\|'
@@ -799,7 +899,7 @@ def top_to_workers(workers, top_file):
     return top_workers, len(top_lines)
 
 
-def perf_process_evm(evm_file, top_file):
+def perf_process_evm(evm_file, top_file, processes=None):
     msg_filters = {
         '-hourly': re.compile(r'\"[0-9\-]*T[0-9\:]*Z\",\s\"hourly\"'),
         '-daily': re.compile(r'\"[0-9\-]*T[0-9\:]*Z\",\s\"daily\"'),
@@ -813,7 +913,8 @@ def perf_process_evm(evm_file, top_file):
     initialtime = starttime
 
     logger.info('----------- Parsing evm log file for messages -----------')
-    messages, msg_cmds, test_start, test_end, msg_lc = evm_to_messages(evm_file, msg_filters)
+    messages, msg_cmds, test_start, test_end, msg_lc = evm_to_messages_parallel(
+        evm_file, msg_filters, processes)
     timediff = time() - starttime
     logger.info('----------- Completed Parsing evm log file -----------')
     logger.info('Parsed %s lines of evm log file for messages in %s', msg_lc, timediff)
@@ -1115,3 +1216,214 @@ class MiqWorker(object):
     def __str__(self):
         return self.worker_id + ' : ' + self.worker_type + ' : ' + self.pid + ' : ' + \
             str(self.start_ts) + ' : ' + str(self.end_ts) + ' : ' + self.terminated
+
+
+# array('l') is only 32 bits wide on Windows and 32-bit builds, message ids need 64 bits ('q' is
+# not available before Python 3.3). Timestamps are kept in doubles, which hold microseconds since
+# the epoch exactly.
+_ID_TYPECODE = 'q' if six.PY3 else 'l'
+
+
+def _stamp_to_str(stamp):
+    # Microseconds since the epoch to the format of get_msg_timestamp_pid
+    return (datetime(1970, 1, 1) + timedelta(microseconds=stamp)).strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+class EvmQueueEvents(object):
+    """Queue message lines (put, get_via_drb, delivered) of a part of evm.log, in columns
+
+    Timestamps are kept as microseconds since the epoch, and commands and args are stored once in
+    ``strings`` and referenced by their index (-1 if the line had none).
+    """
+    KINDS = {b'put': 0, b'get_via_drb': 1, b'delivered': 2}
+
+    def __init__(self):
+        self.kinds = array('b')
+        self.ids = array(_ID_TYPECODE)
+        self.stamps = array('d')
+        self.pids = array('l')
+        # Dequeue time of get_via_drb and delivery time of delivered lines
+        self.times = array('d')
+        self.cmds = array('l')
+        self.args = array('l')
+        self.strings = []
+        self.missing_ids = 0
+        self._codes = {}
+        self._second = (None, 0)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_codes'] = {}
+        return state
+
+    def _code(self, string):
+        if string is None:
+            return -1
+        if string not in self._codes:
+            self._codes[string] = len(self.strings)
+            self.strings.append(_text(string))
+        return self._codes[string]
+
+    def _stamp(self, date, clock):
+        second = date + clock[:8]
+        if second != self._second[0]:
+            self._second = (second, calendar.timegm((
+                int(date[:4]), int(date[5:7]), int(date[8:10]),
+                int(clock[:2]), int(clock[3:5]), int(clock[6:8]))))
+        return self._second[1] * 1000000 + int((clock[9:] + b'000000')[:6])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, kind, fields, date, clock, pid):
+        """Adds a line, ``fields`` are the groups of its :py:data:`queue_line_fields` match"""
+        if not fields[0]:
+            self.missing_ids += 1
+            return
+        self.kinds.append(self.KINDS[kind])
+        self.ids.append(int(fields[0]))
+        self.stamps.append(self._stamp(date, clock))
+        self.pids.append(int(pid))
+        if kind == b'put':
+            self.times.append(0.0)
+            self.cmds.append(self._code(fields[1]))
+            self.args.append(self._code(fields[2]))
+        else:
+            self.times.append(float(fields[1] or 0))
+            self.cmds.append(-1)
+            self.args.append(-1)
+
+
+class EvmMessageTable(Mapping):
+    """Queue messages of evm.log in columns
+
+    A read-only mapping of message id to :py:class:`MiqMsgStat`, like the messages returned by
+    :py:func:`evm_to_messages`; the objects are built when accessed.
+    """
+    def __init__(self):
+        self.rows = {}
+        self.ids = array(_ID_TYPECODE)
+        self.pid_put = array('l')
+        self.pid_get = array('l')
+        self.puttime = array('d')
+        self.gettime = array('d')
+        self.deq_time = array('d')
+        self.del_time = array('d')
+        self.total_time = array('d')
+        self.cmds = array('l')
+        self.args = array('l')
+        self.strings = []
+        self._codes = {}
+        self._test_end = None
+        # Callers access the same message several times in a row
+        self._last = (None, None)
+
+    def _code(self, string):
+        if string not in self._codes:
+            self._codes[string] = len(self.strings)
+            self.strings.append(string)
+        return self._codes[string]
+
+    def _string(self, code):
+        return self.strings[code] if code >= 0 else ''
+
+    @property
+    def test_end(self):
+        return _stamp_to_str(self._test_end) if self._test_end is not None else ''
+
+    def add_events(self, events):
+        """Merges the :py:class:`EvmQueueEvents` of the next part of the log"""
+        self._last = (None, None)
+        if events.missing_ids:
+            logger.error('Could not obtain message id of %s lines', events.missing_ids)
+        codes = [self._code(string) for string in events.strings]
+        for i in range(len(events)):
+            kind, msg_id, stamp = events.kinds[i], events.ids[i], events.stamps[i]
+            row = self.rows.get(msg_id)
+            if kind == 0:
+                if row is None:
+                    row = self.rows[msg_id] = len(self.ids)
+                    self.ids.append(msg_id)
+                    for column in (self.pid_put, self.pid_get, self.puttime, self.gettime,
+                                   self.cmds, self.args):
+                        column.append(-1)
+                    for column in (self.deq_time, self.del_time, self.total_time):
+                        column.append(0.0)
+                else:
+                    self.pid_get[row] = self.gettime[row] = -1
+                    self.deq_time[row] = self.del_time[row] = self.total_time[row] = 0.0
+                self.pid_put[row] = events.pids[i]
+                self.puttime[row] = stamp
+                self.cmds[row] = codes[events.cmds[i]] if events.cmds[i] >= 0 else -1
+                self.args[row] = codes[events.args[i]] if events.args[i] >= 0 else -1
+                self._test_end = stamp
+            elif row is None:
+                logger.error('Message ID not in dictionary: %s', msg_id)
+                if kind == 2:
+                    self._test_end = stamp
+            elif kind == 1:
+                self.pid_get[row] = events.pids[i]
+                self.gettime[row] = stamp
+                self.deq_time[row] = events.times[i]
+                self._test_end = stamp
+            else:
+                self.del_time[row] = events.times[i]
+                self.total_time[row] = self.deq_time[row] + events.times[i]
+                self._test_end = stamp
+
+    def apply_filters(self, filters):
+        """Appends the name of the first filter matching the args of a message to its command"""
+        self._last = (None, None)
+        suffixes = {}
+        for row in range(len(self.ids)):
+            args = self.args[row]
+            if args not in suffixes:
+                suffixes[args] = None
+                for p_filter in filters:
+                    if filters[p_filter].search(self._string(args).strip()):
+                        suffixes[args] = p_filter
+                        break
+            if suffixes[args]:
+                self.cmds[row] = self._code(self._string(self.cmds[row]) + suffixes[args])
+
+    def msg_cmds(self):
+        """Total, queue and execute times of the messages by command, see evm_to_messages"""
+        msg_cmds = {}
+        for msg_id in sorted(self):
+            row = self.rows[int(msg_id)]
+            cmd_times = msg_cmds.setdefault(
+                self._string(self.cmds[row]), {'total': [], 'queue': [], 'execute': []})
+            if self.total_time[row] != 0:
+                cmd_times['total'].append(round(self.total_time[row], 2))
+                cmd_times['queue'].append(round(self.deq_time[row], 2))
+                cmd_times['execute'].append(round(self.del_time[row], 2))
+        return msg_cmds
+
+    def __getitem__(self, msg_id):
+        if self._last[0] == msg_id:
+            return self._last[1]
+        try:
+            row = self.rows[int(msg_id)]
+        except ValueError:
+            raise KeyError(msg_id)
+        msg = MiqMsgStat()
+        msg.msg_id = '\'{}\''.format(self.ids[row])
+        msg.msg_cmd = self._string(self.cmds[row])
+        msg.msg_args = self._string(self.args[row])
+        msg.pid_put = str(self.pid_put[row])
+        msg.puttime = _stamp_to_str(self.puttime[row])
+        if self.gettime[row] >= 0:
+            msg.pid_get = str(self.pid_get[row])
+            msg.gettime = _stamp_to_str(self.gettime[row])
+        msg.deq_time = self.deq_time[row]
+        msg.del_time = self.del_time[row]
+        msg.total_time = self.total_time[row]
+        self._last = (msg_id, msg)
+        return msg
+
+    def __iter__(self):
+        for msg_id in self.ids:
+            yield str(msg_id)
+
+    def __len__(self):
+        return len(self.ids)
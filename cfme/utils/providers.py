@@ -10,13 +10,14 @@ The main clue to know what is limited by the filters and what isn't is the 'filt
 """
 import operator
 from collections import Mapping, OrderedDict
-from copy import copy
+from copy import copy, deepcopy
 
 import six
 
 from cfme.common.provider import all_types
 from cfme.exceptions import UnknownProviderType
 from cfme.utils import conf
+from cfme.utils.appliance import get_or_create_current_appliance
 from cfme.utils.log import logger
 
 providers_data = conf.cfme_data.get("management_systems", {})
@@ -27,6 +28,9 @@ global_filters = {}
 # so that we don't re-generate mgmt classes for the same exact provider
 PROVIDER_MGMT_CACHE = {}
 
+# Provider keys by their names in cfme_data, rebuilt when a name is not found
+_provider_keys_by_name = {}
+
 
 def load_setuptools_entrypoints():
     """ Load modules from querying the specified setuptools entrypoint name."""
@@ -43,6 +47,56 @@ def load_setuptools_entrypoints():
                 "Plugin {} could not be loaded: {}!".format(ep.name, e))
 
 
+def _split_flags(flags):
+    if isinstance(flags, six.string_types):
+        flags = flags.split(',')
+    return frozenset(flag.strip() for flag in flags)
+
+
+def _freeze(value):
+    """Hashable form of a filter setting made of lists, tuples and sets"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+class ProviderInfo(object):
+    """Values of the yaml data of a provider that the filters check, computed once
+
+    Args:
+        data: The yaml data of the provider
+    """
+    def __init__(self, data):
+        self.data = data
+        self.tags = frozenset(data.get('tags', []))
+        self.excluded_flags = _split_flags(data.get('excluded_test_flags', ''))
+        self.version_restrictions = []
+        # TODO
+        # get rid of this since_version hotfix by translating since_version
+        # to restricted_version; in addition, restricted_version should turn into
+        # "version_restrictions" and it should be a sequence of restrictions with operators
+        # so that we can create ranges like ">= 5.6" and "<= 5.8"
+        restrictions = []
+        since_version = data.get('since_version')
+        if since_version:
+            restrictions.append('>= {}'.format(since_version))
+        restricted_version = data.get('restricted_version')
+        if restricted_version:
+            restrictions.append(restricted_version)
+        for restriction in restrictions:
+            for op, comparator in ProviderFilter._version_operator_map.items():
+                # split string by op; if the split works, version won't be empty
+                head, op, ver = restriction.partition(op)
+                if not ver:  # This means that the operator was not found
+                    continue
+                self.version_restrictions.append((comparator, ver))
+                break
+            else:
+                self.version_restrictions.append((None, restriction))
+
+
 class ProviderFilter(object):
     """ Filter used to obtain only providers matching given requirements
 
@@ -119,10 +173,9 @@ class ProviderFilter(object):
 
     def _filter_required_tags(self, provider):
         """ Filters by required yaml tags """
-        prov_tags = provider.data.get('tags', [])
         if self.required_tags is None:
             return None
-        if set(self.required_tags) & set(prov_tags):
+        if set(self.required_tags) & provider_registry.info(provider).tags:
             return True
         return False
 
@@ -131,61 +184,51 @@ class ProviderFilter(object):
         if self.required_flags is None:
             return None
         if self.required_flags:
-            test_flags = [flag.strip() for flag in self.required_flags]
-
-            defined_flags = conf.cfme_data.get('test_flags', '')
-            if isinstance(defined_flags, six.string_types):
-                defined_flags = defined_flags.split(',')
-            defined_flags = [flag.strip() for flag in defined_flags]
-
-            excluded_flags = provider.data.get('excluded_test_flags', '')
-            if isinstance(excluded_flags, six.string_types):
-                excluded_flags = excluded_flags.split(',')
-            excluded_flags = [flag.strip() for flag in excluded_flags]
-
-            allowed_flags = set(defined_flags) - set(excluded_flags)
+            test_flags = set(flag.strip() for flag in self.required_flags)
+            allowed_flags = (provider_registry.defined_flags() -
+                             provider_registry.info(provider).excluded_flags)
 
-            if set(test_flags) - allowed_flags:
+            if test_flags - allowed_flags:
                 logger.info("Filtering Provider %s out because it does not have the right flags, "
                             "%s does not contain %s",
                             provider.name, list(allowed_flags),
-                            list(set(test_flags) - allowed_flags))
+                            list(test_flags - allowed_flags))
                 return False
         return True
 
     def _filter_restricted_version(self, provider):
         """ Filters by yaml version restriction; not applied if SSH is not available """
         if self.restrict_version:
-            # TODO
-            # get rid of this since_version hotfix by translating since_version
-            # to restricted_version; in addition, restricted_version should turn into
-            # "version_restrictions" and it should be a sequence of restrictions with operators
-            # so that we can create ranges like ">= 5.6" and "<= 5.8"
-            version_restrictions = []
-            since_version = provider.data.get('since_version')
-            if since_version:
-                version_restrictions.append('>= {}'.format(since_version))
-            restricted_version = provider.data.get('restricted_version')
-            if restricted_version:
-                version_restrictions.append(restricted_version)
-            for restriction in version_restrictions:
-                for op, comparator in ProviderFilter._version_operator_map.items():
-                    # split string by op; if the split works, version won't be empty
-                    head, op, ver = restriction.partition(op)
-                    if not ver:  # This means that the operator was not found
-                        continue
-                    try:
-                        curr_ver = provider.appliance.version
-                    except:
-                        return True
-                    ver = type(curr_ver)(ver)
-                    if not comparator(curr_ver, ver):
-                        return False
-                    break
-                else:
-                    raise Exception('Operator not found in {}'.format(restriction))
+            for comparator, ver in provider_registry.info(provider).version_restrictions:
+                if comparator is None:
+                    raise Exception('Operator not found in {}'.format(ver))
+                try:
+                    curr_ver = provider.appliance.version
+                except:
+                    return True
+                ver = type(curr_ver)(ver)
+                if not comparator(curr_ver, ver):
+                    return False
         return None
 
+    @property
+    def cache_key(self):
+        """ Hashable key of the settings of this filter, ``None`` if its results can't be cached
+
+        Results of filters restricting the appliance version are not cached, the version of
+        the appliance can change during a run.
+        """
+        if self.restrict_version:
+            return None
+        key = (_freeze(self.keys), _freeze(self.classes), _freeze(self.required_fields),
+               _freeze(self.required_tags), _freeze(self.required_flags), self.inverted,
+               self.conjunctive)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
     def __call__(self, provider):
         """ Applies this filter on a given provider
 
@@ -212,17 +255,20 @@ class ProviderFilter(object):
             `True` if provider passed all checks and was not filtered out, `False` otherwise.
             The result is opposite if the 'inverted' attribute is set to `True`.
         """
-        keys_l = self._filter_keys(provider)
-        classes_l = self._filter_classes(provider)
-        fields_l = self._filter_required_fields(provider)
-        tags_l = self._filter_required_tags(provider)
-        flags_l = self._filter_required_flags(provider)
-        version_l = self._filter_restricted_version(provider)
-        results = [keys_l, classes_l, fields_l, tags_l, flags_l, version_l]
-        relevant_results = [res for res in results if res in [True, False]]
-        compiling_fn = all if self.conjunctive else any
+        # Sub-filters are evaluated in order until the outcome is known; the version check,
+        # which may need to reach the appliance, comes last
+        for sub_filter in (self._filter_keys, self._filter_classes,
+                           self._filter_required_fields, self._filter_required_tags,
+                           self._filter_required_flags, self._filter_restricted_version):
+            result = sub_filter(provider)
+            if result is None:
+                continue
+            if self.conjunctive and not result:
+                return self.inverted
+            if not self.conjunctive and result:
+                return not self.inverted
         # If all / any filters return true, the provider was not blocked (unless inverted)
-        if compiling_fn(relevant_results):
+        if self.conjunctive:
             return not self.inverted
         return self.inverted
 
@@ -230,6 +276,103 @@ class ProviderFilter(object):
         return copy(self)
 
 
+class ProviderRegistry(object):
+    """ Provider CRUD objects, their yaml derived values and filter results, built once
+
+    Test generation lists the providers for every parametrized test, so building the CRUD
+    objects and evaluating the filters on every call adds up over the collection of the suite.
+    The CRUD objects, the filter results and the keys of the providers passing each set of filters
+    are kept for the current appliance and dropped when another appliance becomes the current
+    one. Cached entries are rebuilt when the yaml data of their provider is replaced.
+    """
+    def __init__(self):
+        self._appliance = None
+        self._cruds = {}
+        self._results = {}
+        self._passing = {}
+        self._info = {}
+        self._defined_flags = (None, frozenset())
+
+    def _use_appliance(self, appliance):
+        if appliance is not self._appliance:
+            self._appliance = appliance
+            self._cruds.clear()
+            self._results.clear()
+            self._passing.clear()
+
+    def crud(self, provider_key):
+        """ The CRUD object of a provider key for the current appliance
+
+        The object is shared, tests get copies of it, see :py:func:`list_providers`.
+        """
+        self._use_appliance(get_or_create_current_appliance())
+        prov_config = providers_data[provider_key]
+        entry = self._cruds.get(provider_key)
+        if entry is None or entry[0] is not prov_config:
+            entry = self._cruds[provider_key] = (prov_config, get_crud(provider_key))
+        return entry[1]
+
+    def info(self, provider):
+        """ The :py:class:`ProviderInfo` of a provider """
+        data = provider.data
+        if provider.key is None or providers_data.get(provider.key) is not data:
+            return ProviderInfo(data)
+        info = self._info.get(provider.key)
+        if info is None or info.data is not data:
+            info = self._info[provider.key] = ProviderInfo(data)
+        return info
+
+    def defined_flags(self):
+        """ The test flags set in cfme_data """
+        flags = conf.cfme_data.get('test_flags', '')
+        if flags != self._defined_flags[0]:
+            self._defined_flags = (flags, _split_flags(flags))
+        return self._defined_flags[1]
+
+    def passes(self, prov_filter, provider):
+        """ Apply a filter on a provider, reusing the result of a filter with the same settings """
+        filter_key = prov_filter.cache_key
+        if filter_key is None or provider.key is None:
+            return prov_filter(provider)
+        result_key = (filter_key, provider.key, id(provider.data))
+        try:
+            return self._results[result_key]
+        except KeyError:
+            result = self._results[result_key] = prov_filter(provider)
+            return result
+
+    def passing(self, filters):
+        """ The shared CRUD objects of the providers passing all the filters
+
+        The keys of the providers passing the filters whose results can be cached are kept for
+        each set of such filters, the other filters are applied to those providers every time.
+        """
+        self._use_appliance(get_or_create_current_appliance())
+        cached = [prov_filter for prov_filter in filters if prov_filter.cache_key is not None]
+        uncached = [prov_filter for prov_filter in filters if prov_filter.cache_key is None]
+        filters_key = frozenset(prov_filter.cache_key for prov_filter in cached)
+        data_key = [(key, id(data)) for key, data in providers_data.items()]
+        entry = self._passing.get(filters_key)
+        if entry is None or entry[0] != data_key:
+            providers = [self.crud(prov_key) for prov_key in providers_data]
+            for prov_filter in cached:
+                providers = [prov for prov in providers if self.passes(prov_filter, prov)]
+            entry = self._passing[filters_key] = (data_key, [prov.key for prov in providers])
+        providers = [self.crud(prov_key) for prov_key in entry[1]]
+        for prov_filter in uncached:
+            providers = [prov for prov in providers if prov_filter(prov)]
+        return providers
+
+    def clear(self):
+        self._appliance = None
+        self._cruds.clear()
+        self._results.clear()
+        self._passing.clear()
+        self._info.clear()
+
+
+provider_registry = ProviderRegistry()
+
 # Only providers without the 'disabled' tag
 global_filters['enabled_only'] = ProviderFilter(required_tags=['disabled'], inverted=True)
 # Only providers relevant for current appliance version (requires SSH access when used)
@@ -254,10 +397,17 @@ def list_providers(filters=None, use_global_filters=True):
     filters = filters or []
     if use_global_filters:
         filters = filters + list(global_filters.values())
-    providers = [get_crud(prov_key) for prov_key in providers_data]
-    for prov_filter in filters:
-        providers = list(filter(prov_filter, providers))
-    return providers
+    return [_isolated_copy(prov) for prov in provider_registry.passing(filters)]
+
+
+def _isolated_copy(provider):
+    """ Copy of a shared provider CRUD object, with endpoints and credentials of its own
+
+    Tests change the endpoints and credentials of the providers they get.
+    """
+    isolated = copy(provider)
+    isolated.endpoints = deepcopy(provider.endpoints)
+    return isolated
 
 
 def list_providers_by_class(prov_class, use_global_filters=True):
@@ -334,10 +484,15 @@ def get_crud_by_name(provider_name):
 
     Returns: A Provider object that has methods that operate on CFME
     """
-    for provider_key, provider_data in providers_data.items():
-        if provider_data.get("name") == provider_name:
-            return get_crud(provider_key)
-    raise NameError("Could not find provider {}".format(provider_name))
+    provider_key = _provider_keys_by_name.get(provider_name)
+    if providers_data.get(provider_key, {}).get('name') != provider_name:
+        _provider_keys_by_name.clear()
+        for key, provider_data in providers_data.items():
+            _provider_keys_by_name.setdefault(provider_data.get('name'), key)
+        provider_key = _provider_keys_by_name.get(provider_name)
+        if provider_key is None:
+            raise NameError("Could not find provider {}".format(provider_name))
+    return get_crud(provider_key)
 
 
 def get_mgmt(provider_key, providers=None, credentials=None):
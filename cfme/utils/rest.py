@@ -1,10 +1,18 @@
 # -*- coding: utf-8 -*-
 """Helper functions for tests using REST API."""
+import operator
+import time
 import pytest
 from collections import namedtuple
+from functools import reduce
+
+from manageiq_client.filters import Q
 
 from cfme.exceptions import OptionNotAvailable
-from cfme.utils.wait import wait_for
+from cfme.utils.wait import TimedOutError, wait_for
+
+# Number of values OR'd into one ``filter[]`` query, keeps the query string of a request short
+FILTER_CHUNK_SIZE = 50
 
 
 def assert_response(
@@ -74,6 +82,9 @@ def assert_response(
         else:
             raise AssertionError('No JSON content returned')
 
+    # tasks started by the request, waited for together once all results are checked
+    task_ids = []
+
     def _check_result(result):
         # check that result contains data to catch bugs like BZ 1414845
         assert result, 'The result should not be empty'
@@ -88,17 +99,7 @@ def assert_response(
         # if the request succeeded and there is a 'task_id' present in the response,
         # check the corresponding resource in /api/task/:task_id
         if task_wait and 'task_id' in result and result.get('success') and last_response:
-            task = rest_api.get_entity('tasks', result['task_id'])
-            task.wait_exists(num_sec=5)
-            wait_for(
-                lambda: task.state.lower() == 'finished',
-                fail_func=task.reload,
-                num_sec=task_wait,
-                message='task state finished',
-            )
-            task_message = getattr(task, 'message', '')
-            assert task.status.lower() == 'ok', (
-                'Task failed with status "{}", message "{}"'.format(task.status, task_message))
+            task_ids.append(result['task_id'])
 
     if 'results' in content:
         results = content['results']
@@ -112,10 +113,43 @@ def assert_response(
     else:
         _check_result(content)
 
+    if task_ids:
+        wait_for_tasks(rest_api, task_ids, num_sec=task_wait)
+
     # preserve the original response
     rest_api.response = last_response
 
 
+def wait_for_tasks(rest_api, task_ids, num_sec=600):
+    """Waits for tasks to finish and asserts that all of them finished successfully.
+
+    The tasks run on the appliance at the same time, so they are polled together and only the
+    ones that haven't finished yet are reloaded on every poll.
+
+    Args:
+        rest_api: rest_api instance
+        task_ids: ids of the tasks in /api/tasks
+        num_sec: timeout in seconds
+    """
+    tasks = [rest_api.get_entity('tasks', task_id) for task_id in task_ids]
+    for task in tasks:
+        task.wait_exists(num_sec=5)
+    unfinished = list(tasks)
+
+    def _all_finished():
+        for task in list(unfinished):
+            task.reload()
+            if task.state.lower() == 'finished':
+                unfinished.remove(task)
+        return not unfinished
+
+    wait_for(_all_finished, num_sec=num_sec, message='task state finished')
+    for task in tasks:
+        task_message = getattr(task, 'message', '')
+        assert task.status.lower() == 'ok', (
+            'Task failed with status "{}", message "{}"'.format(task.status, task_message))
+
+
 def get_vms_in_service(service):
     """Gets list of vm entities associated with the service."""
     rest_api = service.collection._api
@@ -136,23 +170,103 @@ def create_resource(rest_api, col_name, col_data, col_action='create', substr_se
 
     entities = action(*col_data)
     action_response = rest_api.response
-    search_str = '%{}%' if substr_search else '{}'
+    searched = []
     for entity in col_data:
         if entity.get('name'):
-            wait_for(lambda: collection.find_by(
-                name=search_str.format(entity.get('name'))) or False, num_sec=180, delay=10)
+            searched.append(('name', entity['name']))
         elif entity.get('description'):
-            wait_for(lambda: collection.find_by(
-                description=search_str.format(entity.get('description'))) or False,
-                num_sec=180, delay=10)
+            searched.append(('description', entity['description']))
         else:
             raise NotImplementedError
+    wait_for_resources(collection, searched, substr_search=substr_search, num_sec=180)
 
     # make sure action response is preserved
     rest_api.response = action_response
     return entities
 
 
+def wait_for_resources(collection, searched, substr_search=False, num_sec=180, max_delay=10):
+    """Waits until the collection has resources with all the searched attribute values.
+
+    All values still missing are looked up together, with one ``filter[]`` query per attribute
+    (and per :py:data:`FILTER_CHUNK_SIZE` values), and polling starts with a short delay that
+    doubles every time up to ``max_delay``, so the wait ends soon after the last resource
+    appears. The last poll is done when ``num_sec`` runs out.
+
+    Args:
+        collection: collection to search in
+        searched: list of ``(attribute, value)`` tuples, e.g. ``[('name', 'foo')]``
+        substr_search: match resources containing the value instead of equal to it
+        num_sec: timeout in seconds
+        max_delay: longest delay between two polls in seconds
+    """
+    rest_api = collection._api
+    search_str = '%{}%' if substr_search else '{}'
+    pending = set(searched)
+
+    def _matches(value, found):
+        return found is not None and (value in found if substr_search else value == found)
+
+    def _find_pending():
+        for attribute in sorted({attribute for attribute, _ in pending}):
+            values = sorted(value for attr_name, value in pending if attr_name == attribute)
+            for start in range(0, len(values), FILTER_CHUNK_SIZE):
+                chunk = values[start:start + FILTER_CHUNK_SIZE]
+                query = reduce(
+                    operator.or_, [Q(attribute, '=', search_str.format(value)) for value in chunk])
+                response = rest_api.get(
+                    collection._href, expand='resources', attributes=attribute,
+                    **{'filter[]': query.as_filters})
+                found = [resource.get(attribute) for resource in response['resources']]
+                pending.difference_update(
+                    (attribute, value) for value in chunk
+                    if any(_matches(value, found_value) for found_value in found))
+        return not pending
+
+    start = time.time()
+    delay = 0.5
+    while not _find_pending():
+        remaining = num_sec - (time.time() - start)
+        if remaining <= 0:
+            raise TimedOutError('Could not find {} of {} resources in {} within {} seconds'.format(
+                len(pending), len(searched), collection.name, num_sec))
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+def existing_ids(collection, ids):
+    """Returns the subset of ``ids`` of resources that still exist in the collection.
+
+    The ids are looked up with ``filter[]`` queries of up to :py:data:`FILTER_CHUNK_SIZE` ids,
+    instead of loading the whole collection.
+    """
+    ids = [str(resource_id) for resource_id in ids]
+    found = set()
+    for start in range(0, len(ids), FILTER_CHUNK_SIZE):
+        chunk = ids[start:start + FILTER_CHUNK_SIZE]
+        # Built by hand, large ids don't pass as int through the client's filter escaping on py2
+        filters = ['id = {}'.format(chunk[0])] + ['or id = {}'.format(i) for i in chunk[1:]]
+        response = collection._api.get(
+            collection._href, expand='resources', attributes='id', **{'filter[]': filters})
+        found.update(str(resource['id']) for resource in response['resources'])
+    return found.intersection(ids)
+
+
+def wait_for_resources_deleted(resources, num_sec=10, delay=2):
+    """Waits until none of the resources exist, checking them all with one query per poll."""
+    if not resources:
+        return
+    collection = resources[0].collection
+    pending = [resource.id for resource in resources]
+
+    def _all_deleted():
+        pending[:] = existing_ids(collection, pending)
+        return not pending
+
+    wait_for(_all_deleted, num_sec=num_sec, delay=delay,
+             message='{} resources to be deleted from {}'.format(len(resources), collection.name))
+
+
 def delete_resources_from_collection(
         resources, collection=None, not_found=None, num_sec=10, delay=2, check_response=True):
     """Checks that delete from collection works as expected."""
@@ -165,8 +279,7 @@ def delete_resources_from_collection(
     collection.action.delete(*resources)
     _assert_response()
 
-    for resource in resources:
-        resource.wait_not_exists(num_sec=num_sec, delay=delay)
+    wait_for_resources_deleted(resources, num_sec=num_sec, delay=delay)
 
     if not_found:
         with pytest.raises(Exception, match='ActiveRecord::RecordNotFound'):
@@ -191,12 +304,11 @@ def delete_resources_from_detail(
         getattr(resource.action.delete, method)()
         _assert_response()
 
-    # Wait for resource non-existence in separate loop so the delete actions are
+    # Wait for resource non-existence after all the delete actions, so they are
     # not delayed by waiting for the previously deleted resource to disappear.
-    # This way the combined wait time is likely to be much shorter.
-    for resource in resources:
-        resource.wait_not_exists(num_sec=num_sec, delay=delay)
+    wait_for_resources_deleted(resources, num_sec=num_sec, delay=delay)
 
+    for resource in resources:
         with pytest.raises(Exception, match='ActiveRecord::RecordNotFound'):
             getattr(resource.action.delete, method)()
         _assert_response(http_status=404)
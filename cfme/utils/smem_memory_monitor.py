@@ -2,6 +2,8 @@
 import json
 import time
 import traceback
+import uuid
+from array import array
 from collections import OrderedDict
 from datetime import datetime
 from threading import Thread
@@ -13,7 +15,8 @@ from yaycl import AttrDict
 
 from cfme.utils.conf import cfme_performance
 from cfme.utils.log import logger
-from cfme.utils.path import results_path
+from cfme.utils.path import results_path, scripts_data_path
+from cfme.utils.ssh import RemoteLogStream
 from cfme.utils.version import current_version
 from cfme.utils.version import get_version
 
@@ -134,12 +137,211 @@ test_ts = time.strftime('%Y%m%d%H%M%S')
 # 10s sample interval (occasionally sampling can take almost 4s on an appliance doing a lot of work)
 SAMPLE_INTERVAL = 10
 
+MEASUREMENTS = ('rss', 'pss', 'uss', 'vss', 'swap')
+
+
+class ProcessSeries(object):
+    """Memory samples of one process, in one array per measurement
+
+    Samples are stored as the index of their time in the list of sample times shared by all
+    processes, so a 24 hour run takes a few dozen bytes per sample instead of a dict per sample.
+    """
+    def __init__(self, times):
+        self._times = times
+        self.samples = array('l')
+        self.measurements = OrderedDict((m, array('d')) for m in MEASUREMENTS)
+
+    def add(self, sample, memory):
+        self.samples.append(sample)
+        for measurement, values in self.measurements.items():
+            values.append(memory[measurement])
+
+    def __getitem__(self, measurement):
+        return self.measurements[measurement]
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def dates(self):
+        return [self._times[sample] for sample in self.samples]
+
+    @property
+    def start(self):
+        return self._times[self.samples[0]]
+
+    @property
+    def end(self):
+        return self._times[self.samples[-1]]
+
+    def rows(self):
+        """Tuples of the date and the measurements of each sample"""
+        return zip(self.dates, *self.measurements.values())
+
+
+class ProcessResults(OrderedDict):
+    """Memory samples of the monitored processes, ``process_results[name][pid]`` is the
+    :py:class:`ProcessSeries` of a process
+    """
+    def __init__(self):
+        super(ProcessResults, self).__init__()
+        self.times = []
+
+    def add(self, name, pid, plottime, memory):
+        if not self.times or self.times[-1] != plottime:
+            self.times.append(plottime)
+        pids = self.setdefault(name, OrderedDict())
+        if pid not in pids:
+            pids[pid] = ProcessSeries(self.times)
+        pids[pid].add(len(self.times) - 1, memory)
+
+
+class ApplianceSampler(object):
+    """Samples memory on the appliance itself and fetches the samples incrementally
+
+    ``scripts/data/smem_sampler.py`` is deployed to the appliance, where it records a sample
+    every ``interval`` seconds to ``remote_file``. :py:meth:`samples` streams back (compressed)
+    only the samples recorded since its previous call, so the sampling cadence is not paced by
+    ssh round trips. Samplers using the same ``remote_file`` share the script running on the
+    appliance. Each of them registers as a user of the script, which is stopped by the last user
+    to stop. A sampler joining a running script skips the samples until the next one with the
+    names of all processes and the workers, which the script records every ``full_interval``
+    seconds.
+
+    Args:
+        ssh_client: :py:class:`cfme.utils.ssh.SSHClient` of the appliance
+        miq_server_id: Id of the miq server to sample the workers of
+        interval: Seconds between samples
+        remote_file: File the samples are written to on the appliance
+        full_interval: Seconds between the samples with the names of all processes
+    """
+    REMOTE_SCRIPT = '/var/tmp/smem_sampler.py'
+
+    def __init__(self, ssh_client, miq_server_id=None, interval=SAMPLE_INTERVAL,
+            remote_file='/var/tmp/smem_samples.jsonl', full_interval=60):
+        self.ssh_client = ssh_client
+        self.miq_server_id = miq_server_id
+        self.interval = interval
+        self.full_interval = full_interval
+        self.remote_file = remote_file
+        self.pid_file = '{}.pid'.format(remote_file)
+        # One file per sampler using the script, the last one to leave stops it
+        self.users_dir = '{}.users'.format(remote_file)
+        self.user_file = '{}/{}'.format(self.users_dir, uuid.uuid4().hex)
+        self.workers = {}
+        self._names = {}
+        self._partial = ''
+        self._synced = False
+        self._registered = False
+        self._stream = RemoteLogStream(ssh_client, [remote_file])
+
+    @property
+    def running(self):
+        return self.ssh_client.run_command(
+            'kill -0 "$(cat {} 2>/dev/null)" 2>/dev/null'.format(self.pid_file)).success
+
+    def start(self):
+        # Registered before checking, so a user stopping meanwhile doesn't stop the script
+        joined = self.ssh_client.run_command(
+            'mkdir -p {users} && touch {user} && kill -0 "$(cat {pid} 2>/dev/null)" '
+            '2>/dev/null'.format(users=self.users_dir, user=self.user_file, pid=self.pid_file))
+        self._registered = True
+        if joined.success:
+            logger.info('Sharing the memory sampler running on the appliance')
+            self._stream.skip_to_end()
+            self._synced = False
+            return
+        self.ssh_client.put_file(scripts_data_path.join('smem_sampler.py').strpath,
+            self.REMOTE_SCRIPT)
+        server_id = '--server-id {}'.format(self.miq_server_id) if self.miq_server_id else ''
+        # Users registered while no script ran are left over from monitors that didn't stop
+        result = self.ssh_client.run_command(
+            'for f in {users}/*; do [ "$f" = {user} ] || rm -f "$f"; done; '
+            'rm -f {out}; nohup "$(command -v python3 || command -v python)" {script} {out} '
+            '--interval {interval} --full-interval {full_interval} {server_id} '
+            '> /dev/null 2>&1 & echo $! > {pid}'.format(
+                users=self.users_dir, user=self.user_file,
+                out=self.remote_file, script=self.REMOTE_SCRIPT, interval=self.interval,
+                full_interval=self.full_interval, server_id=server_id, pid=self.pid_file))
+        if result.failed:
+            self.stop()
+            raise Exception('Could not start the memory sampler: {}'.format(result.output))
+        # The first sample of a new script has the names of all processes
+        self._synced = True
+        logger.info('Started the memory sampler on the appliance')
+
+    def stop(self):
+        if not self._registered:
+            return
+        self._registered = False
+        # rmdir only succeeds once no other sampler uses the script
+        result = self.ssh_client.run_command(
+            'rm -f {user}; rmdir {users} 2>/dev/null || exit 3; '
+            'kill "$(cat {pid})"; rm -f {pid}'.format(
+                user=self.user_file, users=self.users_dir, pid=self.pid_file))
+        if result.rc == 3:
+            logger.info('Left the memory sampler on the appliance to its other users')
+        else:
+            logger.info('Stopped the memory sampler on the appliance')
+
+    def _parse(self, line):
+        for text in ((self._partial + line, line) if self._partial else (line, )):
+            try:
+                sample = json.loads(text)
+            except ValueError:
+                continue
+            self._partial = ''
+            return sample
+        if self._partial:
+            # Still not a sample with the fragment before, that one was broken
+            logger.warning('Dropping a broken memory sample: %r', self._partial)
+        # Read while it was being written, the rest comes with the next call
+        self._partial = line
+        return None
+
+    def samples(self):
+        """Samples recorded since the previous call
+
+        Yields:
+            Tuples of the time of the sample, the /proc/meminfo values (kB) by name, the evm
+            workers (pid to type) and the memory of the processes like
+            :py:meth:`SmemMemoryMonitor.get_pids_memory`
+        """
+        for line in self._stream:
+            sample = self._parse(line)
+            if sample is None:
+                continue
+            if not self._synced:
+                if not sample.get('full'):
+                    # Joined a running sampler, the names of the processes are not known yet
+                    continue
+                self._synced = True
+            self._names.update(sample.get('new', {}))
+            self.workers = sample.get('workers', self.workers)
+            memory_by_pid = {}
+            for pid, memory in sample['procs'].items():
+                name, command = self._names.get(pid, ('', ''))
+                memory_by_pid[pid] = dict(
+                    zip(MEASUREMENTS, (value / 1024.0 for value in memory)),
+                    name=name, cmd=command)
+            yield (datetime.fromtimestamp(sample['time']), sample['meminfo'], dict(self.workers),
+                memory_by_pid)
+
 
 class SmemMemoryMonitor(Thread):
-    def __init__(self, ssh_client, scenario_data):
+    """Monitors the memory of an appliance and its processes, and reports on it once stopped
+
+    By default each sample is taken with ssh commands from this thread. With ``use_sampler`` the
+    samples are recorded on the appliance by :py:class:`ApplianceSampler` every
+    ``sample_interval`` seconds, and fetched by this thread every :py:data:`SAMPLE_INTERVAL`.
+    """
+    def __init__(self, ssh_client, scenario_data, use_sampler=False,
+            sample_interval=SAMPLE_INTERVAL):
         super(SmemMemoryMonitor, self).__init__()
         self.ssh_client = ssh_client
         self.scenario_data = scenario_data
+        self.use_sampler = use_sampler
+        self.sample_interval = sample_interval
         self.grafana_urls = {}
         self.miq_server_id = ''
         self.use_slab = False
@@ -147,23 +349,8 @@ class SmemMemoryMonitor(Thread):
 
     def create_process_result(self, process_results, starttime, process_pid, process_name,
             memory_by_pid):
-        if process_pid in memory_by_pid.keys():
-            if process_name not in process_results:
-                process_results[process_name] = OrderedDict()
-                process_results[process_name][process_pid] = OrderedDict()
-            if process_pid not in process_results[process_name]:
-                process_results[process_name][process_pid] = OrderedDict()
-            process_results[process_name][process_pid][starttime] = {}
-            rss_mem = memory_by_pid[process_pid]['rss']
-            pss_mem = memory_by_pid[process_pid]['pss']
-            uss_mem = memory_by_pid[process_pid]['uss']
-            vss_mem = memory_by_pid[process_pid]['vss']
-            swap_mem = memory_by_pid[process_pid]['swap']
-            process_results[process_name][process_pid][starttime]['rss'] = rss_mem
-            process_results[process_name][process_pid][starttime]['pss'] = pss_mem
-            process_results[process_name][process_pid][starttime]['uss'] = uss_mem
-            process_results[process_name][process_pid][starttime]['vss'] = vss_mem
-            process_results[process_name][process_pid][starttime]['swap'] = swap_mem
+        if process_pid in memory_by_pid:
+            process_results.add(process_name, process_pid, starttime, memory_by_pid[process_pid])
             del memory_by_pid[process_pid]
         else:
             logger.warn('Process {} PID, not found: {}'.format(process_name, process_pid))
@@ -174,32 +361,34 @@ class SmemMemoryMonitor(Thread):
         # 5.4 - RHEL 6 / Centos 6
         # Application Memory Used : MemTotal - (MemFree + Buffers + Cached)
         # Available memory could potentially be better metric
-        appliance_results[plottime] = {}
-
         result = self.ssh_client.run_command('cat /proc/meminfo')
         if result.failed:
             logger.error('Exit_status nonzero in get_appliance_memory: {}, {}'
                          .format(result.rc, result.output))
-            del appliance_results[plottime]
         else:
             meminfo_raw = result.output.replace('kB', '').strip()
             meminfo = OrderedDict((k.strip(), v.strip()) for k, v in
                 (value.strip().split(':') for value in meminfo_raw.split('\n')))
-            appliance_results[plottime]['total'] = float(meminfo['MemTotal']) / 1024
-            appliance_results[plottime]['free'] = float(meminfo['MemFree']) / 1024
-            if 'MemAvailable' in meminfo:  # 5.5, RHEL 7/Centos 7
-                self.use_slab = True
-                mem_used = (float(meminfo['MemTotal']) - (float(meminfo['MemFree']) + float(
-                    meminfo['Slab']) + float(meminfo['Cached']))) / 1024
-            else:  # 5.4, RHEL 6/Centos 6
-                mem_used = (float(meminfo['MemTotal']) - (float(meminfo['MemFree']) + float(
-                    meminfo['Buffers']) + float(meminfo['Cached']))) / 1024
-            appliance_results[plottime]['used'] = mem_used
-            appliance_results[plottime]['buffers'] = float(meminfo['Buffers']) / 1024
-            appliance_results[plottime]['cached'] = float(meminfo['Cached']) / 1024
-            appliance_results[plottime]['slab'] = float(meminfo['Slab']) / 1024
-            appliance_results[plottime]['swap_total'] = float(meminfo['SwapTotal']) / 1024
-            appliance_results[plottime]['swap_free'] = float(meminfo['SwapFree']) / 1024
+            self.record_appliance_memory(appliance_results, plottime, meminfo)
+
+    def record_appliance_memory(self, appliance_results, plottime, meminfo):
+        """Adds a sample of /proc/meminfo (values in kB by name) to the appliance results"""
+        appliance_results[plottime] = {}
+        appliance_results[plottime]['total'] = float(meminfo['MemTotal']) / 1024
+        appliance_results[plottime]['free'] = float(meminfo['MemFree']) / 1024
+        if 'MemAvailable' in meminfo:  # 5.5, RHEL 7/Centos 7
+            self.use_slab = True
+            mem_used = (float(meminfo['MemTotal']) - (float(meminfo['MemFree']) + float(
+                meminfo['Slab']) + float(meminfo['Cached']))) / 1024
+        else:  # 5.4, RHEL 6/Centos 6
+            mem_used = (float(meminfo['MemTotal']) - (float(meminfo['MemFree']) + float(
+                meminfo['Buffers']) + float(meminfo['Cached']))) / 1024
+        appliance_results[plottime]['used'] = mem_used
+        appliance_results[plottime]['buffers'] = float(meminfo['Buffers']) / 1024
+        appliance_results[plottime]['cached'] = float(meminfo['Cached']) / 1024
+        appliance_results[plottime]['slab'] = float(meminfo['Slab']) / 1024
+        appliance_results[plottime]['swap_total'] = float(meminfo['SwapTotal']) / 1024
+        appliance_results[plottime]['swap_free'] = float(meminfo['SwapFree']) / 1024
 
     def get_evm_workers(self):
         result = self.ssh_client.run_command(
@@ -270,6 +459,47 @@ class SmemMemoryMonitor(Thread):
                     logger.error('Complete smem output: {}'.format(result.output))
         return memory_by_pid
 
+    def record_processes(self, process_results, plottime, workers, memory_by_pid):
+        """Adds a sample of the memory of the evm workers and other monitored processes"""
+        for worker_pid in workers:
+            self.create_process_result(process_results, plottime, worker_pid,
+                workers[worker_pid], memory_by_pid)
+
+        for pid in sorted(memory_by_pid.keys()):
+            if memory_by_pid[pid]['name'] == 'httpd':
+                self.create_process_result(process_results, plottime, pid, 'httpd',
+                    memory_by_pid)
+            elif memory_by_pid[pid]['name'] == 'postgres':
+                self.create_process_result(process_results, plottime, pid, 'postgres',
+                    memory_by_pid)
+            elif memory_by_pid[pid]['name'] == 'postmaster':
+                self.create_process_result(process_results, plottime, pid, 'postgres',
+                    memory_by_pid)
+            elif memory_by_pid[pid]['name'] == 'memcached':
+                self.create_process_result(process_results, plottime, pid, 'memcached',
+                    memory_by_pid)
+            elif memory_by_pid[pid]['name'] == 'collectd':
+                self.create_process_result(process_results, plottime, pid, 'collectd',
+                    memory_by_pid)
+            elif memory_by_pid[pid]['name'] == 'ruby':
+                if 'evm_server.rb' in memory_by_pid[pid]['cmd']:
+                    self.create_process_result(process_results, plottime, pid,
+                        'MIQ Server (evm_server.rb)', memory_by_pid)
+                elif 'MIQ Server' in memory_by_pid[pid]['cmd']:
+                    self.create_process_result(process_results, plottime, pid,
+                        'MIQ Server (evm_server.rb)', memory_by_pid)
+                elif 'evm_watchdog.rb' in memory_by_pid[pid]['cmd']:
+                    self.create_process_result(process_results, plottime, pid,
+                        'evm_watchdog.rb', memory_by_pid)
+                elif 'appliance_console.rb' in memory_by_pid[pid]['cmd']:
+                    self.create_process_result(process_results, plottime, pid,
+                        'appliance_console.rb', memory_by_pid)
+                elif 'evm:dbsync:replicate' in memory_by_pid[pid]['cmd']:
+                    self.create_process_result(process_results, plottime, pid,
+                        'evm:dbsync:replicate', memory_by_pid)
+                else:
+                    logger.debug('Unaccounted for ruby pid: {}'.format(pid))
+
     def _real_run(self):
         """ Result dictionaries:
         appliance_results[timestamp][measurement] = value
@@ -282,18 +512,45 @@ class SmemMemoryMonitor(Thread):
         appliance_results[timestamp]['swap_total'] = value
         appliance_results[timestamp]['swap_free'] = value
         appliance measurements: total/free/used/buffers/cached/slab/swap_total/swap_free
-        process_results[name][pid][timestamp][measurement] = value
-        process_results[name][pid][timestamp]['rss'] = value
-        process_results[name][pid][timestamp]['pss'] = value
-        process_results[name][pid][timestamp]['uss'] = value
-        process_results[name][pid][timestamp]['vss'] = value
-        process_results[name][pid][timestamp]['swap'] = value
+        process_results[name][pid] is a ProcessSeries with arrays of all the samples of a process:
+        process_results[name][pid].dates = timestamps
+        process_results[name][pid]['rss'] = values
+        process_results[name][pid]['pss'] = values
+        process_results[name][pid]['uss'] = values
+        process_results[name][pid]['vss'] = values
+        process_results[name][pid]['swap'] = values
         """
         appliance_results = OrderedDict()
-        process_results = OrderedDict()
+        process_results = ProcessResults()
         install_smem(self.ssh_client)
         self.get_miq_server_id()
         logger.info('Starting Monitoring Thread.')
+        if self.use_sampler:
+            self._sample_on_appliance(appliance_results, process_results)
+        else:
+            self._sample_over_ssh(appliance_results, process_results)
+        logger.info('Monitoring CFME Memory Terminating')
+
+        create_report(self.scenario_data, appliance_results, process_results, self.use_slab,
+            self.grafana_urls)
+
+    def _sample_on_appliance(self, appliance_results, process_results):
+        sampler = ApplianceSampler(self.ssh_client, self.miq_server_id, self.sample_interval)
+        sampler.start()
+        try:
+            while self.signal:
+                time.sleep(SAMPLE_INTERVAL)
+                self._record_samples(sampler, appliance_results, process_results)
+        finally:
+            sampler.stop()
+        self._record_samples(sampler, appliance_results, process_results)
+
+    def _record_samples(self, sampler, appliance_results, process_results):
+        for plottime, meminfo, workers, memory_by_pid in sampler.samples():
+            self.record_appliance_memory(appliance_results, plottime, meminfo)
+            self.record_processes(process_results, plottime, workers, memory_by_pid)
+
+    def _sample_over_ssh(self, appliance_results, process_results):
         while self.signal:
             starttime = time.time()
             plottime = datetime.now()
@@ -302,44 +559,7 @@ class SmemMemoryMonitor(Thread):
             workers = self.get_evm_workers()
             memory_by_pid = self.get_pids_memory()
 
-            for worker_pid in workers:
-                self.create_process_result(process_results, plottime, worker_pid,
-                    workers[worker_pid], memory_by_pid)
-
-            for pid in sorted(memory_by_pid.keys()):
-                if memory_by_pid[pid]['name'] == 'httpd':
-                    self.create_process_result(process_results, plottime, pid, 'httpd',
-                        memory_by_pid)
-                elif memory_by_pid[pid]['name'] == 'postgres':
-                    self.create_process_result(process_results, plottime, pid, 'postgres',
-                        memory_by_pid)
-                elif memory_by_pid[pid]['name'] == 'postmaster':
-                    self.create_process_result(process_results, plottime, pid, 'postgres',
-                        memory_by_pid)
-                elif memory_by_pid[pid]['name'] == 'memcached':
-                    self.create_process_result(process_results, plottime, pid, 'memcached',
-                        memory_by_pid)
-                elif memory_by_pid[pid]['name'] == 'collectd':
-                    self.create_process_result(process_results, plottime, pid, 'collectd',
-                        memory_by_pid)
-                elif memory_by_pid[pid]['name'] == 'ruby':
-                    if 'evm_server.rb' in memory_by_pid[pid]['cmd']:
-                        self.create_process_result(process_results, plottime, pid,
-                            'MIQ Server (evm_server.rb)', memory_by_pid)
-                    elif 'MIQ Server' in memory_by_pid[pid]['cmd']:
-                        self.create_process_result(process_results, plottime, pid,
-                            'MIQ Server (evm_server.rb)', memory_by_pid)
-                    elif 'evm_watchdog.rb' in memory_by_pid[pid]['cmd']:
-                        self.create_process_result(process_results, plottime, pid,
-                            'evm_watchdog.rb', memory_by_pid)
-                    elif 'appliance_console.rb' in memory_by_pid[pid]['cmd']:
-                        self.create_process_result(process_results, plottime, pid,
-                            'appliance_console.rb', memory_by_pid)
-                    elif 'evm:dbsync:replicate' in memory_by_pid[pid]['cmd']:
-                        self.create_process_result(process_results, plottime, pid,
-                            'evm:dbsync:replicate', memory_by_pid)
-                    else:
-                        logger.debug('Unaccounted for ruby pid: {}'.format(pid))
+            self.record_processes(process_results, plottime, workers, memory_by_pid)
 
             timediff = time.time() - starttime
             logger.debug('Monitoring sampled in {}s'.format(round(timediff, 4)))
@@ -348,10 +568,6 @@ class SmemMemoryMonitor(Thread):
             # Roughly 10s samples, accounts for collection of memory measurements
             time_to_sleep = abs(SAMPLE_INTERVAL - timediff)
             time.sleep(time_to_sleep)
-        logger.info('Monitoring CFME Memory Terminating')
-
-        create_report(self.scenario_data, appliance_results, process_results, self.use_slab,
-            self.grafana_urls)
 
     def run(self):
         try:
@@ -430,14 +646,15 @@ def compile_per_process_results(procs_to_compile, process_results, ts_end):
     total_running_swap = 0
     for process in procs_to_compile:
         if process in process_results:
-            for pid in process_results[process]:
-                if ts_end in process_results[process][pid]:
+            for series in process_results[process].values():
+                # Samples are in time order, a process alive at the end has its last one then
+                if series.end == ts_end:
                     alive_pids += 1
-                    total_running_rss += process_results[process][pid][ts_end]['rss']
-                    total_running_pss += process_results[process][pid][ts_end]['pss']
-                    total_running_uss += process_results[process][pid][ts_end]['uss']
-                    total_running_vss += process_results[process][pid][ts_end]['vss']
-                    total_running_swap += process_results[process][pid][ts_end]['swap']
+                    total_running_rss += series['rss'][-1]
+                    total_running_pss += series['pss'][-1]
+                    total_running_uss += series['uss'][-1]
+                    total_running_vss += series['vss'][-1]
+                    total_running_swap += series['swap'][-1]
                 else:
                     recycled_pids += 1
     return alive_pids, recycled_pids, total_running_rss, total_running_pss, total_running_uss, \
@@ -460,13 +677,8 @@ def generate_raw_data_csv(directory, appliance_results, process_results):
             file_name = str(directory.join('{}-{}.csv'.format(process_pid, process_name)))
             with open(file_name, 'w') as csv_file:
                 csv_file.write('TimeStamp,RSS,PSS,USS,VSS,SWAP\n')
-                for ts in process_results[process_name][process_pid]:
-                    csv_file.write('{},{},{},{},{},{}\n'.format(ts,
-                        process_results[process_name][process_pid][ts]['rss'],
-                        process_results[process_name][process_pid][ts]['pss'],
-                        process_results[process_name][process_pid][ts]['uss'],
-                        process_results[process_name][process_pid][ts]['vss'],
-                        process_results[process_name][process_pid][ts]['swap']))
+                csv_file.writelines('{},{},{},{},{},{}\n'.format(*row)
+                    for row in process_results[process_name][process_pid].rows())
     timediff = time.time() - starttime
     logger.info('Generated Raw Data CSVs in: {}'.format(timediff))
 
@@ -543,7 +755,7 @@ def generate_summary_html(directory, version_string, appliance_results, process_
         timediff = end - start
         total_proc_count = 0
         for proc_name in process_results:
-            total_proc_count += len(process_results[proc_name].keys())
+            total_proc_count += len(process_results[proc_name])
         growth = appliance_results[end]['used'] - appliance_results[start]['used']
         max_used_memory = 0
         for ts in appliance_results:
@@ -778,8 +990,9 @@ def generate_summary_html(directory, version_string, appliance_results, process_
         for ordered_name in process_order:
             if ordered_name in process_results:
                 for pid in process_results[ordered_name]:
-                    start = process_results[ordered_name][pid].keys()[0]
-                    end = process_results[ordered_name][pid].keys()[-1]
+                    series = process_results[ordered_name][pid]
+                    start = series.start
+                    end = series.end
                     timediff = end - start
                     html_file.write('<tr>\n')
                     if len(process_results[ordered_name]) > 1:
@@ -794,19 +1007,13 @@ def generate_summary_html(directory, version_string, appliance_results, process_
                     html_file.write('<td>{}</td>\n'.format(start.replace(microsecond=0)))
                     html_file.write('<td>{}</td>\n'.format(end.replace(microsecond=0)))
                     html_file.write('<td>{}</td>\n'.format(unicode(timediff).partition('.')[0]))
-                    rss_change = process_results[ordered_name][pid][end]['rss'] - \
-                        process_results[ordered_name][pid][start]['rss']
-                    html_file.write('<td>{}</td>\n'.format(
-                        round(process_results[ordered_name][pid][start]['rss'], 2)))
-                    html_file.write('<td>{}</td>\n'.format(
-                        round(process_results[ordered_name][pid][end]['rss'], 2)))
+                    rss_change = series['rss'][-1] - series['rss'][0]
+                    html_file.write('<td>{}</td>\n'.format(round(series['rss'][0], 2)))
+                    html_file.write('<td>{}</td>\n'.format(round(series['rss'][-1], 2)))
                     html_file.write('<td>{}</td>\n'.format(round(rss_change, 2)))
-                    pss_change = process_results[ordered_name][pid][end]['pss'] - \
-                        process_results[ordered_name][pid][start]['pss']
-                    html_file.write('<td>{}</td>\n'.format(
-                        round(process_results[ordered_name][pid][start]['pss'], 2)))
-                    html_file.write('<td>{}</td>\n'.format(
-                        round(process_results[ordered_name][pid][end]['pss'], 2)))
+                    pss_change = series['pss'][-1] - series['pss'][0]
+                    html_file.write('<td>{}</td>\n'.format(round(series['pss'][0], 2)))
+                    html_file.write('<td>{}</td>\n'.format(round(series['pss'][-1], 2)))
                     html_file.write('<td>{}</td>\n'.format(round(pss_change, 2)))
                     html_file.write('<td><a href=\'rawdata/{}-{}.csv\'>csv</a></td>\n'.format(
                         pid, ordered_name))
@@ -1123,12 +1330,10 @@ def graph_all_miq_workers(graph_file_path, process_results, provider_names):
     for process_name in process_results:
         if 'Worker' in process_name or 'Handler' in process_name or 'Catcher' in process_name:
             for process_pid in process_results[process_name]:
-                dates = process_results[process_name][process_pid].keys()
-
-                rss_samples = list(process_results[process_name][process_pid][ts]['rss']
-                        for ts in process_results[process_name][process_pid].keys())
-                vss_samples = list(process_results[process_name][process_pid][ts]['vss']
-                        for ts in process_results[process_name][process_pid].keys())
+                series = process_results[process_name][process_pid]
+                dates = series.dates
+                rss_samples = series['rss']
+                vss_samples = series['vss']
                 plt.plot(dates, rss_samples, linewidth=1, label='{} {} RSS'.format(process_pid,
                     process_name))
                 plt.plot(dates, vss_samples, linewidth=1, label='{} {} VSS'.format(
@@ -1158,17 +1363,13 @@ def graph_individual_process_measurements(graph_file_path, process_results, prov
 
             file_name = graph_file_path.join('{}-{}.png'.format(process_name, process_pid))
 
-            dates = process_results[process_name][process_pid].keys()
-            rss_samples = list(process_results[process_name][process_pid][ts]['rss']
-                    for ts in process_results[process_name][process_pid].keys())
-            pss_samples = list(process_results[process_name][process_pid][ts]['pss']
-                    for ts in process_results[process_name][process_pid].keys())
-            uss_samples = list(process_results[process_name][process_pid][ts]['uss']
-                    for ts in process_results[process_name][process_pid].keys())
-            vss_samples = list(process_results[process_name][process_pid][ts]['vss']
-                    for ts in process_results[process_name][process_pid].keys())
-            swap_samples = list(process_results[process_name][process_pid][ts]['swap']
-                    for ts in process_results[process_name][process_pid].keys())
+            series = process_results[process_name][process_pid]
+            dates = series.dates
+            rss_samples = series['rss']
+            pss_samples = series['pss']
+            uss_samples = series['uss']
+            vss_samples = series['vss']
+            swap_samples = series['swap']
 
             fig, ax = plt.subplots()
             plt.title('Provider(s)/Size: {}\nProcess/Worker: {}\nPID: {}'.format(provider_names,
@@ -1243,18 +1444,13 @@ def graph_same_miq_workers(graph_file_path, process_results, provider_names):
             plt.ylabel('Memory (MiB)')
 
             for process_pid in process_results[process_name]:
-                dates = process_results[process_name][process_pid].keys()
-
-                rss_samples = list(process_results[process_name][process_pid][ts]['rss']
-                        for ts in process_results[process_name][process_pid].keys())
-                pss_samples = list(process_results[process_name][process_pid][ts]['pss']
-                        for ts in process_results[process_name][process_pid].keys())
-                uss_samples = list(process_results[process_name][process_pid][ts]['uss']
-                        for ts in process_results[process_name][process_pid].keys())
-                vss_samples = list(process_results[process_name][process_pid][ts]['vss']
-                        for ts in process_results[process_name][process_pid].keys())
-                swap_samples = list(process_results[process_name][process_pid][ts]['swap']
-                        for ts in process_results[process_name][process_pid].keys())
+                series = process_results[process_name][process_pid]
+                dates = series.dates
+                rss_samples = series['rss']
+                pss_samples = series['pss']
+                uss_samples = series['uss']
+                vss_samples = series['vss']
+                swap_samples = series['swap']
                 plt.plot(dates, rss_samples, linewidth=1, label='{} RSS'.format(process_pid))
                 plt.plot(dates, pss_samples, linewidth=1, label='{} PSS'.format(process_pid))
                 plt.plot(dates, uss_samples, linewidth=1, label='{} USS'.format(process_pid))
@@ -1306,8 +1502,6 @@ def summary_csv_measurement_dump(csv_file, process_results, measurement):
     for ordered_name in process_order:
         if ordered_name in process_results:
             for process_pid in sorted(process_results[ordered_name]):
-                start = process_results[ordered_name][process_pid].keys()[0]
-                end = process_results[ordered_name][process_pid].keys()[-1]
+                samples = process_results[ordered_name][process_pid][measurement]
                 csv_file.write('{},{},{},{}\n'.format(ordered_name, process_pid,
-                    round(process_results[ordered_name][process_pid][start][measurement], 2),
-                    round(process_results[ordered_name][process_pid][end][measurement], 2)))
+                    round(samples[0], 2), round(samples[-1], 2)))
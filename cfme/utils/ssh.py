@@ -2,6 +2,12 @@
 import gevent
 import socket
 import sys
+import threading
+import time
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 from subprocess import check_call
 
 import attr
@@ -14,7 +20,7 @@ from cached_property import cached_property
 from os import path as os_path
 from scp import SCPClient
 
-from cfme.utils import conf, ports
+from cfme.utils import at_exit, conf, ports
 from cfme.utils.log import logger
 from cfme.utils.net import net_check
 from cfme.utils.path import project_path
@@ -91,6 +97,149 @@ class SSHResult(object):
         return self.rc != 0
 
 
+@attr.s
+class _PooledTransport(object):
+    client = attr.ib()
+    slots = attr.ib(repr=False)
+    users = attr.ib(default=0)
+    last_used = attr.ib(default=attr.Factory(time.time))
+
+    @property
+    def transport(self):
+        return self.client.get_transport()
+
+
+class SSHTransportPool(object):
+    """Process-wide pool of connected and authenticated SSH transports
+
+    Transports are keyed by ``(hostname, port, username, container)`` and shared by all
+    :py:class:`SSHClient` instances with the same key, which open their own channels on them.
+    A transport is kept alive when its last client closes, so the next client for the same host
+    doesn't have to connect and authenticate again, and is closed once it has been idle for
+    ``idle_timeout`` seconds.
+
+    Enabled by the ``ssh.pool`` section of ``env.yaml``:
+
+    .. code-block:: yaml
+
+        ssh:
+            pool:
+                enabled: true
+                idle_timeout: 300  # seconds an unused transport is kept open
+                max_sessions: 8  # concurrent commands per transport, keep below sshd MaxSessions
+                keepalive: 30  # seconds between keepalive packets
+                health_check_interval: 60  # seconds idle before a transport is probed on reuse
+
+    """
+    def __init__(self, enabled=False, idle_timeout=300, max_sessions=8, keepalive=30,
+                 health_check_interval=60):
+        self.enabled = enabled
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.keepalive = keepalive
+        self.health_check_interval = health_check_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = defaultdict(threading.Lock)
+
+    @classmethod
+    def from_conf(cls, pool_conf):
+        return cls(**pool_conf)
+
+    def _healthy(self, entry):
+        transport = entry.transport
+        if transport is None or not transport.is_active():
+            return False
+        if time.time() - entry.last_used > self.health_check_interval:
+            try:
+                transport.send_ignore()
+            except (EOFError, socket.error, paramiko.SSHException):
+                return False
+        return True
+
+    def _close(self, key, entry):
+        logger.debug('Closing pooled ssh transport for %r', key)
+        with diaper:
+            entry.client.close()
+
+    def _evict_idle(self):
+        now = time.time()
+        with self._lock:
+            idle = [(key, entry) for key, entry in self._entries.items()
+                    if entry.users == 0 and now - entry.last_used > self.idle_timeout]
+            for key, entry in idle:
+                del self._entries[key]
+        for key, entry in idle:
+            self._close(key, entry)
+
+    def acquire(self, key, connect_kwargs, check_port=None):
+        """Get a connected transport for the key, connecting if there's no healthy one
+
+        Args:
+            key: The ``(hostname, port, username, container)`` tuple
+            connect_kwargs: Passed to :py:meth:`paramiko.SSHClient.connect` if connecting
+            check_port: Called before connecting, if given
+        Returns:
+            A :py:class:`paramiko.Transport`
+        """
+        self._evict_idle()
+        with self._key_locks[key]:
+            entry = self._entries.get(key)
+            if entry is not None and not self._healthy(entry):
+                logger.info('Pooled ssh transport for %r is not healthy, reconnecting', key)
+                with self._lock:
+                    self._entries.pop(key, None)
+                self._close(key, entry)
+                entry = None
+            if entry is None:
+                if check_port is not None:
+                    check_port()
+                client = paramiko.SSHClient()
+                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                client.connect(**connect_kwargs)
+                if self.keepalive:
+                    client.get_transport().set_keepalive(self.keepalive)
+                entry = _PooledTransport(
+                    client=client, slots=threading.BoundedSemaphore(self.max_sessions))
+                with self._lock:
+                    self._entries[key] = entry
+            with self._lock:
+                entry.users += 1
+                entry.last_used = time.time()
+            return entry.transport
+
+    def release(self, key, transport):
+        """Give back a transport obtained by :py:meth:`acquire`"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.transport is transport:
+                entry.users = max(entry.users - 1, 0)
+                entry.last_used = time.time()
+
+    @contextmanager
+    def session_slot(self, key):
+        """Limits the number of concurrently open sessions on the transport for the key"""
+        entry = self._entries.get(key)
+        if entry is None:
+            yield
+            return
+        entry.slots.acquire()
+        try:
+            yield
+        finally:
+            entry.slots.release()
+            entry.last_used = time.time()
+
+    def close_all(self):
+        with self._lock:
+            entries, self._entries = self._entries, {}
+        for key, entry in entries.items():
+            self._close(key, entry)
+
+
+transport_pool = SSHTransportPool.from_conf(conf.env.get('ssh', {}).get('pool', {}))
+at_exit(transport_pool.close_all)
+
 _ssh_key_file = project_path.join('.generated_ssh_key')
 _ssh_pubkey_file = project_path.join('.generated_ssh_key.pub')
 
@@ -111,6 +260,8 @@ class SSHClient(paramiko.SSHClient):
             app and ``container`` then specifies the name of the pod to interact with.
         stdout: If specified, overrides the system stdout file for streaming output.
         stderr: If specified, overrides the system stderr file for streaming output.
+        pooled: Share a transport from the :py:class:`SSHTransportPool` instead of connecting on
+            its own, defaults to whether the pool is enabled.
     """
     def __init__(self, stream_output=False, **connect_kwargs):
         super(SSHClient, self).__init__()
@@ -126,6 +277,8 @@ class SSHClient(paramiko.SSHClient):
         self.oc_password = connect_kwargs.pop('oc_password', False)
         self.f_stdout = connect_kwargs.pop('stdout', sys.stdout)
         self.f_stderr = connect_kwargs.pop('stderr', sys.stderr)
+        self._pooled = connect_kwargs.pop('pooled', transport_pool.enabled)
+        self._pooled_transport = None
 
         # load the defaults for ssh
         default_connect_kwargs = {
@@ -201,9 +354,20 @@ class SSHClient(paramiko.SSHClient):
         if sent > 0:
             logger.debug('scp progress for %r: %s of %s ', filename, sent, size)
 
+    @property
+    def _pool_key(self):
+        return (self._connect_kwargs['hostname'], self._connect_kwargs['port'], self.username,
+                self._container)
+
     def close(self):
         with diaper:
             _client_session.remove(self)
+        if self._pooled_transport is not None:
+            # shared transports stay open in the pool
+            transport_pool.release(self._pool_key, self._pooled_transport)
+            if self._transport is self._pooled_transport:
+                self._transport = None
+            self._pooled_transport = None
         super(SSHClient, self).close()
 
     @property
@@ -220,9 +384,16 @@ class SSHClient(paramiko.SSHClient):
 
         if not self.connected:
             self._connect_kwargs.update(kwargs)
-            self._check_port()
-            # Only install ssh keys if they aren't installed (or currently being installed)
-            conn = super(SSHClient, self).connect(**self._connect_kwargs)
+            if self._pooled:
+                if self._pooled_transport is not None:
+                    transport_pool.release(self._pool_key, self._pooled_transport)
+                self._transport = self._pooled_transport = transport_pool.acquire(
+                    self._pool_key, self._connect_kwargs, check_port=self._check_port)
+                conn = None
+            else:
+                self._check_port()
+                # Only install ssh keys if they aren't installed (or currently being installed)
+                conn = super(SSHClient, self).connect(**self._connect_kwargs)
         else:
             conn = None
 
@@ -286,13 +457,13 @@ class SSHClient(paramiko.SSHClient):
             logger.error("command %s couldn't finish in given timeout %s", command, timeout)
             raise
 
-    def _run_command(self, command, timeout=RUNCMD_TIMEOUT, reraise=False, ensure_host=False,
-                     ensure_user=False, container=None):
-        if isinstance(command, dict):
-            command = VersionPicker(command).pick(self.vmdb_version)
-        original_command = command
+    def _wrap_command(self, command, ensure_host=False, ensure_user=False, container=None):
+        """Wraps a command to run in the appliance container or pod and as root, if needed.
+
+        Returns:
+            A tuple of the command to run and whether it uses sudo (which needs a pty).
+        """
         uses_sudo = False
-        logger.info("Running command %r", command)
         container = container or self._container
         if self.is_pod and not ensure_host:
             # This command will be executed in the context of the host provider
@@ -309,91 +480,164 @@ class SSHClient(paramiko.SSHClient):
             # We need sudo
             command = 'sudo -i bash -c {command}'.format(command=quote(command))
             uses_sudo = True
+        return command, uses_sudo
+
+    def _run_command(self, command, timeout=RUNCMD_TIMEOUT, reraise=False, ensure_host=False,
+                     ensure_user=False, container=None):
+        if isinstance(command, dict):
+            command = VersionPicker(command).pick(self.vmdb_version)
+        original_command = command
+        logger.info("Running command %r", command)
+        command, uses_sudo = self._wrap_command(command, ensure_host, ensure_user, container)
 
         if command != original_command:
             logger.info("> Actually running command %r", command)
         command += '\n'
 
         output = []
-        try:
-            session = self.get_transport().open_session()
-            if uses_sudo:
-                # We need a pseudo-tty for sudo
-                session.get_pty()
-            if timeout:
-                session.settimeout(float(timeout))
-
-            session.exec_command(command)
-            stdout = session.makefile()
-            stderr = session.makefile_stderr()
-
-            def write_output(line, file):
-                output.append(line)
-                if self._streaming:
-                    file.write(line)
-
-            while True:
-                if session.exit_status_ready():
-                    break
-                no_data = 0
-                # While the program is running loop through collecting line by line so that we don't
-                # fill the buffers up without a newline.
-                # Also, note that for long running programs if we try to read output when there
-                # is none (and in the case of stderr may never be any)
-                # we risk blocking so long that the write buffer on the remote side will fill
-                # and the remote program will block on a write.
-                # The blocking on our side occurs in paramiko's buffered_pipe.py's read() call,
-                # which will block if its internal buffer is empty.
-                if session.recv_ready():
-                    try:
-                        line = next(stdout)
-                        write_output(line, self.f_stdout)
-                    except StopIteration:
-                        pass
-                else:
-                    no_data += 1
-
-                if session.recv_stderr_ready():
-                    try:
-                        line = next(stdout)
-                        write_output(line, self.f_stderr)
-                    except StopIteration:
-                        pass
+        with transport_pool.session_slot(self._pool_key if self._pooled else None):
+            try:
+                session = self.get_transport().open_session()
+                if uses_sudo:
+                    # We need a pseudo-tty for sudo
+                    session.get_pty()
+                if timeout:
+                    session.settimeout(float(timeout))
+
+                session.exec_command(command)
+                stdout = session.makefile()
+                stderr = session.makefile_stderr()
+
+                def write_output(line, file):
+                    output.append(line)
+                    if self._streaming:
+                        file.write(line)
+
+                while True:
+                    if session.exit_status_ready():
+                        break
+                    no_data = 0
+                    # While the program is running loop through collecting line by line so that we
+                    # don't fill the buffers up without a newline.
+                    # Also, note that for long running programs if we try to read output when there
+                    # is none (and in the case of stderr may never be any)
+                    # we risk blocking so long that the write buffer on the remote side will fill
+                    # and the remote program will block on a write.
+                    # The blocking on our side occurs in paramiko's buffered_pipe.py's read() call,
+                    # which will block if its internal buffer is empty.
+                    if session.recv_ready():
+                        try:
+                            line = next(stdout)
+                            write_output(line, self.f_stdout)
+                        except StopIteration:
+                            pass
+                    else:
+                        no_data += 1
+
+                    if session.recv_stderr_ready():
+                        try:
+                            line = next(stdout)
+                            write_output(line, self.f_stderr)
+                        except StopIteration:
+                            pass
+                    else:
+                        no_data += 1
+
+                    if no_data == 2:
+                        gevent.sleep(0.01)
+
+                # When the program finishes, we need to grab the rest of the output that is left.
+                # Also, we don't have the issue of blocking reads because since the command is
+                # finished, any pending reads of SSH encrypted data will finish shortly and put in
+                # the buffer or for an empty file EOF will be reached as it will be closed.
+                for line in stdout:
+                    write_output(line, self.f_stdout)
+                for line in stderr:
+                    write_output(line, self.f_stderr)
+
+                exit_status = session.recv_exit_status()
+                if exit_status != 0:
+                    logger.warning('Exit code %d!', exit_status)
+                return SSHResult(rc=exit_status, output=''.join(output), command=command)
+            except paramiko.SSHException:
+                if reraise:
+                    raise
                 else:
-                    no_data += 1
-
-                if no_data == 2:
-                    gevent.sleep(0.01)
-
-            # When the program finishes, we need to grab the rest of the output that is left.
-            # Also, we don't have the issue of blocking reads because since the command is
-            # finished, any pending reads of SSH encrypted data will finish shortly and put in
-            # the buffer or for an empty file EOF will be reached as it will be closed.
-            for line in stdout:
-                write_output(line, self.f_stdout)
-            for line in stderr:
-                write_output(line, self.f_stderr)
-
-            exit_status = session.recv_exit_status()
-            if exit_status != 0:
-                logger.warning('Exit code %d!', exit_status)
-            return SSHResult(rc=exit_status, output=''.join(output), command=command)
-        except paramiko.SSHException:
-            if reraise:
+                    logger.exception('Exception happened during SSH call')
+            except socket.timeout:
+                logger.exception(
+                    "Command %r timed out. Output before it failed was:\n%r",
+                    command,
+                    ''.join(output))
                 raise
-            else:
-                logger.exception('Exception happened during SSH call')
-        except socket.timeout:
-            logger.exception(
-                "Command %r timed out. Output before it failed was:\n%r",
-                command,
-                ''.join(output))
-            raise
 
         # Returning two things so tuple unpacking the return works even if the ssh client fails
         # Return whatever we have in the output
         return SSHResult(rc=1, output=''.join(output), command=command)
 
+    def run_commands(self, commands, timeout=RUNCMD_TIMEOUT, stop_on_error=False, **kwargs):
+        """Run a batch of commands over SSH in a single round trip.
+
+        The commands are run one after another, each in its own subshell so they behave as if
+        they were run by separate :py:meth:`run_command` calls, and their output (stdout and
+        stderr combined) and exit codes are split back apart afterwards.
+
+        Args:
+            commands: A list of commands. Each supports taking dicts as version picking.
+            timeout: Timeout after which the execution of the whole batch fails.
+            stop_on_error: Don't run the rest of the batch after a command fails.
+            **kwargs: Passed to :py:meth:`run_command`.
+        Returns:
+            A list of :py:class:`SSHResult` instances, one per command that was run.
+        """
+        commands = [
+            VersionPicker(command).pick(self.vmdb_version) if isinstance(command, dict)
+            else command
+            for command in commands]
+        if not commands:
+            return []
+        delimiter = 'SSH_BATCH_{}'.format(fauxfactory.gen_alphanumeric(16))
+        # the delimiter starts on a new line of its own, that newline is not part of the output
+        script = ''.join(
+            '( {command}\n) 2>&1; rc=$?; printf "\\n{delimiter} %d\\n" $rc\n{check}'.format(
+                command=command, delimiter=delimiter,
+                check='[ $rc -eq 0 ] || exit $rc\n' if stop_on_error else '')
+            for command in commands)
+        result = self.run_command(script, timeout=timeout, **kwargs)
+        # ptys (used with sudo) turn newlines into \r\n
+        parts = re.split(r'\r?\n{} (\d+)\r?\n'.format(delimiter), result.output)
+        results = [
+            SSHResult(command=command, rc=int(rc), output=output)
+            for command, output, rc in zip(commands, parts[0::2], parts[1::2])]
+        if len(results) < len(commands) and not stop_on_error:
+            # the batch itself broke down (e.g. timed out), report the command it stopped at
+            results.append(SSHResult(
+                command=commands[len(results)], rc=result.rc or 1, output=parts[-1]))
+        return results
+
+    def run_command_batches(self, batches, **kwargs):
+        """Run independent batches of commands concurrently, on separate channels.
+
+        Args:
+            batches: A list of lists of commands, see :py:meth:`run_commands`.
+            **kwargs: Passed to :py:meth:`run_commands`.
+        Returns:
+            A list of lists of :py:class:`SSHResult` instances, one list per batch.
+        """
+        self.connect()
+        pool = ThreadPool(len(batches) or 1)
+        try:
+            return pool.map(lambda batch: self.run_commands(batch, **kwargs), batches)
+        finally:
+            pool.close()
+
+    def stream_lines(self, remote_files, **kwargs):
+        """Stream the lines of remote (optionally gzipped) files, filtered on the remote side.
+
+        See :py:class:`RemoteLogStream` for the arguments.
+        """
+        return RemoteLogStream(self, remote_files, **kwargs)
+
     def cpu_spike(self, seconds=60, cpus=2, **kwargs):
         """Creates a CPU spike of specific length and processes.
 
@@ -688,10 +932,26 @@ class SSHClient(paramiko.SSHClient):
 
 
 class SSHTail(SSHClient):
+    """Iterates over the lines appended to a remote file since the previous iteration.
+
+    The new part of the file is read in ``chunk_size`` blocks with SFTP read-ahead (prefetch)
+    enabled, so the whole range is requested up front instead of one round trip per line.
+
+    A pass reads up to the size of the file when it started. If the last line there is not
+    complete yet, reading goes on past that size until it is, and any other complete lines
+    written in the meantime that came with the same chunk are yielded too. The next pass starts
+    after the last complete line yielded. A line that is still unfinished at the end of the file
+    is yielded as it is.
 
-    def __init__(self, remote_filename, **connect_kwargs):
+    Args:
+        remote_filename: Path to the remote file
+        chunk_size: How many bytes to read at once
+        **connect_kwargs: See :py:class:`SSHClient`
+    """
+    def __init__(self, remote_filename, chunk_size=1024 * 1024, **connect_kwargs):
         super(SSHTail, self).__init__(stream_output=False, **connect_kwargs)
         self._remote_filename = remote_filename
+        self._chunk_size = chunk_size
         self._sftp_client = None
         self._remote_file_size = None
 
@@ -702,14 +962,42 @@ class SSHTail(SSHClient):
     def raw_lines(self):
         with self as sshtail:
             fstat = sshtail._sftp_client.stat(self._remote_filename)
-            if self._remote_file_size is not None:
-                if self._remote_file_size < fstat.st_size:
-                    remote_file = self._sftp_client.open(self._remote_filename, 'r')
+            end = fstat.st_size
+            if self._remote_file_size is not None and self._remote_file_size < end:
+                remote_file = self._sftp_client.open(self._remote_filename, 'rb')
+                try:
                     remote_file.seek(self._remote_file_size, 0)
-                    while (remote_file.tell() < fstat.st_size):
-                        line = remote_file.readline()  # Note the  missing rstrip() here!
-                        yield line
-            self._remote_file_size = fstat.st_size
+                    remote_file.prefetch(end)
+                    position = self._remote_file_size
+                    pending = b''
+                    while True:
+                        # Past the size seen at the start only finish the last line
+                        overrun = position >= end
+                        chunk = remote_file.read(
+                            self._chunk_size if overrun
+                            else min(self._chunk_size, end - position))
+                        if not chunk:
+                            if pending:
+                                yield self._decode(pending)
+                            break
+                        position += len(chunk)
+                        lines = (pending + chunk).split(b'\n')
+                        pending = lines.pop()
+                        for line in lines:
+                            yield self._decode(line + b'\n')
+                        if position >= end and (not pending or overrun and lines):
+                            # Complete lines past the initial size were yielded above, so
+                            # only the unfinished rest is left for the next pass
+                            position -= len(pending)
+                            break
+                    end = max(end, position)
+                finally:
+                    remote_file.close()
+            self._remote_file_size = end
+
+    @staticmethod
+    def _decode(line):
+        return line.decode('utf-8', 'replace') if six.PY3 else line
 
     def raw_string(self):
         return ''.join(self)
@@ -732,6 +1020,175 @@ class SSHTail(SSHClient):
         return list(self)
 
 
+# Matches the timestamp of a ManageIQ log line, ``[----] I, [2018-05-01T10:20:30.123456 #1:abc]``
+_LOG_TIMESTAMP_AWK = r'/\[[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]T[0-9:.]+/'
+
+
+class RemoteLogStream(object):
+    """Streams the lines of remote log files, filtered on the remote side.
+
+    The files are read on the remote host (``.gz`` files are decompressed there), filtered with
+    ``grep -E`` and/or cut to a time range, and the matching lines are sent back gzipped and
+    decompressed here as they arrive, so analysis can start before the whole log is transferred.
+
+    Iterating the stream again only yields lines appended to the plain (not gzipped) files since
+    the previous pass, provided it was read to the end; files that shrank are read from the start.
+    Only complete lines are read, a line still being written at the end of a file is held back
+    until the next pass.
+
+    Args:
+        ssh_client: The :py:class:`SSHClient` to use
+        remote_files: A list of remote file paths, read in the given order
+        patterns: A list of extended regular expressions, lines matching any of them are kept
+        since: Only keep log lines with a timestamp equal to or later than this ISO 8601 string
+        until: Only keep log lines with a timestamp earlier than this ISO 8601 string
+        compress: Compress the data in transit, not used if the commands need a pty (sudo)
+        chunk_size: How many bytes to read from the channel at once
+        max_line: Longest line in bytes that is never split between passes
+        **kwargs: ``ensure_host``, ``ensure_user`` and ``container``, see
+            :py:meth:`SSHClient.run_command`
+
+    Usage:
+
+        .. code-block:: python
+
+            stream = RemoteLogStream(
+                appliance.ssh_client, ['/var/www/miq/vmdb/log/evm.log'], patterns=['ERROR'])
+            errors = list(stream)
+            # ... and later, only the errors logged in the meantime
+            new_errors = list(stream)
+    """
+    def __init__(self, ssh_client, remote_files, patterns=None, since=None, until=None,
+                 compress=True, chunk_size=256 * 1024, max_line=1024 * 1024, **kwargs):
+        self.ssh_client = ssh_client
+        self.remote_files = list(remote_files)
+        self.patterns = list(patterns or [])
+        self.since = since
+        self.until = until
+        self.compress = compress
+        self.chunk_size = chunk_size
+        self.max_line = max_line
+        self.command_kwargs = kwargs
+        # bytes of each file that were already streamed
+        self.offsets = {}
+
+    def skip_to_end(self):
+        """Only stream what is appended to the files from now on
+
+        A line still being written is not skipped, it's streamed once it's complete.
+        """
+        self.offsets.update(
+            (name, end) for name, (size, end) in self._file_ends().items())
+
+    def _file_ends(self):
+        """Size of each file and the offset just past its last complete line
+
+        Only the part of the file that was not streamed yet is searched for the last newline,
+        and only its last ``max_line`` bytes. Gzipped files are always read whole.
+        """
+        checks = []
+        for remote_file in self.remote_files:
+            plain = not remote_file.endswith('.gz')
+            checks.append(
+                'f={file}; if s=$(stat -c %s "$f" 2>/dev/null); then e=$s; o={offset}; '
+                '[ "$s" -lt "$o" ] && o=0; w=$((s - o)); [ "$w" -gt {max_line} ] && w={max_line}; '
+                'if [ {plain} = 1 ] && [ "$w" -gt 0 ]; then '
+                # hex of the last line, without a trailing newline it's only a part of one
+                't=$(tail -c +$((s - w + 1)) "$f" | head -c "$w" | tail -n 1 | od -An -v -tx1 '
+                '| tr -d " \\n"); case $t in *0a) ;; *) e=$((s - ${{#t}} / 2));; esac; fi; '
+                'echo "$s $e $f"; fi'.format(
+                    file=quote(remote_file), offset=self.offsets.get(remote_file, 0),
+                    max_line=self.max_line, plain=int(plain)))
+        result = self.ssh_client.run_command('; '.join(checks), **self.command_kwargs)
+        ends = {}
+        for line in result.output.splitlines():
+            fields = line.strip().split(' ', 2)
+            if len(fields) == 3 and fields[0].isdigit() and fields[1].isdigit():
+                ends[fields[2]] = (int(fields[0]), int(fields[1]))
+        return ends
+
+    def _pipeline(self, ends, compress):
+        readers = []
+        for remote_file in self.remote_files:
+            if remote_file not in ends:
+                continue
+            size, end = ends[remote_file]
+            offset = self.offsets.get(remote_file, 0)
+            if offset > size:
+                # truncated or rotated, start over
+                offset = 0
+            if end == offset:
+                continue
+            if remote_file.endswith('.gz'):
+                readers.append('zcat {}'.format(quote(remote_file)))
+                continue
+            # only up to the last complete line we saw, so the offsets stay exact while the file
+            # grows and a line being written is streamed whole on the next pass
+            readers.append('tail -c +{} {} | head -c {}'.format(
+                offset + 1, quote(remote_file), end - offset))
+        if not readers:
+            return None
+        pipeline = ['{{ {}; }}'.format('; '.join(readers))]
+        if self.patterns:
+            pipeline.append('grep -a -E {}'.format(
+                ' '.join('-e {}'.format(quote(pattern)) for pattern in self.patterns)))
+        if self.since or self.until:
+            pipeline.append(
+                'awk -v since={} -v until={} \'match($0, {}) {{ '
+                'ts = substr($0, RSTART + 1, RLENGTH - 1); '
+                'keep = (since == "" || ts >= since) && (until == "" || ts < until) }} '
+                'keep\''.format(
+                    quote(self.since or ''), quote(self.until or ''), _LOG_TIMESTAMP_AWK))
+        if compress:
+            pipeline.append('gzip -1 -c')
+        return ' | '.join(pipeline)
+
+    def __iter__(self):
+        ends = self._file_ends()
+        compress = self.compress
+        pipeline = self._pipeline(ends, compress)
+        if pipeline is None:
+            return
+        command, uses_sudo = self.ssh_client._wrap_command(pipeline, **self.command_kwargs)
+        if uses_sudo and compress:
+            # a pty would mangle the compressed data
+            compress = False
+            command, uses_sudo = self.ssh_client._wrap_command(
+                self._pipeline(ends, compress), **self.command_kwargs)
+        logger.info("Streaming remote lines with %r", command)
+        # gzip header detection, then incremental decompression
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if compress else None
+        remainder = b''
+        ssh = self.ssh_client
+        with transport_pool.session_slot(ssh._pool_key if ssh._pooled else None):
+            session = ssh.get_transport().open_session()
+            try:
+                if uses_sudo:
+                    session.get_pty()
+                session.exec_command(command + '\n')
+                while True:
+                    data = session.recv(self.chunk_size)
+                    if not data:
+                        break
+                    if decompressor is not None:
+                        data = decompressor.decompress(data)
+                    lines = (remainder + data).split(b'\n')
+                    remainder = lines.pop()
+                    for line in lines:
+                        yield line.rstrip(b'\r').decode('utf-8', 'replace')
+                if decompressor is not None:
+                    remainder += decompressor.flush()
+                if remainder:
+                    yield remainder.rstrip(b'\r').decode('utf-8', 'replace')
+                exit_status = session.recv_exit_status()
+                # grep exits with 1 when nothing matched
+                if exit_status > 1:
+                    logger.warning('Streaming remote lines exited with %d', exit_status)
+            finally:
+                session.close()
+        self.offsets.update((name, end) for name, (size, end) in ends.items())
+
+
 def keygen():
     """Generate temporary ssh keypair for appliance SSH auth
 
@@ -0,0 +1,193 @@
+"""Grouping of similar tracebacks, used for the "Top 10 Exceptions" view of the artifactor reporter
+
+Tracebacks are normalized first, replacing memory addresses, uuids, timestamps, test parameters
+and numbers with placeholders, so the same failure hit by different tests, VMs or runs reads the
+same. Tracebacks with the same exception type, the same frames (source file and function,
+ignoring line numbers) and the same normalized exception message are put into the same group
+right away. Only the first traceback of a new fingerprint is compared with the existing groups,
+using MinHash signatures of the normalized text bucketed by locality sensitive hashing, so it's
+only compared with the groups that are likely to be similar instead of with all of them.
+
+Usage:
+
+    .. code-block:: python
+
+        clusters = TracebackClusters()
+        for test_name, short_tb in failures:
+            clusters.add(short_tb, test_name)
+        for group in clusters.top(10):
+            print(len(group), group[0])
+"""
+import random
+import re
+import zlib
+from collections import defaultdict
+
+from six.moves import range
+
+_NORMALIZERS = [
+    (re.compile(r'\b[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}\b'), '<uuid>'),
+    (re.compile(r'0x[0-9a-fA-F]+'), '<addr>'),
+    (re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'),
+     '<time>'),
+    (re.compile(r'\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b'), '<time>'),
+    # Test parameters, eg. test_provision[rhv41-vm_name0]
+    (re.compile(r'\[[^\]\n]*\]'), '[]'),
+    # Generated names, eg. test-vm-a1b2c3
+    (re.compile(r'\b(?=[a-zA-Z]*\d)(?=\d*[a-zA-Z])[a-zA-Z\d]{5,}\b'), '<id>'),
+    (re.compile(r'\d+'), 'N'),
+]
+
+# pytest ("cfme/utils/wait.py:123: in wait_for", "cfme/utils/wait.py:123: TimedOutError") and
+# python ('File "cfme/utils/wait.py", line 123, in wait_for') frames
+_FRAME = re.compile(
+    r'^\s*(?:([^\s:]+\.py):\d+: (?:in )?(\w+)|File "([^"]+)", line \d+, in (\w+))', re.M)
+_EXCEPTION_TYPE = re.compile(
+    r'^(?:E\s+)?((?:[A-Za-z_]\w*\.)*[A-Za-z_]\w*(?:Error|Exception|Failed|Failure|Exit))\b', re.M)
+_TOKEN = re.compile(r'\w+|[^\w\s]')
+
+# Mersenne prime for the universal hash functions of the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+
+def normalize(traceback):
+    """Replace the parts of a traceback that differ between occurrences of the same failure"""
+    for pattern, replacement in _NORMALIZERS:
+        traceback = pattern.sub(replacement, traceback)
+    return traceback
+
+
+def frame_signature(traceback):
+    """Tuple of the ``(file, function)`` of the frames in a traceback, line numbers left out"""
+    return tuple(
+        (match.group(1) or match.group(3), match.group(2) or match.group(4))
+        for match in _FRAME.finditer(traceback))
+
+
+def exception_type(traceback):
+    """Name of the last exception type found in a traceback, or ``None``"""
+    names = _EXCEPTION_TYPE.findall(traceback)
+    return names[-1] if names else None
+
+
+def exception_message(traceback, exc_type=None):
+    """Message of the exception of a traceback
+
+    In the short tracebacks of the reporter it's what follows the line with the name of the
+    exception type, otherwise it's the last line.
+    """
+    lines = traceback.strip().splitlines()
+    if exc_type:
+        name = exc_type.rpartition('.')[2]
+        for index in range(len(lines) - 1, -1, -1):
+            if lines[index].strip() == name:
+                return '\n'.join(lines[index + 1:]).strip()
+    return lines[-1].strip() if lines else ''
+
+
+def shingles(text, size=3):
+    """Set of the runs of ``size`` consecutive tokens of a text"""
+    tokens = _TOKEN.findall(text)
+    if len(tokens) <= size:
+        return {' '.join(tokens)}
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher(object):
+    """Computes MinHash signatures, the share of equal values of two signatures estimates the
+    Jaccard similarity of the sets they were computed from
+
+    Args:
+        num_perm: Number of hash functions, the length of the signatures
+        seed: Seed of the hash functions, signatures are only comparable with the same seed
+    """
+    def __init__(self, num_perm=50, seed=1):
+        rand = random.Random(seed)
+        self.permutations = [
+            (rand.randint(1, _PRIME - 1), rand.randint(0, _PRIME - 1)) for _ in range(num_perm)]
+
+    def signature(self, items):
+        hashes = [zlib.crc32(item.encode('utf-8')) & 0xffffffff for item in items] or [0]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self.permutations)
+
+    @staticmethod
+    def similarity(signature, other):
+        return sum(1 for a, b in zip(signature, other) if a == b) / float(len(signature))
+
+
+class TracebackClusters(object):
+    """Groups of similar tracebacks
+
+    Args:
+        threshold: Estimated similarity of the normalized texts above which a traceback joins a
+            group of a different fingerprint
+        bands: Number of LSH bands the signatures are split into
+        rows: Number of signature values in a band, with the default 10 bands of 5 rows groups
+            of about 0.63 similarity become candidates for the threshold check
+
+    Attributes:
+        clusters: The groups, lists of the ``(traceback, test_name)`` tuples in the order
+            they were added
+    """
+    def __init__(self, threshold=0.7, bands=10, rows=5):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.minhasher = MinHasher(bands * rows)
+        self.clusters = []
+        self._by_fingerprint = {}
+        # Signature of the first traceback of each group and the LSH buckets of the groups
+        self._signatures = []
+        self._buckets = defaultdict(list)
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def add(self, traceback, test_name, exc_type=None):
+        """Add a traceback to the group it's similar to, or to a new group
+
+        Args:
+            traceback: Text of the traceback
+            test_name: Name of the test that failed with it
+            exc_type: Name of the exception type if known, it's looked up in the traceback if not
+
+        Returns:
+            The index of the group in :py:attr:`clusters`
+        """
+        normalized = normalize(traceback)
+        exc_type = exc_type or exception_type(traceback)
+        # The short tracebacks only have the frame that raised, the message tells apart the
+        # different failures raised from the same place, eg. the TimedOutErrors of wait_for
+        fingerprint = (exc_type, frame_signature(traceback) or normalized,
+                       normalize(exception_message(traceback, exc_type)))
+        index = self._by_fingerprint.get(fingerprint)
+        if index is None:
+            signature = self.minhasher.signature(shingles(normalized))
+            bands = [(exc_type, band, signature[band * self.rows:(band + 1) * self.rows])
+                     for band in range(self.bands)]
+            index = self._nearest(signature, bands)
+            if index is None:
+                index = len(self.clusters)
+                self.clusters.append([])
+                self._signatures.append(signature)
+                for band in bands:
+                    self._buckets[band].append(index)
+            self._by_fingerprint[fingerprint] = index
+        self.clusters[index].append((traceback, test_name))
+        return index
+
+    def _nearest(self, signature, bands):
+        candidates = set()
+        for band in bands:
+            candidates.update(self._buckets.get(band, ()))
+        nearest, nearest_similarity = None, self.threshold
+        for index in sorted(candidates):
+            similarity = self.minhasher.similarity(signature, self._signatures[index])
+            if similarity >= nearest_similarity and (
+                    nearest is None or similarity > nearest_similarity):
+                nearest, nearest_similarity = index, similarity
+        return nearest
+
+    def top(self, n):
+        """The ``n`` largest groups, largest first, ties in the order the groups were created"""
+        return sorted(self.clusters, key=len, reverse=True)[:n]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+
+import pytest
+
+from cfme.utils.log import ArtifactorHandler
+
+
+class StubArtifactor(object):
+    """Sends the hooks as JSON like the rigger client, which gives up silently on errors"""
+    def __init__(self):
+        self.records = []
+
+    def fire_hook(self, hook_name, **kwargs):
+        try:
+            data = json.loads(json.dumps(kwargs))
+        except Exception:
+            return None
+        self.records.extend(data['log_records'])
+
+
+@pytest.fixture
+def shipping_logger():
+    handler = ArtifactorHandler()
+    handler.artifactor = StubArtifactor()
+    handler.start_shipping(flush_interval=60)
+    test_logger = logging.getLogger('cfme.test_artifactor_handler')
+    test_logger.propagate = False
+    test_logger.addHandler(handler)
+    yield test_logger, handler
+    test_logger.removeHandler(handler)
+    handler.stop_shipping()
+
+
+def test_exception_records_shipped(shipping_logger):
+    test_logger, handler = shipping_logger
+    test_logger.error('before %s', 'the exception')
+    try:
+        raise ValueError('shipped traceback')
+    except ValueError:
+        test_logger.exception('failed')
+    test_logger.error('after the exception')
+    handler.flush(10)
+
+    records = handler.artifactor.records
+    assert [record['msg'] for record in records] == [
+        'before the exception', 'failed', 'after the exception']
+    assert records[1]['exc_info'] is None
+    assert 'ValueError: shipped traceback' in records[1]['exc_text']
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+import pytest
+from bugzilla import Bugzilla as PythonBugzilla
+from bugzilla.bug import Bug
+
+from cfme.utils.blocker_cache import BlockerCache
+from cfme.utils.bz import Bugzilla
+
+
+class StubBug(object):
+    def __init__(self, id, status='NEW', resolution='', dupe_of=None, blocks=(), copy_of=None):
+        self.id = id
+        self.status = status
+        self.resolution = resolution
+        self.dupe_of = dupe_of
+        self.blocks = list(blocks)
+        text = ('+++ This bug was initially created as a clone of Bug #{} +++'.format(copy_of)
+                if copy_of else 'Description')
+        self.comments = [{'text': text}]
+
+
+class StubTracker(object):
+    """Stands in for python-bugzilla, recording the queries"""
+    url = 'https://bugzilla.example.com/xmlrpc.cgi'
+
+    def __init__(self, bugs):
+        self.bugs = {bug.id: bug for bug in bugs}
+        self.queries = []
+
+    def getbug(self, id):
+        self.queries.append([id])
+        return self.bugs[id]
+
+    def getbugs(self, ids, permissive=True):
+        self.queries.append(list(ids))
+        return [self.bugs.get(id) for id in ids]
+
+
+BUGS = [
+    StubBug(1, blocks=[2, 3]),
+    # 2 is a copy of 1, 3 is only blocked by it
+    StubBug(2, copy_of=1, blocks=[4]),
+    StubBug(3, blocks=[5]),
+    StubBug(4, status='CLOSED', resolution='DUPLICATE', dupe_of=6, copy_of=2),
+    StubBug(5),
+    StubBug(6),
+    StubBug(7),
+]
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return BlockerCache(path=tmpdir.strpath, ttl=60)
+
+
+def bugzilla(cache, tracker):
+    bz = Bugzilla(url=tracker.url, cache=cache)
+    # Skip connecting, the connection is a cached property
+    bz.__dict__['bugzilla'] = tracker
+    return bz
+
+
+def test_cache_expires(cache):
+    cache.set('tracker', 'owner/repo:1', {'state': 'open'})
+    assert cache.get('tracker', 'owner/repo:1') == {'state': 'open'}
+    cache_file = cache._file('tracker', 'owner/repo:1')
+    os.utime(cache_file.strpath, (time.time() - 120, time.time() - 120))
+    assert cache.get('tracker', 'owner/repo:1') is None
+    assert cache.get('tracker', 'owner/repo:2') is None
+
+
+def test_prefetch_queries_per_level(cache):
+    tracker = StubTracker(BUGS)
+    bz = bugzilla(cache, tracker)
+    bz.prefetch([1, 7])
+    # The blocked bugs are checked for being copies, only the copy is followed further
+    assert tracker.queries == [[1, 7], [2, 3], [4], [6]]
+
+    variants = {bug.id for bug in bz.get_bug_variants(1)}
+    assert variants == {1, 2, 4, 6}
+    assert len(tracker.queries) == 4
+
+
+def test_bugs_shared_through_cache(cache):
+    bugzilla(cache, StubTracker(BUGS)).prefetch([1])
+    tracker = StubTracker(BUGS)
+    bz = bugzilla(cache, tracker)
+    assert bz.get_bug(2).copy_of == 1
+    bz.prefetch([1])
+    assert tracker.queries == []
+
+
+def connection():
+    """A python-bugzilla connection that never connects"""
+    tracker = PythonBugzilla(url=None)
+    tracker.url = StubTracker.url
+    return tracker
+
+
+def test_cached_bugs_bound_to_connection(cache):
+    fetched = connection()
+    fetched_bug = Bug(
+        fetched, dict={'id': 1, 'status': 'NEW', 'summary': 'Cached', 'assigned_to': 'me'})
+    fetched.getbugs = lambda ids, permissive: [fetched_bug]
+    bugzilla(cache, fetched).get_bugs([1])
+
+    tracker = connection()
+    bug = bugzilla(cache, tracker).get_bug(1)._bug
+    # Unpickled bugs lose their connection, the aliases and representations need it
+    assert bug is not fetched_bug
+    assert bug.bugzilla is tracker
+    assert bug.bug_status == 'NEW'
+    assert 'Cached' in str(bug)
+    assert StubTracker.url in repr(bug)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import re
+
+import pytest
+
+from cfme.utils.log_validator import _PatternMatcher
+
+SKIP = ['.*PARTICULAR_ERROR']
+FAILURE = ['.*ERROR', '.*FATAL']
+MATCHED = ['.*Provisioning', '.*Provisioning complete', r'.*(\d+) VMs']
+
+
+def naive(line, skip=SKIP, failure=FAILURE, matched=MATCHED):
+    for kind, patterns in (('skip', skip), ('failure', failure)):
+        for pattern in patterns:
+            if re.match(pattern, line):
+                return kind, [pattern]
+    hits = [pattern for pattern in matched if re.match(pattern, line)]
+    return ('matched', hits) if hits else (None, [])
+
+
+@pytest.mark.parametrize('combine', [True, False], ids=['combined', 'separate'])
+@pytest.mark.parametrize('line', [
+    'INFO nothing to see',
+    'ERROR PARTICULAR_ERROR happened',
+    'ERROR something else',
+    'FATAL Provisioning',
+    'INFO Provisioning complete for 3 VMs',
+    'INFO Provisioning started',
+])
+def test_pattern_matcher_same_as_sequential_matching(line, combine):
+    matcher = _PatternMatcher(SKIP, FAILURE, MATCHED)
+    if not combine:
+        matcher.combined = None
+    assert matcher.match(line) == naive(line)
+
+
+def test_pattern_matcher_backreference_not_combined():
+    matcher = _PatternMatcher([], [r'(\w+) \1'], [])
+    assert matcher.combined is None
+    assert matcher.match('again again') == ('failure', [r'(\w+) \1'])
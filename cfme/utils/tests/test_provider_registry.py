@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from cfme.utils import providers
+from cfme.utils.providers import ProviderFilter, ProviderRegistry
+
+
+class StubEndpoint(object):
+    def __init__(self, hostname):
+        self.hostname = hostname
+
+
+class StubProvider(object):
+    def __init__(self, key):
+        self.key = key
+        self.data = providers.providers_data[key]
+        self.endpoints = {'default': StubEndpoint(self.data['hostname'])}
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    appliances = [object()]
+    built = []
+
+    def get_crud(provider_key):
+        built.append(provider_key)
+        return StubProvider(provider_key)
+
+    registry = ProviderRegistry()
+    monkeypatch.setattr(providers, 'provider_registry', registry)
+    monkeypatch.setattr(providers, 'get_or_create_current_appliance', lambda: appliances[-1])
+    monkeypatch.setattr(providers, 'get_crud', get_crud)
+    monkeypatch.setattr(providers, 'providers_data', {
+        'rhv': {'hostname': 'rhv.example.com', 'tags': ['ui']},
+        'vsphere': {'hostname': 'vsphere.example.com'},
+    })
+    registry.appliances = appliances
+    registry.built = built
+    return registry
+
+
+def test_cruds_built_once_per_appliance(registry):
+    ui_filter = ProviderFilter(required_tags=['ui'])
+    for _ in range(3):
+        assert [prov.key for prov in providers.list_providers(use_global_filters=False)] == [
+            'rhv', 'vsphere']
+        assert [prov.key for prov in providers.list_providers(
+            filters=[ui_filter], use_global_filters=False)] == ['rhv']
+    assert sorted(registry.built) == ['rhv', 'vsphere']
+
+    registry.appliances.append(object())
+    providers.list_providers(filters=[ui_filter], use_global_filters=False)
+    assert sorted(registry.built) == ['rhv', 'rhv', 'vsphere', 'vsphere']
+
+
+def test_listed_providers_isolated(registry):
+    provider, = providers.list_providers(filters=[ProviderFilter(keys=['rhv'])],
+                                         use_global_filters=False)
+    provider.endpoints['default'].hostname = 'changed.example.com'
+    provider.endpoints['candu'] = StubEndpoint('candu.example.com')
+    provider, = providers.list_providers(filters=[ProviderFilter(keys=['rhv'])],
+                                         use_global_filters=False)
+    assert provider.endpoints['default'].hostname == 'rhv.example.com'
+    assert list(provider.endpoints) == ['default']
@@ -32,3 +32,51 @@ def test_scp_client_can_put_a_file(appliance, tmpdir):
     assert "content" in tmpfile.read()
     # Clean up the server
     appliance.ssh_client.run_command("rm -f /tmp/{}".format(tmpfile.basename))
+
+
+def test_ssh_client_run_commands(appliance):
+    # A batch runs in one round trip but gives separate results, like separate run_commands
+    results = appliance.ssh_client.run_commands([
+        'echo first',
+        'cd /tmp; false',
+        'pwd; printf "no newline"',
+    ])
+    assert [result.rc for result in results] == [0, 1, 0]
+    assert results[0].output == 'first\n'
+    assert results[1].output == ''
+    assert '/tmp' not in results[2].output
+    assert results[2].output.endswith('no newline')
+
+
+def test_ssh_client_run_commands_stop_on_error(appliance):
+    results = appliance.ssh_client.run_commands(
+        ['true', 'exit 3', 'echo never'], stop_on_error=True)
+    assert [result.rc for result in results] == [0, 3]
+
+
+def test_ssh_client_run_command_batches(appliance):
+    batches = [['echo {}'.format(i), 'echo {}'.format(i * 2)] for i in range(3)]
+    results = appliance.ssh_client.run_command_batches(batches)
+    assert [[r.output.strip() for r in batch] for batch in results] == [
+        ['0', '0'], ['1', '2'], ['2', '4']]
+
+
+def test_ssh_client_stream_lines(appliance):
+    ssh_client = appliance.ssh_client
+    remote_file = '/tmp/test_stream_lines.log'
+    ssh_client.run_command(
+        'printf "one ERROR\\ntwo INFO\\nthree ERROR\\n" > {}'.format(remote_file))
+    try:
+        stream = ssh_client.stream_lines([remote_file], patterns=['ERROR'])
+        assert list(stream) == ['one ERROR', 'three ERROR']
+        # only what was appended is streamed on the next pass
+        assert list(stream) == []
+        ssh_client.run_command('echo "four ERROR" >> {}'.format(remote_file))
+        assert list(stream) == ['four ERROR']
+        # a line still being written is held back until it's complete
+        ssh_client.run_command('printf "five ER" >> {}'.format(remote_file))
+        assert list(stream) == []
+        ssh_client.run_command('printf "ROR\\n" >> {}'.format(remote_file))
+        assert list(stream) == ['five ERROR']
+    finally:
+        ssh_client.run_command('rm -f {}'.format(remote_file))
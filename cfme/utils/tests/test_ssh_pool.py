@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from cfme.utils import ssh
+
+KEY = ('appliance.example.com', 22, 'root', None)
+
+
+class FakeTransport(object):
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def send_ignore(self):
+        if not self.active:
+            raise EOFError()
+
+    def set_keepalive(self, interval):
+        pass
+
+
+class FakeParamikoClient(object):
+    connections = 0
+
+    def set_missing_host_key_policy(self, policy):
+        pass
+
+    def connect(self, **kwargs):
+        FakeParamikoClient.connections += 1
+        self.transport = FakeTransport()
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.transport.active = False
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(ssh.paramiko, 'SSHClient', FakeParamikoClient)
+    FakeParamikoClient.connections = 0
+    pool = ssh.SSHTransportPool(enabled=True, idle_timeout=300)
+    yield pool
+    pool.close_all()
+
+
+def test_transport_reused_after_release(pool):
+    transport = pool.acquire(KEY, {})
+    pool.release(KEY, transport)
+    assert pool.acquire(KEY, {}) is transport
+    assert FakeParamikoClient.connections == 1
+
+
+def test_transport_shared_by_concurrent_users(pool):
+    assert pool.acquire(KEY, {}) is pool.acquire(KEY, {})
+    other_user = ('appliance.example.com', 22, 'admin', None)
+    assert pool.acquire(other_user, {}) is not pool.acquire(KEY, {})
+    assert FakeParamikoClient.connections == 2
+
+
+def test_dead_transport_reconnected(pool):
+    transport = pool.acquire(KEY, {})
+    pool.release(KEY, transport)
+    transport.active = False
+    assert pool.acquire(KEY, {}) is not transport
+    assert FakeParamikoClient.connections == 2
+
+
+def test_idle_transport_evicted(pool):
+    pool.idle_timeout = -1
+    transport = pool.acquire(KEY, {})
+    pool.release(KEY, transport)
+    other = pool.acquire(('other.example.com', 22, 'root', None), {})
+    assert not transport.is_active()
+    assert other.is_active()
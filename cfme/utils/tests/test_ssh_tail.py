@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from cfme.utils import ssh
+
+
+class GrowingFile(object):
+    """A local file opened like a remote one, ``written`` is appended on the first read"""
+    def __init__(self, path, written):
+        self._file = open(path, 'rb')
+        self._path = path
+        self._written = written
+
+    def seek(self, offset, whence):
+        self._file.seek(offset, whence)
+
+    def prefetch(self, file_size):
+        pass
+
+    def read(self, size):
+        if self._written:
+            with open(self._path, 'ab') as f:
+                f.write(self._written)
+            self._written = None
+        return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+
+class FakeSFTPClient(object):
+    def __init__(self, written):
+        self.written = written
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def open(self, path, mode):
+        written, self.written = self.written, None
+        return GrowingFile(path, written)
+
+
+class LocalTail(ssh.SSHTail):
+    written = None
+
+    def __enter__(self):
+        self._sftp_client = FakeSFTPClient(self.written)
+        self.written = None
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def tail(tmpdir):
+    log = tmpdir.join('evm.log')
+    log.write_binary(b'old\n')
+    tail = LocalTail(str(log), hostname='appliance.example.com', pooled=False)
+    tail.set_initial_file_end()
+    tail.log = log
+    return tail
+
+
+def test_lines_written_during_pass(tail):
+    tail.log.write(b'one\ntw', mode='ab')
+    tail.written = b'o\nthree\nfou'
+    # the unfinished line is read to its end, with the complete line written after it
+    assert list(tail) == ['one', 'two', 'three']
+    # the next pass starts with what was left unfinished
+    tail.log.write(b'r\nfive\n', mode='ab')
+    assert list(tail) == ['four', 'five']
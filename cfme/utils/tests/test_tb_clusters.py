@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from cfme.utils.tb_clusters import (
+    TracebackClusters, exception_message, exception_type, frame_signature, normalize)
+
+WAIT_TB = """    def wait_for(func, num_sec=120):
+>       raise TimedOutError("Could not do %s in time" % func)
+E       TimedOutError: Could not do <function <lambda> at 0x7f3a2c1d9b90> in time
+cfme/utils/wait.py:{}: TimedOutError
+TimedOutError
+Could not do <function <lambda> at {}> in time"""
+
+TIMEOUT_TB = """    def wait_for_element(self, locator, timeout=10):
+>       raise NoSuchElementException("Could not find locator %s" % locator)
+E       NoSuchElementException: Could not find locator {}
+widgetastic/browser.py:{}: NoSuchElementException
+NoSuchElementException
+Could not find locator {}"""
+
+WAIT_FOR_LONGREPR = """            if not silent_fail:
+                logger.error("Couldn't complete %%r at %%s:%%d in time", message, filename, line_no)
+>               raise TimedOutError("Could not do %%r at %%s:%%d in time" %% (
+                    message, filename, line_no))
+E               TimedOutError: %s
+
+cfme/utils/wait.py:%d: TimedOutError"""
+
+
+def short_tb(longrepr, exc_type, value):
+    """The short traceback of a failure, built like in cfme.fixtures.browser"""
+    last_lines = "\n".join(longrepr.split("\n")[-4:])
+    return '{}\n{}\n{}'.format(last_lines, exc_type, value)
+
+
+def test_normalize():
+    assert normalize(
+        "vm test-vm-a1b2c3 at 0x7f3a2c1d9b90 2018-03-01 12:30:45 "
+        "5a1b2c3d-1234-5678-9abc-def012345678 test_provision[rhv41-small] 1234") == (
+        "vm test-vm-<id> at <addr> <time> <uuid> test_provision[] N")
+
+
+def test_frame_signature_and_exception_type():
+    tb = WAIT_TB.format(123, '0x7f3a2c1d9b90')
+    assert frame_signature(tb) == (('cfme/utils/wait.py', 'TimedOutError'),)
+    assert exception_type(tb) == 'TimedOutError'
+
+
+def test_same_failure_clustered():
+    clusters = TracebackClusters()
+    for i in range(20):
+        clusters.add(WAIT_TB.format(100 + i, hex(0x7f3a2c1d0000 + i)), 'test_{}'.format(i))
+    for i in range(5):
+        locator = '#button_{}'.format(i)
+        clusters.add(TIMEOUT_TB.format(locator, 200 + i, locator), 'test_ui_{}'.format(i))
+    assert len(clusters) == 2
+    assert [len(group) for group in clusters.top(10)] == [20, 5]
+    assert clusters.top(1)[0][0] == (WAIT_TB.format(100, hex(0x7f3a2c1d0000)), 'test_0')
+
+
+def test_near_duplicates_without_frames_clustered():
+    clusters = TracebackClusters()
+    first = clusters.add(
+        'AssertionError: The number of VMs on the provider page does not match '
+        'the number of VMs reported by the provider api, 12 != 13', 'test_a')
+    second = clusters.add(
+        'AssertionError: The number of VMs on the provider page does not match '
+        'the number of VMs reported by the provider REST api, 12 != 14', 'test_b')
+    other = clusters.add('ValueError: Unknown provider type', 'test_c')
+    assert first == second
+    assert other != first
+
+
+def test_failures_raised_from_the_same_place_told_apart():
+    clusters = TracebackClusters()
+    waits = [
+        "Could not do 'VM to appear' at cfme/tests/infrastructure/test_provisioning.py:%d in time",
+        "Could not do 'Host power state to be on' at cfme/tests/infrastructure/test_host.py:%d "
+        "in time",
+    ]
+    groups = []
+    for message in waits:
+        for i in range(3):
+            value = message % (100 + i)
+            tb = short_tb(WAIT_FOR_LONGREPR % (value, 150), 'TimedOutError', value)
+            groups.append(clusters.add(tb, 'test_{}'.format(i), exc_type='TimedOutError'))
+    assert exception_message(tb, 'TimedOutError') == value
+    assert groups == [0, 0, 0, 1, 1, 1]
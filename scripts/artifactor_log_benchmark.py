@@ -0,0 +1,102 @@
+#!/usr/bin/env python2
+"""Benchmark of the log handler shipping records to the artifactor
+
+Logs records through an :py:class:`cfme.utils.log.ArtifactorHandler`, once sending every record
+right away and once shipping them in batches from the background thread, and reports the
+throughput and the time each logging call took. The artifactor is simulated by a client that
+spends a fixed time per hook call, standing in for the round trip to the artifactor server.
+"""
+import argparse
+import logging
+import time
+
+from tabulate import tabulate
+
+from cfme.utils.log import ArtifactorHandler
+
+
+class SimulatedClient(object):
+    """Stands in for the artifactor client, each hook call takes ``round_trip`` seconds"""
+    def __init__(self, round_trip):
+        self.round_trip = round_trip
+        self.calls = 0
+        self.records = 0
+
+    def fire_hook(self, hook_name, **kwargs):
+        self.calls += 1
+        self.records += len(kwargs['log_records']) if hook_name == 'log_messages' else 1
+        # Busy wait, sleep() is too coarse for round trips of tens of microseconds
+        end = time.time() + self.round_trip
+        while time.time() < end:
+            pass
+
+    def __nonzero__(self):
+        return True
+    __bool__ = __nonzero__
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run(records, round_trip, shipping):
+    client = SimulatedClient(round_trip)
+    handler = ArtifactorHandler()
+    handler.artifactor = client
+    if shipping is not None:
+        handler.start_shipping(**shipping)
+    bench_logger = logging.getLogger('artifactor-benchmark')
+    bench_logger.propagate = False
+    bench_logger.setLevel(logging.DEBUG)
+    bench_logger.handlers = [handler]
+
+    latencies = []
+    start = time.time()
+    for i in range(records):
+        before = time.time()
+        bench_logger.debug('benchmark record %d of %d', i, records)
+        latencies.append(time.time() - before)
+    logged = time.time()
+    handler.stop_shipping()
+    shipped = time.time()
+
+    assert client.records + handler.dropped == records
+    latencies.sort()
+    return [
+        'sync' if shipping is None else 'batched ({overflow})'.format(**shipping),
+        int(records / (shipped - start)),
+        round(logged - start, 3),
+        round(shipped - start, 3),
+        round(sum(latencies) / len(latencies) * 1e6, 1),
+        round(percentile(latencies, 0.5) * 1e6, 1),
+        round(percentile(latencies, 0.99) * 1e6, 1),
+        client.calls,
+        handler.dropped,
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000, help='Number of records to log')
+    parser.add_argument('--round-trip', type=float, default=100,
+                        help='Simulated round trip to the artifactor, in microseconds')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--flush-interval', type=float, default=0.5)
+    parser.add_argument('--max-queue', type=int, default=10000)
+    args = parser.parse_args()
+
+    round_trip = args.round_trip / 1e6
+    results = [run(args.records, round_trip, None)]
+    for overflow in ('block', 'drop'):
+        results.append(run(args.records, round_trip, dict(
+            batch_size=args.batch_size, flush_interval=args.flush_interval,
+            max_queue=args.max_queue, overflow=overflow)))
+    print(tabulate(
+        results,
+        headers=['Mode', 'Records/s', 'Logging s', 'Shipped s', 'Mean us', 'p50 us', 'p99 us',
+                 'Hook calls', 'Dropped'],
+        tablefmt='orgtbl'))
+
+
+if __name__ == '__main__':
+    main()
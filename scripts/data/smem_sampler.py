@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""Samples the memory usage of an appliance and of its processes at a fixed cadence.
+
+Runs on the appliance, deployed and started by
+:py:class:`cfme.utils.smem_memory_monitor.ApplianceSampler`. Every sample is appended to the
+output file as a single line of json:
+
+* ``time``: the time of the sample, seconds since the epoch
+* ``meminfo``: the relevant values of ``/proc/meminfo`` in kB
+* ``procs``: pid to ``[rss, pss, uss, vss, swap]`` in kB, as reported by smem
+* ``new``: pid to ``[name, command]`` for the processes not seen before (or whose pid was reused)
+* ``workers``: pid to type of the evm workers of the server, when they changed
+* ``full``: set on the first sample and every ``--full-interval`` seconds, these samples have
+  the ``new`` names of all the sampled processes and the ``workers``, so a reader that starts
+  reading in the middle of the file knows all of them from there on
+
+Only the standard library is used, so it runs with any python found on the appliance.
+"""
+import argparse
+import json
+import os
+import subprocess
+import time
+
+MEMINFO_KEYS = ('MemTotal', 'MemFree', 'MemAvailable', 'Buffers', 'Cached', 'Slab', 'SwapTotal',
+                'SwapFree')
+
+
+def meminfo():
+    values = {}
+    with open('/proc/meminfo') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in MEMINFO_KEYS:
+                values[key] = int(value.split()[0])
+    return values
+
+
+def processes():
+    output = subprocess.check_output(['smem', '-c', 'pid rss pss uss vss swap name command'])
+    for line in output.decode('utf-8', 'replace').splitlines()[1:]:
+        values = line.split()
+        if len(values) < 7 or not values[0].isdigit():
+            continue
+        yield values[0], [int(value) for value in values[1:6]], values[6], ' '.join(values[7:])
+
+
+def workers(server_id):
+    output = subprocess.check_output([
+        'psql', '-t', '-q', '-d', 'vmdb_production', '-c',
+        "select pid,type from miq_workers where miq_server_id = '{}'".format(server_id)])
+    result = {}
+    for line in output.decode('utf-8', 'replace').splitlines():
+        pid_worker = [value.strip() for value in line.split('|')]
+        if len(pid_worker) == 2:
+            result[pid_worker[0]] = pid_worker[1]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help='File to append the samples to')
+    parser.add_argument('--interval', type=float, default=10, help='Seconds between samples')
+    parser.add_argument('--server-id', help='Id of the miq server to sample the workers of')
+    parser.add_argument('--workers-interval', type=float, default=10,
+                        help='Seconds between queries of the workers')
+    parser.add_argument('--full-interval', type=float, default=60,
+                        help='Seconds between samples with the names of all processes')
+    args = parser.parse_args()
+
+    fd = os.open(args.output, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    known = {}
+    last_workers = None
+    next_workers = 0
+    next_full = 0
+    next_sample = time.time()
+    while True:
+        now = time.time()
+        full = now >= next_full
+        if full:
+            next_full = now + args.full_interval
+        sample = {'time': round(now, 3), 'meminfo': meminfo(), 'procs': {}}
+        new = {}
+        for pid, memory, name, command in processes():
+            sample['procs'][pid] = memory
+            if full or known.get(pid) != (name, command):
+                known[pid] = (name, command)
+                new[pid] = [name, command]
+        if new:
+            sample['new'] = new
+        if args.server_id and (full or now >= next_workers):
+            next_workers = now + args.workers_interval
+            current_workers = workers(args.server_id)
+            if full or current_workers != last_workers:
+                sample['workers'] = last_workers = current_workers
+        if full:
+            sample['full'] = True
+        # One write per sample, a reader joins a line it read while it was being written
+        os.write(fd, (json.dumps(sample, separators=(',', ':')) + '\n').encode('utf-8'))
+
+        next_sample += args.interval
+        delay = next_sample - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Sampling took longer than the interval, don't try to catch up
+            next_sample = time.time()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+import yaml
+from django.db import migrations, models
+
+METADATA_MODELS = [
+    'DelayedProvisionTask', 'Provider', 'Group', 'GroupShepherd', 'Template', 'Appliance',
+    'AppliancePool']
+
+
+def metadata_to_json(apps, schema_editor):
+    for model_name in METADATA_MODELS:
+        model = apps.get_model("appliances", model_name)
+        objects = model.objects.using(schema_editor.connection.alias)
+        for pk, raw in objects.values_list('pk', 'object_meta_data').iterator():
+            # Need to replicate the functionality from the model here
+            try:
+                json.loads(raw)
+                continue
+            except ValueError:
+                pass
+            try:
+                converted = json.dumps(yaml.load(raw), sort_keys=True)
+            except (TypeError, ValueError):
+                # Not representable in JSON, the model still reads YAML
+                continue
+            # update() leaves modified_on alone, converting is not a modification
+            objects.filter(pk=pk).update(object_meta_data=converted)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appliances', '0048_openshift_project_made_bigger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name=model_name.lower(),
+            name='object_meta_data',
+            field=models.TextField(default='{}'),
+        )
+        for model_name in METADATA_MODELS
+    ] + [
+        migrations.RunPython(metadata_to_json, migrations.RunPython.noop),
+    ]
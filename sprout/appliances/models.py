@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import base64
+import json
 import re
 import yaml
 import six
@@ -16,11 +17,12 @@ from wrapanapi.exceptions import VMInstanceNotFound
 from cached_property import cached_property
 from celery import chain
 from contextlib import contextmanager
+from copy import deepcopy
 from datetime import timedelta, date
 from django.contrib.auth.models import User, Group as DjangoGroup
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import Case, Count, IntegerField, Q, Sum, When
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from django.utils import timezone
@@ -63,10 +65,26 @@ def apply_if_not_none(o, meth, *args, **kwargs):
     return getattr(o, meth)(*args, **kwargs)
 
 
+def load_metadata(raw):
+    """Parses stored metadata; JSON, or YAML for records written before metadata was JSON"""
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return yaml.load(raw)
+
+
+def dump_metadata(value):
+    """Serializes metadata as JSON, values JSON can't represent fall back to YAML"""
+    try:
+        return json.dumps(value, sort_keys=True)
+    except (TypeError, ValueError):
+        return yaml.dump(value)
+
+
 class MetadataMixin(models.Model):
     class Meta:
         abstract = True
-    object_meta_data = models.TextField(default=yaml.dump({}))
+    object_meta_data = models.TextField(default=dump_metadata({}))
     created_on = models.DateTimeField(default=timezone.now, editable=False)
     modified_on = models.DateTimeField(default=timezone.now)
 
@@ -75,6 +93,7 @@ class MetadataMixin(models.Model):
             self.created_on = timezone.now()
         if not kwargs.pop('ignore_modified', False):
             self.modified_on = timezone.now()
+        self._parsed_metadata = None
         return super(MetadataMixin, self).save(*args, **kwargs)
 
     @property
@@ -93,13 +112,23 @@ class MetadataMixin(models.Model):
 
     @property
     def metadata(self):
-        return yaml.load(self.object_meta_data)
+        """The metadata dict, parsed once per stored value
+
+        Every access gets a copy of the parsed dict, still far cheaper than parsing it again;
+        changes are only stored through :py:attr:`edit_metadata` or by assigning a dict.
+        """
+        raw = self.object_meta_data
+        parsed = getattr(self, '_parsed_metadata', None)
+        if parsed is None or parsed[0] != raw:
+            parsed = self._parsed_metadata = (raw, load_metadata(raw))
+        return deepcopy(parsed[1])
 
     @metadata.setter
     def metadata(self, value):
         if not isinstance(value, dict):
             raise TypeError("You can store only dict in metadata!")
-        self.object_meta_data = yaml.dump(value)
+        self.object_meta_data = dump_metadata(value)
+        self._parsed_metadata = None
 
     @property
     @contextmanager
@@ -202,15 +231,22 @@ class Provider(MetadataMixin):
         else:
             return get_mgmt(self.id)
 
+    #: :py:class:`ProviderLoad` to take the counts of appliances and templates from, if attached
+    load_snapshot = None
+
     @property
     def num_currently_provisioning(self):
-        return len(
-            Appliance.objects.filter(
-                ready=False, marked_for_deletion=False, template__provider=self, ip_address=None))
+        if self.load_snapshot is not None:
+            return self.load_snapshot.provisioning.get(self.id, 0)
+        return Appliance.objects.filter(
+            ready=False, marked_for_deletion=False, template__provider=self,
+            ip_address=None).count()
 
     @property
     def num_templates_preparing(self):
-        return len(Template.objects.filter(provider=self, ready=False))
+        if self.load_snapshot is not None:
+            return self.load_snapshot.preparing.get(self.id, 0)
+        return Template.objects.filter(provider=self, ready=False).count()
 
     @property
     def remaining_configuring_slots(self):
@@ -230,7 +266,9 @@ class Provider(MetadataMixin):
 
     @property
     def num_currently_managing(self):
-        return len(Appliance.objects.filter(template__provider=self))
+        if self.load_snapshot is not None:
+            return self.load_snapshot.managing.get(self.id, 0)
+        return Appliance.objects.filter(template__provider=self).count()
 
     @property
     def currently_managed_appliances(self):
@@ -420,6 +458,49 @@ def disable_if_hidden(sender, instance, **kwargs):
         instance.disabled = True
 
 
+class ProviderLoad(object):
+    """Counts of the appliances and templates of all providers, taken at once
+
+    The load and slot properties of :py:class:`Provider` count the rows of one provider at a
+    time. Code going through many providers (or many templates of the same providers) takes a
+    snapshot with two grouped queries instead and attaches it to the provider objects it uses.
+    The counts are not updated by themselves, whoever adds appliances while using the snapshot
+    should record them with :py:meth:`appliance_added`.
+    """
+    def __init__(self):
+        self.provisioning = {}
+        self.managing = {}
+        # The default ordering would be added to the GROUP BY, one row per appliance or template
+        counts = Appliance.objects.order_by().values('template__provider').annotate(
+            managing=Count('id'),
+            provisioning=Sum(Case(
+                When(ready=False, marked_for_deletion=False, ip_address=None, then=1),
+                default=0, output_field=IntegerField())))
+        for row in counts:
+            self.managing[row['template__provider']] = row['managing']
+            self.provisioning[row['template__provider']] = row['provisioning']
+        self.preparing = dict(
+            Template.objects.filter(ready=False).order_by().values('provider').annotate(
+                preparing=Count('id')).values_list('provider', 'preparing'))
+
+    def attach(self, providers):
+        """Make the providers use this snapshot for their counts"""
+        for provider in providers:
+            provider.load_snapshot = self
+        return providers
+
+    def attach_templates(self, templates):
+        """Make the providers of the templates use this snapshot for their counts"""
+        templates = list(templates)
+        self.attach([template.provider for template in templates])
+        return templates
+
+    def appliance_added(self, provider_id):
+        """Count an appliance that started provisioning on a provider after the snapshot"""
+        self.provisioning[provider_id] = self.provisioning.get(provider_id, 0) + 1
+        self.managing[provider_id] = self.managing.get(provider_id, 0) + 1
+
+
 class Group(MetadataMixin):
     id = models.CharField(max_length=32, primary_key=True,
         help_text="Group name as trackerbot says. (eg. upstream, downstream-53z, ...)")
@@ -1409,8 +1490,9 @@ class AppliancePool(MetadataMixin):
 
     @property
     def possible_provisioning_templates(self):
+        templates = ProviderLoad().attach_templates(self.possible_templates)
         return sorted(
-            filter(lambda tpl: tpl.provider.free, self.possible_templates),
+            filter(lambda tpl: tpl.provider.free, templates),
             # Sort by date and load to pick the best match (least loaded provider)
             key=lambda tpl: (tpl.date, 1.0 - tpl.provider.appliance_load), reverse=True)
 
@@ -1570,7 +1652,7 @@ class AppliancePool(MetadataMixin):
         for template in self.possible_templates:
             providers.add(template.provider)
         slots = 0
-        for provider in providers:
+        for provider in ProviderLoad().attach(providers):
             slots += provider.remaining_appliance_slots
         return slots
 
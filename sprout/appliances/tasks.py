@@ -29,7 +29,7 @@ import socket
 
 from appliances.models import (
     Provider, Group, Template, Appliance, AppliancePool, DelayedProvisionTask,
-    MismatchVersionMailer, User, GroupShepherd)
+    MismatchVersionMailer, User, GroupShepherd, ProviderLoad)
 from sprout import settings, redis
 from sprout.irc_bot import send_message
 from sprout.log import create_logger
@@ -455,7 +455,8 @@ def prepare_template_deploy(self, template_id):
         if template.vm_mgmt is None or not template.vm_mgmt.exists:
             template.set_status("Deploying the template.")
             provider_data = template.provider.provider_data
-            kwargs = provider_data["sprout"]
+            # a copy, the provider data may be the shared cfme_data
+            kwargs = dict(provider_data["sprout"])
             kwargs["power_on"] = True
             if "datastore" not in kwargs and "allowed_datastore" in provider_data:
                 kwargs["datastore"] = provider_data["allowed_datastore"]
@@ -1384,6 +1385,8 @@ def generic_shepherd(self, preconfigured):
     appliances. For each template group, it keeps the last template's appliances spinned up in
     required quantity. If new template comes out of the door, it automatically kills the older
     running template's appliances and spins up new ones. Sorts the groups by the fulfillment."""
+    # Provider counts for the whole pass, instead of counting rows per template per group
+    provider_load = ProviderLoad()
     for gs in sorted(
             GroupShepherd.objects.all(), key=lambda g: g.get_fulfillment_percentage(preconfigured)):
         prov_filter = {'provider__user_groups': gs.user_group}
@@ -1428,7 +1431,8 @@ def generic_shepherd(self, preconfigured):
                 usable=True, ready=True, template_group=gs.template_group,
                 preconfigured=preconfigured, **filter_keep).all())
         # If it can be deployed, it must exist
-        possible_templates_for_provision = filter(lambda tpl: tpl.exists, possible_templates)
+        possible_templates_for_provision = provider_load.attach_templates(
+            filter(lambda tpl: tpl.exists, possible_templates))
         appliances = []
         for template in possible_templates:
             appliances.extend(
@@ -1454,6 +1458,7 @@ def generic_shepherd(self, preconfigured):
                         template=chosen_template,
                         name=new_appliance_name)
                     appliance.save()
+                    provider_load.appliance_added(chosen_template.provider_id)
                     self.logger.info(
                         "Adding an appliance to shepherd: {}/{}".format(appliance.id,
                                                                         appliance.name))
@@ -1,4 +1,35 @@
 # -*- coding: utf-8 -*-
-# from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.test import TestCase
+
+from appliances.models import Appliance, Group, Provider, ProviderLoad, Template
+
+
+class ProviderLoadTestCase(TestCase):
+    def setUp(self):
+        group = Group.objects.create(id='downstream-59z')
+        self.providers = [Provider.objects.create(id='rhv{}'.format(i)) for i in range(3)]
+        for index, provider in enumerate(self.providers):
+            templates = []
+            for number in range(index + 2):
+                templates.append(Template.objects.create(
+                    provider=provider, template_group=group, date=date.today(),
+                    original_name='cfme-59{}'.format(number), name='cfme-59{}'.format(number),
+                    ready=number > 0))
+            for number in range(2 * index + 3):
+                Appliance.objects.create(
+                    template=templates[number % len(templates)], name='appliance{}'.format(number),
+                    ready=number % 3 == 0, ip_address='10.0.0.1' if number % 2 else None)
+
+    def test_counts_match_the_per_provider_queries(self):
+        load = ProviderLoad()
+        for provider in self.providers:
+            expected = (provider.num_currently_managing, provider.num_currently_provisioning,
+                        provider.num_templates_preparing)
+            load.attach([provider])
+            self.assertEqual(
+                (provider.num_currently_managing, provider.num_currently_provisioning,
+                 provider.num_templates_preparing),
+                expected)
+            provider.load_snapshot = None